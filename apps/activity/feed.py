@@ -0,0 +1,155 @@
+from datetime import datetime
+from django.db import transaction
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+from django.utils import timezone
+from ..groups.models import GroupMember
+from ..tasks.queue import enqueue_many
+from ..users.currencies import currencies
+from .models import Activity
+
+# Activities are written once per recipient when the change happens (fan-out
+# on write), so reading a feed is one range scan on (user, created_at, id)
+# instead of a union over expenses, memberships and friendships.
+
+FAN_OUT_TASK = 'activity.fan_out'
+FAN_OUT_BATCH_SIZE = 1000
+TRIM_BATCH_SIZE = 5000
+KEEP_PER_FEED = 500
+
+DESCRIPTION_LENGTH = 100
+# members_added keeps this many ids for display and the full count.
+MEMBER_IDS_LENGTH = 20
+
+
+def activity(verb, actor_id, group_id=None, target_id=None, data=None, recipient_ids=None):
+    """
+    Task payload for one activity. Group activities go to every member of the
+    group at fan-out time plus the group's own feed; others go to recipient_ids.
+    """
+    return {
+        'verb': verb,
+        'actor_id': actor_id,
+        'group_id': group_id,
+        'target_id': target_id,
+        'data': data or {},
+        'recipient_ids': sorted(set(recipient_ids)) if recipient_ids else [],
+        'created_at': timezone.now().isoformat(),
+    }
+
+
+def publish(activities):
+    """Fan the activities out from the task queue once the current transaction commits."""
+    enqueue_many(FAN_OUT_TASK, list(activities))
+
+
+def expense_activity(expense, participant_ids):
+    currency = currencies.get(expense.currency_id) if expense.currency_id else None
+
+    return activity(
+        Activity.VERB_EXPENSE_ADDED,
+        expense.paid_by_id,
+        group_id=expense.group_id,
+        target_id=expense.id,
+        data={
+            'amount': str(expense.amount),
+            'currency': currency.code if currency else None,
+            'description': (expense.description or '')[:DESCRIPTION_LENGTH],
+        },
+        recipient_ids=None if expense.group_id else participant_ids
+    )
+
+
+def members_activity(group_id, actor_id, member_ids):
+    return activity(
+        Activity.VERB_MEMBERS_ADDED,
+        actor_id,
+        group_id=group_id,
+        data={'member_ids': member_ids[:MEMBER_IDS_LENGTH], 'count': len(member_ids)}
+    )
+
+
+def friendship_activity(friendship, actor_id):
+    return activity(
+        Activity.VERB_FRIEND_ACCEPTED,
+        actor_id,
+        target_id=friendship.id,
+        recipient_ids=[friendship.from_user_id, friendship.to_user_id]
+    )
+
+
+def fan_out(verb, actor_id, group_id, target_id, data, recipient_ids, created_at):
+    """
+    Write one row per recipient. A retried task finds its rows already there
+    and writes nothing, since all of them go in with one transaction.
+    """
+    created_at = datetime.fromisoformat(created_at)
+
+    if group_id:
+        recipient_ids = list(GroupMember.objects.filter(group_id=group_id).values_list('user_id', flat=True))
+        # The group's own feed; probed first because it is written whatever the membership.
+        probe = Activity.objects.filter(user__isnull=True, group_id=group_id)
+    elif recipient_ids:
+        probe = Activity.objects.filter(user_id=recipient_ids[0])
+    else:
+        return 0
+
+    if probe.filter(created_at=created_at, verb=verb, target_id=target_id).exists():
+        return 0
+
+    rows = [
+        Activity(
+            user_id=user_id,
+            group_id=group_id,
+            verb=verb,
+            actor_id=actor_id,
+            target_id=target_id,
+            data=data,
+            created_at=created_at
+        )
+        for user_id in ([None] if group_id else []) + recipient_ids
+    ]
+
+    with transaction.atomic():
+        Activity.objects.bulk_create(rows, batch_size=FAN_OUT_BATCH_SIZE)
+
+    return len(rows)
+
+
+def _overflow_ids(queryset, partition, keep):
+    return (
+        queryset
+        .annotate(position=Window(
+            RowNumber(),
+            partition_by=[F(partition)],
+            order_by=[F('created_at').desc(), F('id').desc()]
+        ))
+        .filter(position__gt=keep)
+        .values_list('id', flat=True)
+    )
+
+
+def trim(keep=KEEP_PER_FEED, batch_size=TRIM_BATCH_SIZE):
+    """
+    Delete all but the newest `keep` entries of every user's and every group's
+    feed. Each batch is one DELETE whose ids come from a ranking subquery, so
+    no id list is held in memory and no single statement holds locks for long.
+    Returns the number of rows deleted.
+    """
+    deleted = 0
+    feeds = [
+        (Activity.objects.filter(user__isnull=False), 'user_id'),
+        (Activity.objects.filter(user__isnull=True, group__isnull=False), 'group_id'),
+    ]
+
+    for queryset, partition in feeds:
+        overflow = _overflow_ids(queryset, partition, keep)
+
+        while True:
+            count, _ = Activity.objects.filter(id__in=overflow[:batch_size]).delete()
+            deleted += count
+
+            if count < batch_size:
+                break
+
+    return deleted
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from ...feed import KEEP_PER_FEED, TRIM_BATCH_SIZE, trim
+
+
+class Command(BaseCommand):
+    help = 'Keep only the newest --keep entries of every user and group activity feed.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--keep', type=int, default=KEEP_PER_FEED)
+        parser.add_argument('--batch-size', type=int, default=TRIM_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        deleted = trim(options['keep'], options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} activity row(s).'))
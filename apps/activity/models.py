@@ -0,0 +1,38 @@
+from django.db import models
+from django.db.models import Q
+from django.utils import timezone
+from ..users.models import User
+from ..groups.models import Group
+
+
+class Activity(models.Model):
+    VERB_EXPENSE_ADDED = 'expense_added'
+    VERB_MEMBERS_ADDED = 'members_added'
+    VERB_FRIEND_ACCEPTED = 'friend_accepted'
+
+    VERB_CHOICES = [
+        (VERB_EXPENSE_ADDED, 'Expense added'),
+        (VERB_MEMBERS_ADDED, 'Members added'),
+        (VERB_FRIEND_ACCEPTED, 'Friend accepted'),
+    ]
+
+    # One row per recipient. The group's own feed is the copy with no user.
+    user = models.ForeignKey(User, related_name='activities', on_delete=models.CASCADE, null=True, blank=True)
+    group = models.ForeignKey(Group, related_name='+', on_delete=models.CASCADE, null=True, blank=True)
+    verb = models.CharField(max_length=20, choices=VERB_CHOICES)
+    actor = models.ForeignKey(User, related_name='+', on_delete=models.SET_NULL, null=True, blank=True)
+    target_id = models.IntegerField(null=True, blank=True)
+    # Just enough to render the entry without joining back to the source rows.
+    data = models.JSONField(default=dict)
+    # When the change happened, not when the worker fanned it out.
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'created_at', 'id'], name='activity_user_feed_idx'),
+            models.Index(
+                fields=['group', 'created_at', 'id'],
+                name='activity_group_feed_idx',
+                condition=Q(user__isnull=True)
+            ),
+        ]
@@ -0,0 +1,8 @@
+from rest_framework import serializers
+from .models import Activity
+
+
+class ActivitySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Activity
+        fields = ['id', 'verb', 'actor', 'group', 'target_id', 'data', 'created_at']
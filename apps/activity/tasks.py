@@ -0,0 +1,7 @@
+from ..tasks.queue import task
+from .feed import FAN_OUT_TASK, fan_out
+
+
+@task(FAN_OUT_TASK)
+def fan_out_activity(**payload):
+    fan_out(**payload)
@@ -0,0 +1,129 @@
+from datetime import timedelta
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from ..groups.models import Group, GroupMember
+from ..tasks.models import Task
+from ..tasks.queue import claim, execute
+from ..users.models import User
+from .feed import FAN_OUT_TASK, activity, fan_out, trim
+from .models import Activity
+
+
+class FanOutTests(APITestCase):
+    def setUp(self):
+        self.users = [User.objects.create(email=f'user{i}@example.com') for i in range(3)]
+        self.group = Group.objects.create(name='Trip', group_type=Group.TYPE_TRIP, created_by=self.users[0])
+        GroupMember.objects.bulk_create([GroupMember(group=self.group, user=user) for user in self.users[:2]])
+
+    def test_group_activity_reaches_members_and_the_group_feed(self):
+        written = fan_out(**activity(Activity.VERB_MEMBERS_ADDED, self.users[0].id, group_id=self.group.id))
+
+        self.assertEqual(written, 3)
+        self.assertEqual(
+            set(Activity.objects.values_list('user_id', 'group_id')),
+            {(None, self.group.id), (self.users[0].id, self.group.id), (self.users[1].id, self.group.id)}
+        )
+
+    def test_direct_activity_reaches_only_its_recipients(self):
+        recipients = [self.users[2].id, self.users[0].id]
+
+        fan_out(**activity(Activity.VERB_FRIEND_ACCEPTED, self.users[0].id, target_id=7, recipient_ids=recipients))
+
+        self.assertEqual(sorted(Activity.objects.values_list('user_id', flat=True)), sorted(recipients))
+
+    def test_retried_fan_out_writes_nothing(self):
+        payload = activity(Activity.VERB_MEMBERS_ADDED, self.users[0].id, group_id=self.group.id)
+        fan_out(**payload)
+
+        self.assertEqual(fan_out(**payload), 0)
+        self.assertEqual(Activity.objects.count(), 3)
+
+    def test_expense_is_published_through_the_queue(self):
+        self.client.force_authenticate(self.users[0])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('create-expense'), {
+                'amount': '30.00',
+                'description': 'Dinner',
+                'group_id': self.group.id,
+                'split_type': 'equal',
+                'splits': [{'user_id': user.id} for user in self.users[:2]],
+            }, format='json')
+
+        self.assertEqual(response.status_code, 201, response.data)
+        claimed, = [queued for queued in claim(10, lease=300) if queued.name == FAN_OUT_TASK]
+        self.assertTrue(execute(claimed.id, claimed.name, claimed.payload, claimed.attempts, claimed.max_attempts))
+        self.assertEqual(Task.objects.get(id=claimed.id).status, Task.STATUS_DONE)
+
+        entry = Activity.objects.get(user=self.users[1])
+        self.assertEqual(entry.verb, Activity.VERB_EXPENSE_ADDED)
+        self.assertEqual(entry.target_id, response.data['id'])
+        self.assertEqual(entry.data['amount'], '30.00')
+
+
+class FeedTests(APITestCase):
+    def setUp(self):
+        self.user, self.other = User.objects.create(email='ana@example.com'), User.objects.create(email='bo@example.com')
+        self.group = Group.objects.create(name='Trip', group_type=Group.TYPE_TRIP, created_by=self.user)
+        GroupMember.objects.create(group=self.group, user=self.user)
+        self.now = timezone.now()
+
+    def _entries(self, count, **fields):
+        Activity.objects.bulk_create([
+            Activity(verb=Activity.VERB_EXPENSE_ADDED, target_id=i, created_at=self.now - timedelta(minutes=i), **fields)
+            for i in range(count)
+        ])
+
+    def test_my_feed_pages_newest_first(self):
+        self._entries(5, user=self.user)
+        self._entries(2, user=self.other)
+        self.client.force_authenticate(self.user)
+        url = reverse('my-activity')
+
+        first = self.client.get(url, {'page_size': 3}).json()
+        second = self.client.get(url, {'page_size': 3, 'cursor': first['cursor']}).json()
+
+        self.assertEqual([entry['target_id'] for entry in first['results']], [0, 1, 2])
+        self.assertEqual([entry['target_id'] for entry in second['results']], [3, 4])
+        self.assertIsNone(second['cursor'])
+
+    def test_group_feed_is_for_members_only(self):
+        self._entries(2, group=self.group)
+        self._entries(1, group=self.group, user=self.user)
+        url = reverse('group-activity', args=[self.group.id])
+
+        self.client.force_authenticate(self.user)
+        response = self.client.get(url)
+        self.assertEqual([entry['target_id'] for entry in response.json()['results']], [0, 1])
+
+        self.client.force_authenticate(self.other)
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+
+class TrimTests(APITestCase):
+    def setUp(self):
+        self.users = [User.objects.create(email=f'user{i}@example.com') for i in range(2)]
+        self.group = Group.objects.create(name='Trip', group_type=Group.TYPE_TRIP, created_by=self.users[0])
+        now = timezone.now()
+
+        Activity.objects.bulk_create([
+            Activity(verb=Activity.VERB_EXPENSE_ADDED, target_id=i, created_at=now - timedelta(minutes=i), **fields)
+            for fields in ({'user': self.users[0]}, {'user': self.users[1]}, {'group': self.group})
+            for i in range(7)
+        ])
+
+    def test_keeps_the_newest_entries_of_every_feed(self):
+        deleted = trim(keep=3, batch_size=2)
+
+        self.assertEqual(deleted, 12)
+        for feed in (
+            Activity.objects.filter(user=self.users[0]),
+            Activity.objects.filter(user=self.users[1]),
+            Activity.objects.filter(user__isnull=True, group=self.group),
+        ):
+            self.assertEqual(sorted(feed.values_list('target_id', flat=True)), [0, 1, 2])
+
+    def test_nothing_to_trim(self):
+        self.assertEqual(trim(keep=7), 0)
+        self.assertEqual(Activity.objects.count(), 21)
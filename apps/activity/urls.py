@@ -0,0 +1,6 @@
+from django.urls import path
+from .views import MyActivityView
+
+urlpatterns = [
+    path('', MyActivityView.as_view(), name='my-activity'),
+]
@@ -0,0 +1,28 @@
+from rest_framework import generics, permissions
+from rest_framework.exceptions import NotFound
+from ..expenses.pagination import KeysetPagination
+from ..groups.models import GroupMember
+from .models import Activity
+from .serializers import ActivitySerializer
+
+
+class MyActivityView(generics.ListAPIView):
+    permission_classes = [permissions.IsAuthenticated]
+    serializer_class = ActivitySerializer
+    pagination_class = KeysetPagination
+
+    def get_queryset(self):
+        return Activity.objects.filter(user=self.request.user)
+
+class GroupActivityView(generics.ListAPIView):
+    permission_classes = [permissions.IsAuthenticated]
+    serializer_class = ActivitySerializer
+    pagination_class = KeysetPagination
+
+    def get_queryset(self):
+        group_id = self.kwargs['group_id']
+
+        if not GroupMember.objects.filter(group_id=group_id, user=self.request.user).exists():
+            raise NotFound('Group not found.')
+
+        return Activity.objects.filter(group_id=group_id, user__isnull=True)
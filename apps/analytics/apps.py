@@ -0,0 +1,8 @@
+from django.apps import AppConfig
+
+
+class AnalyticsConfig(AppConfig):
+    name = 'apps.analytics'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from ...rollups import REBUILD_CHUNK_SIZE, rebuild
+
+
+class Command(BaseCommand):
+    help = (
+        'Rebuild the monthly spend rollups from expenses, aggregating --chunk-size expense '
+        'ids per transaction. Pause expense writes while it runs.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=REBUILD_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        scanned = rebuild(
+            options['chunk_size'],
+            progress=lambda last_id: self.stdout.write(f'Rolled up expenses through id {last_id}.')
+        )
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt rollups from {scanned} expense(s).'))
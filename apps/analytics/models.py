@@ -0,0 +1,52 @@
+from django.db import models
+from django.db.models import Q
+from ..users.models import Currency, User
+from ..groups.models import Group
+
+# Monthly spend per scope, kept current by apps/analytics/rollups.py so
+# dashboards never scan Expense or ExpenseSplit. month is the first day of
+# the month; amounts in different currencies are never summed together.
+
+AMOUNT_DIGITS = 14
+
+
+def unique_per_currency(fields, name):
+    # Two partial constraints rather than NULLS NOT DISTINCT, which needs
+    # Postgres 15: expenses without a currency still share a single row.
+    return [
+        models.UniqueConstraint(fields=[*fields, 'currency'], condition=Q(currency__isnull=False), name=name),
+        models.UniqueConstraint(fields=fields, condition=Q(currency__isnull=True), name=f'{name}_no_currency'),
+    ]
+
+
+class GroupSpend(models.Model):
+    group = models.ForeignKey(Group, related_name='+', on_delete=models.CASCADE)
+    month = models.DateField()
+    currency = models.ForeignKey(Currency, related_name='+', on_delete=models.PROTECT, null=True, blank=True)
+    total = models.DecimalField(max_digits=AMOUNT_DIGITS, decimal_places=2, default=0)
+    expense_count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = unique_per_currency(['group', 'month'], 'group_spend_unique')
+
+class GroupTypeSpend(models.Model):
+    group_type = models.CharField(max_length=10, choices=Group.TYPE_CHOICES)
+    month = models.DateField()
+    currency = models.ForeignKey(Currency, related_name='+', on_delete=models.PROTECT, null=True, blank=True)
+    total = models.DecimalField(max_digits=AMOUNT_DIGITS, decimal_places=2, default=0)
+    expense_count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = unique_per_currency(['group_type', 'month'], 'group_type_spend_unique')
+
+class UserSpend(models.Model):
+    user = models.ForeignKey(User, related_name='+', on_delete=models.CASCADE)
+    month = models.DateField()
+    currency = models.ForeignKey(Currency, related_name='+', on_delete=models.PROTECT, null=True, blank=True)
+    # What the user paid for, and their own share of everything they were split into.
+    paid = models.DecimalField(max_digits=AMOUNT_DIGITS, decimal_places=2, default=0)
+    share = models.DecimalField(max_digits=AMOUNT_DIGITS, decimal_places=2, default=0)
+    expense_count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = unique_per_currency(['user', 'month'], 'user_spend_unique')
@@ -0,0 +1,192 @@
+from collections import defaultdict
+from decimal import Decimal
+from functools import reduce
+from operator import or_
+from django.db import transaction
+from django.db.models import Case, Count, DateField, DecimalField, F, IntegerField, Max, Min, Q, Sum, Value, When
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+from ..expenses.models import Expense, ExpenseSplit
+from .models import AMOUNT_DIGITS, GroupSpend, GroupTypeSpend, UserSpend
+
+LOCK_BATCH_SIZE = 500
+REBUILD_CHUNK_SIZE = 50000
+
+# Rollups are applied in this order, each sorted by key, so writers touching
+# overlapping rows take their locks in the same order (as in balances.ledger).
+ROLLUPS = [
+    ('groups', GroupSpend, ('group_id', 'month', 'currency_id'), ('total', 'expense_count')),
+    ('group_types', GroupTypeSpend, ('group_type', 'month', 'currency_id'), ('total', 'expense_count')),
+    ('users', UserSpend, ('user_id', 'month', 'currency_id'), ('paid', 'share', 'expense_count')),
+]
+
+
+def month_of(moment):
+    return timezone.localtime(moment).date().replace(day=1)
+
+
+class SpendDeltas:
+    """Increments per rollup row, keyed like the rows' unique constraints."""
+
+    def __init__(self):
+        self.groups = defaultdict(lambda: [Decimal('0.00'), 0])
+        self.group_types = defaultdict(lambda: [Decimal('0.00'), 0])
+        self.users = defaultdict(lambda: [Decimal('0.00'), Decimal('0.00'), 0])
+
+    def add_expense(self, expense, group_type, split_map, sign=1):
+        """Count an expense in (sign=1) or out (sign=-1). group_type is that of expense.group, if any."""
+        month = month_of(expense.created_at)
+        currency_id = expense.currency_id
+
+        if expense.group_id:
+            for row in (self.groups[(expense.group_id, month, currency_id)], self.group_types[(group_type, month, currency_id)]):
+                row[0] += expense.amount * sign
+                row[1] += sign
+
+        self.users[(expense.paid_by_id, month, currency_id)][0] += expense.amount * sign
+
+        for user_id, amount in split_map.items():
+            row = self.users[(user_id, month, currency_id)]
+            row[1] += amount * sign
+            row[2] += sign
+
+    def add(self, name, key, *values):
+        row = getattr(self, name)[key]
+        for index, value in enumerate(values):
+            row[index] += value
+
+
+def _sort_key(key):
+    return tuple(0 if part is None else part for part in key)
+
+
+def _output_field(value):
+    return DecimalField(max_digits=AMOUNT_DIGITS, decimal_places=2) if isinstance(value, Decimal) else IntegerField()
+
+
+def _apply(model, key_fields, value_fields, deltas):
+    keys = sorted((key for key, values in deltas.items() if any(values)), key=_sort_key)
+
+    for start in range(0, len(keys), LOCK_BATCH_SIZE):
+        batch = keys[start:start + LOCK_BATCH_SIZE]
+        matches = [Q(**dict(zip(key_fields, key))) for key in batch]
+        condition = reduce(or_, matches)
+
+        model.objects.bulk_create([model(**dict(zip(key_fields, key))) for key in batch], ignore_conflicts=True)
+
+        list(model.objects.select_for_update().filter(condition).order_by(*key_fields).values_list('id', flat=True))
+
+        updates = {}
+        for index, field in enumerate(value_fields):
+            output_field = _output_field(deltas[batch[0]][index])
+            updates[field] = F(field) + Case(
+                *[When(match, then=Value(deltas[key][index], output_field=output_field)) for match, key in zip(matches, batch)],
+                default=Value(0, output_field=output_field),
+                output_field=output_field
+            )
+
+        model.objects.filter(condition).update(**updates)
+
+
+def apply_deltas(deltas):
+    """
+    Add SpendDeltas to the rollup tables. Missing rows are created with an
+    upsert and every row is incremented in place, so concurrent writers
+    never overwrite each other's totals.
+    """
+    with transaction.atomic(savepoint=False):
+        for name, model, key_fields, value_fields in ROLLUPS:
+            _apply(model, key_fields, value_fields, getattr(deltas, name))
+
+
+def record_expenses(entries, sign=1):
+    """Apply (expense, group_type, split_map) entries to the rollups in one pass."""
+    deltas = SpendDeltas()
+
+    for expense, group_type, split_map in entries:
+        deltas.add_expense(expense, group_type, split_map, sign)
+
+    apply_deltas(deltas)
+
+
+def remove_expenses(expenses, batch_size=LOCK_BATCH_SIZE):
+    """Count expenses out before they are deleted: one split query and one rollup pass per batch."""
+    for start in range(0, len(expenses), batch_size):
+        batch = expenses[start:start + batch_size]
+        split_maps = defaultdict(dict)
+
+        for expense_id, user_id, amount in ExpenseSplit.objects.filter(
+            expense_id__in=[expense.id for expense in batch]
+        ).values_list('expense_id', 'user_id', 'amount'):
+            split_maps[expense_id][user_id] = amount
+
+        record_expenses(
+            [
+                (expense, expense.group.group_type if expense.group_id else None, split_maps[expense.id])
+                for expense in batch
+            ],
+            sign=-1
+        )
+
+
+def _chunk_deltas(start, end):
+    """The rollup increments of expenses with start <= id < end, aggregated in SQL."""
+    deltas = SpendDeltas()
+    expenses = Expense.objects.filter(id__gte=start, id__lt=end).order_by()
+    month = TruncMonth('created_at', output_field=DateField())
+
+    grouped = expenses.filter(group__isnull=False)
+
+    for group_id, expense_month, currency_id, total, count in (
+        grouped.values_list('group_id', month, 'currency_id').annotate(Sum('amount'), Count('id'))
+    ):
+        deltas.add('groups', (group_id, expense_month, currency_id), total, count)
+
+    for group_type, expense_month, currency_id, total, count in (
+        grouped.values_list('group__group_type', month, 'currency_id').annotate(Sum('amount'), Count('id'))
+    ):
+        deltas.add('group_types', (group_type, expense_month, currency_id), total, count)
+
+    for user_id, expense_month, currency_id, total in (
+        expenses.values_list('paid_by_id', month, 'currency_id').annotate(Sum('amount'))
+    ):
+        deltas.add('users', (user_id, expense_month, currency_id), total, Decimal('0.00'), 0)
+
+    shares = (
+        ExpenseSplit.objects
+        .filter(expense_id__gte=start, expense_id__lt=end)
+        .values_list('user_id', TruncMonth('expense__created_at', output_field=DateField()), 'expense__currency_id')
+        .annotate(Sum('amount'), Count('id'))
+        .order_by()
+    )
+
+    for user_id, expense_month, currency_id, total, count in shares:
+        deltas.add('users', (user_id, expense_month, currency_id), Decimal('0.00'), total, count)
+
+    return deltas
+
+
+def rebuild(chunk_size=REBUILD_CHUNK_SIZE, progress=None):
+    """
+    Recompute every rollup from Expense and ExpenseSplit: clear the tables,
+    then aggregate expenses chunk by chunk of ids, one transaction each.
+    Expenses created while it runs are counted twice or not at all, so run
+    it while writes are paused. Returns the number of expenses scanned.
+    """
+    bounds = Expense.objects.aggregate(low=Min('id'), high=Max('id'))
+
+    with transaction.atomic():
+        for _, model, _, _ in ROLLUPS:
+            model.objects.all().delete()
+
+    if bounds['low'] is None:
+        return 0
+
+    for start in range(bounds['low'], bounds['high'] + 1, chunk_size):
+        with transaction.atomic():
+            apply_deltas(_chunk_deltas(start, start + chunk_size))
+
+        if progress:
+            progress(min(start + chunk_size - 1, bounds['high']))
+
+    return Expense.objects.filter(id__lte=bounds['high']).count()
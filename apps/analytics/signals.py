@@ -0,0 +1,15 @@
+from django.db.models.signals import pre_delete
+from django.dispatch import receiver
+from ..expenses.deletion import CascadeBatches
+from ..expenses.models import Expense
+from .rollups import remove_expenses
+
+deletions = CascadeBatches()
+
+
+@receiver(pre_delete, sender=Expense)
+def remove_expense_from_rollups(sender, instance, origin=None, **kwargs):
+    expenses = deletions.pending(instance, origin)
+
+    if expenses:
+        remove_expenses(expenses)
@@ -0,0 +1,8 @@
+from django.urls import path
+from .views import GroupSpendView, GroupTypeSpendView, MySpendView
+
+urlpatterns = [
+    path('me/', MySpendView.as_view(), name='my-spend'),
+    path('groups/<int:group_id>/', GroupSpendView.as_view(), name='group-spend'),
+    path('group-types/', GroupTypeSpendView.as_view(), name='group-type-spend'),
+]
@@ -0,0 +1,109 @@
+from datetime import date, datetime
+from decimal import Decimal
+from django.utils import timezone
+from rest_framework import permissions, status
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from ..groups.models import GroupMember
+from ..users.currencies import currencies
+from .models import GroupSpend, GroupTypeSpend, UserSpend
+from .rollups import month_of
+
+DEFAULT_MONTHS = 12
+
+
+def _parse_month(value, name):
+    try:
+        return datetime.strptime(value, '%Y-%m').date()
+    except ValueError:
+        raise ValidationError({name: 'Expected a month as YYYY-MM.'})
+
+
+def _shift(month, months):
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _month_range(request):
+    """?from=YYYY-MM&to=YYYY-MM, both inclusive; the last DEFAULT_MONTHS months by default."""
+    end = request.query_params.get('to')
+    end = _parse_month(end, 'to') if end else month_of(timezone.now())
+    start = request.query_params.get('from')
+    start = _parse_month(start, 'from') if start else _shift(end, 1 - DEFAULT_MONTHS)
+
+    if start > end:
+        raise ValidationError({'from': 'Must not be after to.'})
+
+    return start, end
+
+
+def _currency_code(currency_id):
+    currency = currencies.get(currency_id) if currency_id else None
+    return currency.code if currency else None
+
+
+class SpendView(APIView):
+    """Monthly spend read from a rollup table only, so latency does not grow with history."""
+    permission_classes = [permissions.IsAuthenticated]
+    rollup_model = None
+    # Extra key columns returned with each row, then the summed values.
+    key_fields = ()
+    value_fields = ('total', 'expense_count')
+
+    def filter_rollup(self, rollup, request, **kwargs):
+        return rollup
+
+    def get(self, request, **kwargs):
+        start, end = _month_range(request)
+        rows = (
+            self.filter_rollup(self.rollup_model.objects.all(), request, **kwargs)
+            .filter(month__gte=start, month__lte=end)
+            .order_by('month', *self.key_fields, 'currency_id')
+            .values_list('month', 'currency_id', *self.key_fields, *self.value_fields)
+        )
+
+        return Response(
+            {
+                'from': start.strftime('%Y-%m'),
+                'to': end.strftime('%Y-%m'),
+                'months': [
+                    {
+                        'month': month.strftime('%Y-%m'),
+                        'currency': _currency_code(currency_id),
+                        **{
+                            field: str(value) if isinstance(value, Decimal) else value
+                            for field, value in zip(self.key_fields + self.value_fields, values)
+                        }
+                    }
+                    for month, currency_id, *values in rows
+                ]
+            },
+            status=status.HTTP_200_OK
+        )
+
+class GroupSpendView(SpendView):
+    rollup_model = GroupSpend
+
+    def filter_rollup(self, rollup, request, group_id):
+        if not GroupMember.objects.filter(group_id=group_id, user=request.user).exists():
+            raise NotFound('Group not found.')
+
+        return rollup.filter(group_id=group_id)
+
+class MySpendView(SpendView):
+    rollup_model = UserSpend
+    value_fields = ('paid', 'share', 'expense_count')
+
+    def filter_rollup(self, rollup, request):
+        return rollup.filter(user=request.user)
+
+class GroupTypeSpendView(SpendView):
+    # Platform-wide figures.
+    permission_classes = [permissions.IsAdminUser]
+    rollup_model = GroupTypeSpend
+    key_fields = ('group_type',)
+
+    def filter_rollup(self, rollup, request):
+        group_type = request.query_params.get('group_type')
+        return rollup.filter(group_type=group_type) if group_type else rollup
@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class BalanceConfig(AppConfig):
     name = 'apps.balances'
+
+    def ready(self):
+        from . import signals  # noqa: F401
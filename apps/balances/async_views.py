@@ -0,0 +1,67 @@
+from django.views.decorators.http import require_GET
+from rest_framework import status
+from fittus.async_support import async_authenticated, json_response
+from ..groups.models import Group, GroupMember
+from ..users.currencies import currencies
+from ..users.fx import FxRateMissing
+from .events import agroup_balances, balance_totals, parse_as_of
+from .settlements import asettlement_plan, build_balances, group_pair_totals
+
+
+@require_GET
+@async_authenticated
+async def group_settlements(request, group_id):
+    group = await Group.objects.filter(id=group_id, members__user_id=request.user.id).values('currency_id').afirst()
+
+    if not group:
+        return json_response({"error": "Group not found"}, status=status.HTTP_404_NOT_FOUND)
+
+    await currencies.asnapshot()
+
+    currency_id = group['currency_id'] or request.user.default_currency_id
+    code = request.GET.get('currency')
+
+    if code:
+        currency = currencies.from_code(code)
+
+        if not currency:
+            return json_response({"error": "Unknown currency"}, status=status.HTTP_400_BAD_REQUEST)
+
+        currency_id = currency.id
+
+    try:
+        plan = await asettlement_plan(group_id, currency_id)
+    except FxRateMissing as exc:
+        return json_response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+    return json_response(plan)
+
+
+@require_GET
+@async_authenticated
+async def group_balances(request, group_id):
+    member_ids = [
+        user_id async for user_id in
+        GroupMember.objects.filter(group_id=group_id).order_by('user_id').values_list('user_id', flat=True)
+    ]
+
+    if request.user.id not in member_ids:
+        return json_response({"error": "Group not found"}, status=status.HTTP_404_NOT_FOUND)
+
+    as_of = request.GET.get('as_of')
+
+    if not as_of:
+        totals = [row async for row in group_pair_totals(group_id)]
+        await currencies.asnapshot()
+
+        return json_response({"group_id": group_id, "balances": build_balances(member_ids, totals)})
+
+    try:
+        as_of = parse_as_of(as_of)
+    except ValueError:
+        return json_response({"error": "as_of must be an ISO 8601 date or datetime"}, status=status.HTTP_400_BAD_REQUEST)
+
+    totals = balance_totals(await agroup_balances(group_id, as_of))
+    await currencies.asnapshot()
+
+    return json_response({"group_id": group_id, "as_of": as_of, "balances": build_balances(member_ids, totals)})
@@ -0,0 +1,230 @@
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from ..expenses.models import Expense, ExpenseSplit
+from .ledger import net_debts, record_debts
+from .models import BalanceSnapshot, ExpenseEvent
+
+# Snapshots only fold events at least this old, so a transaction that is still
+# open when a snapshot is taken cannot later commit an event below its
+# last_event_id and be skipped by every reconstruction after it.
+SNAPSHOT_LAG = 5 * 60
+
+BACKFILL_BATCH_SIZE = 1000
+
+
+def expense_debts(paid_by_id, split_map):
+    return [(user_id, paid_by_id, amount) for user_id, amount in split_map.items() if user_id != paid_by_id]
+
+
+def _deltas(debts):
+    return [[a, b, int(amount * 100)] for (a, b), amount in sorted(net_debts(debts).items())]
+
+
+def _negated(debts):
+    return [(debtor_id, creditor_id, -amount) for debtor_id, creditor_id, amount in debts]
+
+
+def record_expense_events(changes):
+    """
+    Apply (expense, kind, debts, actor_id) changes to the Balance ledger and
+    append one ExpenseEvent per change, all in a single bulk insert.
+    """
+    events = []
+    ledger_debts = []
+
+    for expense, kind, debts, actor_id in changes:
+        ledger_debts.extend(
+            (debtor_id, creditor_id, expense.currency_id, amount) for debtor_id, creditor_id, amount in debts
+        )
+        events.append(ExpenseEvent(
+            expense_id=expense.id,
+            group_id=expense.group_id,
+            currency_id=expense.currency_id,
+            kind=kind,
+            actor_id=actor_id,
+            deltas=_deltas(debts)
+        ))
+
+    with transaction.atomic(savepoint=False):
+        record_debts(ledger_debts)
+        ExpenseEvent.objects.bulk_create(events)
+
+
+def expense_created(expense, split_map, actor_id=None):
+    record_expense_events([
+        (expense, ExpenseEvent.KIND_CREATED, expense_debts(expense.paid_by_id, split_map), actor_id)
+    ])
+
+
+def expenses_deleted(expenses, actor_id=None, batch_size=BACKFILL_BATCH_SIZE):
+    """Reverse many expenses with one split query and one ledger pass per batch."""
+    for start in range(0, len(expenses), batch_size):
+        batch = expenses[start:start + batch_size]
+        split_maps = defaultdict(dict)
+
+        for expense_id, user_id, amount in ExpenseSplit.objects.filter(
+            expense_id__in=[expense.id for expense in batch]
+        ).values_list('expense_id', 'user_id', 'amount'):
+            split_maps[expense_id][user_id] = amount
+
+        record_expense_events([
+            (
+                expense,
+                ExpenseEvent.KIND_DELETED,
+                _negated(expense_debts(expense.paid_by_id, split_maps[expense.id])),
+                actor_id
+            )
+            for expense in batch
+        ])
+
+
+EVENT_FIELDS = ('id', 'created_at', 'currency_id', 'deltas')
+
+
+def _replay(snapshot, events):
+    balances = defaultdict(int)
+    last_event = None
+
+    if snapshot:
+        last_event = (snapshot.last_event_id, snapshot.as_of)
+        for from_user_id, to_user_id, currency_id, cents in snapshot.balances:
+            balances[(from_user_id, to_user_id, currency_id)] = cents
+
+    for event_id, created_at, currency_id, deltas in events:
+        last_event = (event_id, created_at)
+        for from_user_id, to_user_id, cents in deltas:
+            balances[(from_user_id, to_user_id, currency_id)] += cents
+
+    return {key: cents for key, cents in balances.items() if cents}, last_event
+
+
+def parse_as_of(value):
+    """An ISO 8601 date or datetime (?as_of=); a date means the end of that day. Raises ValueError."""
+    day = parse_date(value)
+    as_of = datetime.combine(day, time.max) if day else parse_datetime(value)
+
+    if as_of is None:
+        raise ValueError(value)
+
+    return timezone.make_aware(as_of) if timezone.is_naive(as_of) else as_of
+
+
+def _balance_sources(group_id, as_of):
+    snapshots = BalanceSnapshot.objects.filter(group_id=group_id)
+    events = ExpenseEvent.objects.filter(group_id=group_id)
+
+    if as_of is not None:
+        snapshots = snapshots.filter(as_of__lte=as_of)
+        events = events.filter(created_at__lte=as_of)
+
+    return snapshots.order_by('-last_event_id').only('last_event_id', 'as_of', 'balances'), events.order_by('id')
+
+
+def group_balances(group_id, as_of=None):
+    """
+    Net balances of a group in cents, keyed by (from_user_id, to_user_id,
+    currency_id) like Balance rows, optionally as they stood at `as_of`.
+    Reads the latest snapshot at or before that point plus the events after
+    it, so the cost grows with the tail instead of the group's history.
+    """
+    snapshots, events = _balance_sources(group_id, as_of)
+    snapshot = snapshots.first()
+
+    if snapshot:
+        events = events.filter(id__gt=snapshot.last_event_id)
+
+    balances, _ = _replay(snapshot, events.values_list(*EVENT_FIELDS))
+    return balances
+
+
+async def agroup_balances(group_id, as_of=None):
+    snapshots, events = _balance_sources(group_id, as_of)
+    snapshot = await snapshots.afirst()
+
+    if snapshot:
+        events = events.filter(id__gt=snapshot.last_event_id)
+
+    balances, _ = _replay(snapshot, [event async for event in events.values_list(*EVENT_FIELDS)])
+    return balances
+
+
+def balance_totals(balances):
+    """group_balances() as (debtor, creditor, currency, amount) rows for settlements.build_balances()."""
+    return [
+        (from_user_id, to_user_id, currency_id, Decimal(cents).scaleb(-2))
+        for (from_user_id, to_user_id, currency_id), cents in balances.items()
+    ]
+
+
+def take_snapshot(group_id):
+    """Fold the group's settled events into a new snapshot. Returns None when there is nothing new."""
+    cutoff = timezone.now() - timedelta(seconds=SNAPSHOT_LAG)
+    previous = (
+        BalanceSnapshot.objects.filter(group_id=group_id)
+        .order_by('-last_event_id')
+        .only('last_event_id', 'as_of', 'balances')
+        .first()
+    )
+
+    events = ExpenseEvent.objects.filter(group_id=group_id, created_at__lt=cutoff)
+    if previous:
+        events = events.filter(id__gt=previous.last_event_id)
+
+    balances, last_event = _replay(previous, events.order_by('id').values_list(*EVENT_FIELDS))
+
+    if last_event is None or (previous and last_event[0] == previous.last_event_id):
+        return None
+
+    last_event_id, as_of = last_event
+
+    return BalanceSnapshot.objects.create(
+        group_id=group_id,
+        last_event_id=last_event_id,
+        as_of=as_of,
+        balances=[
+            [from_user_id, to_user_id, currency_id, cents]
+            for (from_user_id, to_user_id, currency_id), cents in sorted(
+                balances.items(), key=lambda item: (item[0][0], item[0][1], item[0][2] or 0)
+            )
+        ]
+    )
+
+
+def backfill_events(batch_size=BACKFILL_BATCH_SIZE):
+    """
+    Append created events for expenses that predate the event log, leaving
+    the ledger alone since it already holds their debts. Returns the count.
+    """
+    logged = ExpenseEvent.objects.values('expense_id')
+    expenses = (
+        Expense.objects.exclude(id__in=logged)
+        .only('id', 'paid_by_id', 'group_id', 'currency_id', 'created_at')
+        .order_by('id')
+    )
+    created = 0
+    last_id = 0
+
+    while True:
+        batch = list(expenses.filter(id__gt=last_id).prefetch_related('splits')[:batch_size])
+
+        if not batch:
+            return created
+
+        last_id = batch[-1].id
+
+        ExpenseEvent.objects.bulk_create([
+            ExpenseEvent(
+                expense_id=expense.id,
+                group_id=expense.group_id,
+                currency_id=expense.currency_id,
+                kind=ExpenseEvent.KIND_CREATED,
+                actor_id=expense.paid_by_id,
+                deltas=_deltas((split.user_id, expense.paid_by_id, split.amount) for split in expense.splits.all())
+            )
+            for expense in batch
+        ])
+        created += len(batch)
@@ -0,0 +1,152 @@
+from collections import defaultdict
+from decimal import Decimal
+from django.db import transaction
+from django.db.models import Case, DecimalField, F, Q, Sum, Value, When
+from ..expenses.models import ExpenseSplit
+from .models import Balance
+
+LOCK_BATCH_SIZE = 500
+
+# Each pair of users shares a single Balance row per currency with
+# from_user_id < to_user_id. A positive amount means from_user owes to_user,
+# a negative one the reverse, so a debt in one direction nets against a debt
+# in the other in place.
+
+
+def net_debts(debts):
+    deltas = defaultdict(Decimal)
+
+    for debtor_id, creditor_id, amount in debts:
+        if debtor_id == creditor_id or not amount:
+            continue
+
+        if debtor_id < creditor_id:
+            deltas[(debtor_id, creditor_id)] += amount
+        else:
+            deltas[(creditor_id, debtor_id)] -= amount
+
+    return {pair: delta for pair, delta in deltas.items() if delta}
+
+
+def net_currency_debts(debts):
+    """net_debts() of (debtor_id, creditor_id, currency_id, amount), keyed (from_user_id, to_user_id, currency_id)."""
+    by_currency = defaultdict(list)
+
+    for debtor_id, creditor_id, currency_id, amount in debts:
+        by_currency[currency_id].append((debtor_id, creditor_id, amount))
+
+    return {
+        (from_user_id, to_user_id, currency_id): amount
+        for currency_id, currency_debts in by_currency.items()
+        for (from_user_id, to_user_id), amount in net_debts(currency_debts).items()
+    }
+
+
+def _sort_key(key):
+    from_user_id, to_user_id, currency_id = key
+    return from_user_id, to_user_id, currency_id or 0
+
+
+def _key_filter(keys):
+    condition = Q()
+    for from_user_id, to_user_id, currency_id in keys:
+        condition |= Q(from_user_id=from_user_id, to_user_id=to_user_id, currency_id=currency_id)
+    return condition
+
+
+def record_debts(debts):
+    """
+    Apply (debtor_id, creditor_id, currency_id, amount) debts to the ledger.
+
+    Rows are created with an upsert, locked in (from_user_id, to_user_id,
+    currency_id) order and incremented with a single UPDATE per batch, so
+    concurrent writers touching overlapping pairs queue up instead of
+    deadlocking.
+    """
+    deltas = net_currency_debts(debts)
+
+    if not deltas:
+        return
+
+    keys = sorted(deltas, key=_sort_key)
+    amount_field = DecimalField(max_digits=10, decimal_places=2)
+
+    with transaction.atomic(savepoint=False):
+        for start in range(0, len(keys), LOCK_BATCH_SIZE):
+            batch = keys[start:start + LOCK_BATCH_SIZE]
+            condition = _key_filter(batch)
+
+            Balance.objects.bulk_create(
+                [Balance(from_user_id=a, to_user_id=b, currency_id=c, amount=Decimal('0.00')) for a, b, c in batch],
+                ignore_conflicts=True
+            )
+
+            list(
+                Balance.objects.select_for_update()
+                .filter(condition)
+                .order_by('from_user_id', 'to_user_id', 'currency_id')
+                .values_list('id', flat=True)
+            )
+
+            Balance.objects.filter(condition).update(
+                amount=F('amount') + Case(
+                    *[
+                        When(
+                            Q(from_user_id=a, to_user_id=b, currency_id=c),
+                            then=Value(deltas[(a, b, c)], output_field=amount_field)
+                        )
+                        for a, b, c in batch
+                    ],
+                    default=Value(Decimal('0.00'), output_field=amount_field),
+                    output_field=amount_field
+                )
+            )
+
+
+def expected_ledger():
+    debts = (
+        ExpenseSplit.objects
+        .exclude(user_id=F('expense__paid_by_id'))
+        .values_list('user_id', 'expense__paid_by_id', 'expense__currency_id')
+        .annotate(total=Sum('amount'))
+        .order_by()
+    )
+    return net_currency_debts(debts)
+
+
+def ledger_drift():
+    expected = expected_ledger()
+    actual = {
+        (from_user_id, to_user_id, currency_id): amount
+        for from_user_id, to_user_id, currency_id, amount in Balance.objects.values_list(
+            'from_user_id', 'to_user_id', 'currency_id', 'amount'
+        )
+        if amount
+    }
+
+    return {
+        key: (actual.get(key, Decimal('0.00')), expected.get(key, Decimal('0.00')))
+        for key in expected.keys() | actual.keys()
+        if actual.get(key) != expected.get(key)
+    }
+
+
+def rebuild_ledger():
+    expected = expected_ledger()
+
+    with transaction.atomic():
+        list(
+            Balance.objects.select_for_update()
+            .order_by('from_user_id', 'to_user_id', 'currency_id')
+            .values_list('id', flat=True)
+        )
+        Balance.objects.all().delete()
+        Balance.objects.bulk_create(
+            [
+                Balance(from_user_id=a, to_user_id=b, currency_id=c, amount=expected[(a, b, c)])
+                for a, b, c in sorted(expected, key=_sort_key)
+            ],
+            batch_size=LOCK_BATCH_SIZE
+        )
+
+    return len(expected)
@@ -0,0 +1,133 @@
+import random
+import time
+from collections import defaultdict
+from decimal import Decimal
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory, force_authenticate
+from ...views import GroupBalanceView
+from ....expenses.models import Expense, ExpenseSplit
+from ....groups.models import Group, GroupMember
+from ....users.models import User
+
+BATCH_SIZE = 5000
+
+
+class Rollback(Exception):
+    pass
+
+
+def naive_balances(group_id):
+    """The per-member Python loop GroupBalanceView replaces, kept as the baseline."""
+    expenses = list(Expense.objects.filter(group_id=group_id).prefetch_related('splits'))
+    member_ids = GroupMember.objects.filter(group_id=group_id).values_list('user_id', flat=True)
+    nets = {}
+    pairs = defaultdict(Decimal)
+
+    for member_id in member_ids:
+        paid = sum((expense.amount for expense in expenses if expense.paid_by_id == member_id), Decimal(0))
+        owed = Decimal(0)
+
+        for expense in expenses:
+            for split in expense.splits.all():
+                if split.user_id == member_id:
+                    owed += split.amount
+                    if expense.paid_by_id != member_id:
+                        pairs[(member_id, expense.paid_by_id)] += split.amount
+
+        nets[member_id] = paid - owed
+
+    return nets, pairs
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark GET /groups/<id>/balances/ against a per-member Python loop for groups '
+        'with growing expense counts. All data is rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 50000])
+        parser.add_argument('--members', type=int, default=20)
+        parser.add_argument('--repeat', type=int, default=3)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.stdout.write(
+            f'{"expenses":>9} {"view ms":>10} {"queries":>8} {"naive ms":>10} {"queries":>8} {"speedup":>8}'
+        )
+
+        for size in options['sizes']:
+            try:
+                with transaction.atomic():
+                    view, naive = self._run(size, options['members'], options['repeat'])
+                    raise Rollback
+            except Rollback:
+                pass
+
+            self.stdout.write(
+                f'{size:>9} {view[0] * 1000:>10.1f} {view[1]:>8} '
+                f'{naive[0] * 1000:>10.1f} {naive[1]:>8} {naive[0] / view[0]:>7.1f}x'
+            )
+
+    def _seed(self, size, members):
+        users = User.objects.bulk_create([
+            User(email=f'bench-balances-{size}-{index}@example.com') for index in range(members)
+        ])
+        group = Group.objects.create(name='bench', group_type=Group.TYPE_TRIP, created_by=users[0])
+        GroupMember.objects.bulk_create([GroupMember(group=group, user=user) for user in users])
+
+        for offset in range(0, size, BATCH_SIZE):
+            expenses = Expense.objects.bulk_create([
+                Expense(
+                    amount=Decimal(self.rng.randint(100, 50000)).scaleb(-2),
+                    description='Benchmark expense',
+                    split_type=Expense.SPLIT_EQUAL,
+                    paid_by=self.rng.choice(users),
+                    group=group
+                )
+                for _ in range(min(BATCH_SIZE, size - offset))
+            ])
+            splits = []
+
+            for expense in expenses:
+                participants = self.rng.sample(users, self.rng.randint(2, min(5, members)))
+                share = (expense.amount / len(participants)).quantize(Decimal('0.01'))
+                # The first participant takes the rounding remainder, as compute_splits does.
+                remainder = expense.amount - share * len(participants)
+                splits.extend(
+                    ExpenseSplit(expense=expense, user=user, amount=share + (remainder if index == 0 else 0))
+                    for index, user in enumerate(participants)
+                )
+
+            ExpenseSplit.objects.bulk_create(splits, batch_size=BATCH_SIZE)
+
+        return group, users[0]
+
+    def _time(self, call, repeat):
+        best = None
+
+        for _ in range(repeat):
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                call()
+                elapsed = time.perf_counter() - started
+
+            best = elapsed if best is None else min(best, elapsed)
+
+        return best, len(captured.captured_queries)
+
+    def _run(self, size, members, repeat):
+        group, user = self._seed(size, members)
+        view = GroupBalanceView.as_view()
+        factory = APIRequestFactory()
+
+        def call_view():
+            request = factory.get(f'/groups/{group.id}/balances/')
+            force_authenticate(request, user=user)
+            response = view(request, group_id=group.id)
+            assert response.status_code == 200, response.data
+
+        return self._time(call_view, repeat), self._time(lambda: naive_balances(group.id), repeat)
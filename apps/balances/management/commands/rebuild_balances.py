@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand, CommandError
+from ....users.currencies import currencies
+from ...ledger import ledger_drift, rebuild_ledger
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the pairwise Balance ledger from ExpenseSplit rows.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Only report drift between the ledger and the recorded splits.'
+        )
+
+    def handle(self, *args, **options):
+        drift = ledger_drift()
+
+        for (from_user_id, to_user_id, currency_id), (actual, expected) in sorted(
+            drift.items(), key=lambda item: (item[0][0], item[0][1], item[0][2] or 0)
+        ):
+            currency = currencies.get(currency_id) if currency_id else None
+            self.stdout.write(
+                f'{from_user_id} -> {to_user_id} ({currency.code if currency else "no currency"}): '
+                f'ledger {actual}, expected {expected}'
+            )
+
+        if options['check']:
+            if drift:
+                raise CommandError(f'{len(drift)} balance(s) drifted from the recorded splits.')
+            self.stdout.write(self.style.SUCCESS('Ledger matches the recorded splits.'))
+            return
+
+        count = rebuild_ledger()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {count} balance(s), {len(drift)} had drifted.'))
@@ -0,0 +1,52 @@
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from ...events import SNAPSHOT_LAG, backfill_events, take_snapshot
+from ...models import BalanceSnapshot, ExpenseEvent
+
+
+class Command(BaseCommand):
+    help = (
+        'Fold recent expense events into per-group balance snapshots. Meant to run '
+        'periodically; groups with fewer than --min-events new events are skipped.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--group', type=int, action='append', dest='group_ids', help='Snapshot only these groups.')
+        parser.add_argument('--min-events', type=int, default=100)
+        parser.add_argument(
+            '--backfill',
+            action='store_true',
+            help='First record created events for expenses that predate the event log.'
+        )
+
+    def handle(self, *args, **options):
+        if options['backfill']:
+            self.stdout.write(f'Backfilled {backfill_events()} expense event(s).')
+
+        group_ids = options['group_ids'] or self._due_groups(options['min_events'])
+        taken = sum(1 for group_id in group_ids if take_snapshot(group_id))
+
+        self.stdout.write(self.style.SUCCESS(f'Took {taken} snapshot(s).'))
+
+    def _due_groups(self, min_events):
+        cutoff = timezone.now() - timedelta(seconds=SNAPSHOT_LAG)
+        last_snapshot = (
+            BalanceSnapshot.objects.filter(group_id=OuterRef('group_id'))
+            .order_by('-last_event_id')
+            .values('last_event_id')[:1]
+        )
+
+        return list(
+            ExpenseEvent.objects
+            .filter(group__isnull=False, created_at__lt=cutoff)
+            .annotate(snapshot_event_id=Coalesce(Subquery(last_snapshot), Value(0)))
+            .filter(id__gt=F('snapshot_event_id'))
+            .values('group_id')
+            .annotate(tail=Count('id'))
+            .filter(tail__gte=min_events)
+            .order_by('group_id')
+            .values_list('group_id', flat=True)
+        )
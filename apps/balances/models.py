@@ -1,10 +1,75 @@
 from django.db import models
-from ..users.models import User
+from django.db.models import Q
+from ..users.models import Currency, User
+from ..groups.models import Group
 
 class Balance(models.Model):
     from_user = models.ForeignKey(User, related_name='balances_owed', on_delete=models.CASCADE)
     to_user = models.ForeignKey(User, related_name='balances_due', on_delete=models.CASCADE)
+    # Debts in different currencies are never netted against each other.
+    currency = models.ForeignKey(Currency, related_name='+', on_delete=models.PROTECT, null=True, blank=True)
     amount = models.DecimalField(max_digits=10, decimal_places=2)
 
     class Meta:
-        unique_together = ('from_user', 'to_user')
\ No newline at end of file
+        # As in the analytics rollups: two partial constraints so expenses
+        # without a currency still share one row per pair.
+        constraints = [
+            models.UniqueConstraint(
+                fields=['from_user', 'to_user', 'currency'], condition=Q(currency__isnull=False),
+                name='balance_pair_currency_unique'
+            ),
+            models.UniqueConstraint(
+                fields=['from_user', 'to_user'], condition=Q(currency__isnull=True), name='balance_pair_no_currency_unique'
+            ),
+        ]
+
+class ExpenseEvent(models.Model):
+    KIND_CREATED = 'created'
+    KIND_UPDATED = 'updated'
+    KIND_DELETED = 'deleted'
+
+    KIND_CHOICES = [
+        (KIND_CREATED, 'Created'),
+        (KIND_UPDATED, 'Updated'),
+        (KIND_DELETED, 'Deleted'),
+    ]
+
+    # Append-only: rows are never updated or deleted, so the expense, group and
+    # actor are referenced without constraints. Deleting a group or user appends
+    # a deleted event for each of its expenses, which must neither block nor be
+    # cascaded, and keeps the ids of whoever acted.
+    expense_id = models.IntegerField()
+    group = models.ForeignKey(
+        Group, related_name='expense_events', on_delete=models.DO_NOTHING, db_constraint=False, null=True, blank=True
+    )
+    currency = models.ForeignKey(Currency, related_name='+', on_delete=models.PROTECT, null=True, blank=True)
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    actor = models.ForeignKey(
+        User, related_name='+', on_delete=models.DO_NOTHING, db_constraint=False, null=True, blank=True
+    )
+    # [[from_user_id, to_user_id, cents], ...] with from_user_id < to_user_id;
+    # positive cents mean from_user owes to_user more, as in Balance.
+    deltas = models.JSONField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['group', 'id'], name='expenseevent_group_idx'),
+            models.Index(fields=['expense_id', 'id'], name='expenseevent_expense_idx'),
+        ]
+
+
+class BalanceSnapshot(models.Model):
+    group = models.ForeignKey(Group, related_name='balance_snapshots', on_delete=models.CASCADE)
+    # Folds every event of the group up to and including this id.
+    last_event_id = models.BigIntegerField()
+    # created_at of that event: the point in time the snapshot describes.
+    as_of = models.DateTimeField()
+    # [[from_user_id, to_user_id, currency_id, cents], ...], non-zero only.
+    balances = models.JSONField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['group', 'last_event_id'], name='balancesnapshot_group_idx'),
+        ]
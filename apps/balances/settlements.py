@@ -0,0 +1,211 @@
+import heapq
+from collections import defaultdict
+from decimal import Decimal
+from django.core.cache import cache
+from django.db.models import F, Sum
+from django.db.models.functions import TruncDate
+from ..expenses.models import ExpenseSplit
+from ..groups.cache import agroup_version, group_version
+from ..users.currencies import currencies
+from ..users.fx import afx_version, fx_rates, fx_version
+from .ledger import net_debts
+
+PLAN_KEY = 'balances:settlement:{group_id}:{currency_id}:{version}:{fx_version}'
+PLAN_TIMEOUT = 60 * 60 * 24
+
+
+def group_debts(group_id):
+    """Debts per (debtor, creditor, currency, day), so they can be converted at that day's rate."""
+    return (
+        ExpenseSplit.objects
+        .filter(expense__group_id=group_id)
+        .exclude(user_id=F('expense__paid_by_id'))
+        .values_list('user_id', 'expense__paid_by_id', 'expense__currency_id', TruncDate('expense__created_at'))
+        .annotate(total=Sum('amount'))
+        .order_by()
+    )
+
+
+def group_pair_totals(group_id):
+    """
+    Debts per (debtor, creditor, currency) in a single aggregation over the
+    group's splits. A payer's own split is excluded, so a member's net comes
+    out as paid minus owed without summing Expense.amount separately.
+    """
+    return (
+        ExpenseSplit.objects
+        .filter(expense__group_id=group_id)
+        .exclude(user_id=F('expense__paid_by_id'))
+        .values_list('user_id', 'expense__paid_by_id', 'expense__currency_id')
+        .annotate(total=Sum('amount'))
+        .order_by()
+    )
+
+
+def _amount(cents):
+    return str(Decimal(cents).scaleb(-2))
+
+
+def build_balances(member_ids, totals):
+    """
+    Per currency, every member's net position (positive is owed money) and
+    the netted debt between each pair, from group_pair_totals() rows.
+    """
+    by_currency = defaultdict(list)
+
+    for debtor_id, creditor_id, currency_id, total in totals:
+        by_currency[currency_id].append((debtor_id, creditor_id, total))
+
+    balances = []
+
+    for currency_id, debts in sorted(by_currency.items(), key=lambda item: item[0] or 0):
+        currency = currencies.get(currency_id) if currency_id else None
+        positions = net_positions(debts)
+        pairs = []
+
+        for (low_id, high_id), amount in sorted(net_debts(debts).items()):
+            cents = int(amount * 100)
+            if cents:
+                debtor_id, creditor_id = (low_id, high_id) if cents > 0 else (high_id, low_id)
+                pairs.append({'from_user_id': debtor_id, 'to_user_id': creditor_id, 'amount': _amount(abs(cents))})
+
+        # Former members keep their debts and are listed after current ones.
+        user_ids = list(member_ids) + sorted(set(positions) - set(member_ids))
+
+        balances.append({
+            'currency': currency.code if currency else None,
+            'members': [{'user_id': user_id, 'net': _amount(positions.get(user_id, 0))} for user_id in user_ids],
+            'pairs': pairs,
+        })
+
+    return balances
+
+
+def fx_pairs(debts, currency_id):
+    return {
+        (from_currency_id, currency_id)
+        for _, _, from_currency_id, _, _ in debts
+        if from_currency_id and currency_id
+    }
+
+
+def normalize_debts(debts, currency_id):
+    """
+    (debtor, creditor, amount) in currency_id. Expenses without a currency
+    are taken to be in it already. Rates must be preloaded for fx_pairs().
+    """
+    for debtor_id, creditor_id, from_currency_id, day, amount in debts:
+        if from_currency_id and currency_id:
+            amount = fx_rates.convert(amount, from_currency_id, currency_id, day)
+
+        yield debtor_id, creditor_id, amount
+
+
+def debts_by_currency(debts, currency_id):
+    """
+    {currency_id: (debtor, creditor, amount)} to plan. Everything is converted
+    into currency_id when there is one; without it nothing can be converted,
+    so each currency is planned on its own, as build_balances() reports them.
+    """
+    if currency_id:
+        return {currency_id: list(normalize_debts(debts, currency_id))}
+
+    by_currency = defaultdict(list)
+
+    for debtor_id, creditor_id, from_currency_id, _, amount in debts:
+        by_currency[from_currency_id].append((debtor_id, creditor_id, amount))
+
+    return by_currency
+
+
+def net_positions(debts):
+    """Net position per user in cents: positive is owed money, negative owes."""
+    positions = defaultdict(int)
+
+    for debtor_id, creditor_id, amount in debts:
+        cents = int(amount * 100)
+        positions[debtor_id] -= cents
+        positions[creditor_id] += cents
+
+    return {user_id: cents for user_id, cents in positions.items() if cents}
+
+
+def simplify_debts(positions):
+    """
+    Greedy min-cash-flow: repeatedly settle the largest debtor against the
+    largest creditor. Every transfer zeroes at least one side, so n members
+    never need more than n - 1 transfers.
+    """
+    creditors = [(-cents, user_id) for user_id, cents in positions.items() if cents > 0]
+    debtors = [(cents, user_id) for user_id, cents in positions.items() if cents < 0]
+    heapq.heapify(creditors)
+    heapq.heapify(debtors)
+
+    transfers = []
+
+    while creditors and debtors:
+        credit, creditor_id = heapq.heappop(creditors)
+        debit, debtor_id = heapq.heappop(debtors)
+        cents = min(-credit, -debit)
+
+        transfers.append((debtor_id, creditor_id, cents))
+
+        if credit + cents:
+            heapq.heappush(creditors, (credit + cents, creditor_id))
+        if debit + cents:
+            heapq.heappush(debtors, (debit + cents, debtor_id))
+
+    return transfers
+
+
+def build_plan(version, currency_id, debts):
+    currency = currencies.get(currency_id) if currency_id else None
+    transfers = []
+
+    for transfer_currency_id, currency_debts in sorted(debts_by_currency(debts, currency_id).items(), key=lambda item: item[0] or 0):
+        transfer_currency = currencies.get(transfer_currency_id) if transfer_currency_id else None
+
+        transfers.extend(
+            {
+                'from_user_id': debtor_id,
+                'to_user_id': creditor_id,
+                'amount': _amount(cents),
+                'currency': transfer_currency.code if transfer_currency else None
+            }
+            for debtor_id, creditor_id, cents in simplify_debts(net_positions(currency_debts))
+        )
+
+    return {
+        'version': version,
+        'currency': currency.code if currency else None,
+        'transfers': transfers
+    }
+
+
+def settlement_plan(group_id, currency_id):
+    """Settlement plan in currency_id. Raises FxRateMissing when a conversion has no rate."""
+    version = group_version(group_id)
+    key = PLAN_KEY.format(group_id=group_id, currency_id=currency_id, version=version, fx_version=fx_version())
+    plan = cache.get(key)
+
+    if plan is None:
+        debts = list(group_debts(group_id))
+        fx_rates.preload(fx_pairs(debts, currency_id))
+        plan = build_plan(version, currency_id, debts)
+        cache.set(key, plan, PLAN_TIMEOUT)
+
+    return plan
+
+
+async def asettlement_plan(group_id, currency_id):
+    version = await agroup_version(group_id)
+    key = PLAN_KEY.format(group_id=group_id, currency_id=currency_id, version=version, fx_version=await afx_version())
+    plan = await cache.aget(key)
+
+    if plan is None:
+        debts = [debt async for debt in group_debts(group_id)]
+        await fx_rates.apreload(fx_pairs(debts, currency_id))
+        plan = build_plan(version, currency_id, debts)
+        await cache.aset(key, plan, PLAN_TIMEOUT)
+
+    return plan
@@ -0,0 +1,22 @@
+from django.db import transaction
+from django.db.models.signals import pre_delete
+from django.dispatch import receiver
+from ..expenses.deletion import CascadeBatches
+from ..expenses.models import Expense
+from ..groups.cache import bump_group_version
+from .events import expenses_deleted
+
+deletions = CascadeBatches()
+
+
+@receiver(pre_delete, sender=Expense)
+def record_expense_deletion(sender, instance, origin=None, **kwargs):
+    # pre_delete runs before the cascade removes the splits being reversed.
+    expenses = deletions.pending(instance, origin)
+
+    if expenses:
+        expenses_deleted(expenses)
+
+        # Cached settlement plans still include the deleted debts.
+        group_ids = {expense.group_id for expense in expenses if expense.group_id}
+        transaction.on_commit(lambda: [bump_group_version(group_id) for group_id in group_ids])
@@ -0,0 +1,28 @@
+from ..groups.models import Group, GroupMember
+from ..tasks.queue import task
+from ..users.fx import FxRateMissing
+from .settlements import settlement_plan
+
+
+@task('balances.refresh_settlement_plan')
+def refresh_settlement_plan(group_id):
+    """Recompute and cache a group's settlement plan in every currency its members read it in."""
+    group = Group.objects.filter(id=group_id).values('currency_id').first()
+
+    if not group:
+        return
+
+    if group['currency_id']:
+        currency_ids = [group['currency_id']]
+    else:
+        # Without a group currency each member sees the plan in their own.
+        currency_ids = set(
+            GroupMember.objects.filter(group_id=group_id).values_list('user__default_currency_id', flat=True)
+        )
+
+    for currency_id in currency_ids:
+        try:
+            settlement_plan(group_id, currency_id)
+        except FxRateMissing:
+            # Nothing to cache until the rate is loaded; the view reports it.
+            continue
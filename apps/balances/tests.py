@@ -1,3 +1,198 @@
-from django.test import TestCase
+from decimal import Decimal
+from unittest import mock
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from fittus.testing import AsyncParityMixin
+from ..users.models import Currency, User
+from ..groups.cache import group_version
+from ..groups.models import Group, GroupMember
+from ..expenses.models import Expense
+from . import events
+from .events import take_snapshot
+from .ledger import ledger_drift, rebuild_ledger
+from .models import Balance, ExpenseEvent
 
-# Create your tests here.
+
+class LedgerMixin:
+    def setUp(self):
+        self.users = [User.objects.create(email=f'user{i}@example.com') for i in range(2)]
+        self.group = Group.objects.create(name='Trip', group_type=Group.TYPE_TRIP, created_by=self.users[0])
+        GroupMember.objects.bulk_create([GroupMember(group=self.group, user=user) for user in self.users])
+        self.inr = Currency.objects.create(code='INR', name='Indian Rupee', symbol='R')
+        self.usd = Currency.objects.create(code='USD', name='US Dollar', symbol='$')
+
+    def _expense(self, payer, amount, currency=None):
+        self.client.force_authenticate(payer)
+        data = {
+            'amount': amount,
+            'description': 'Dinner',
+            'group_id': self.group.id,
+            'split_type': Expense.SPLIT_EQUAL,
+            'splits': [{'user_id': user.id} for user in self.users],
+        }
+        if currency:
+            data['currency'] = currency.code
+
+        response = self.client.post(reverse('create-expense'), data, format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+
+    def _ledger(self):
+        return set(Balance.objects.exclude(amount=0).values_list('from_user_id', 'to_user_id', 'currency_id', 'amount'))
+
+
+class LedgerCurrencyTests(LedgerMixin, APITestCase):
+    def test_currencies_are_kept_apart(self):
+        low, high = self.users
+        self._expense(low, '100.00', self.inr)
+        self._expense(high, '10.00', self.usd)
+        self._expense(high, '20.00')
+
+        self.assertEqual(self._ledger(), {
+            (low.id, high.id, self.inr.id, Decimal('-50.00')),
+            (low.id, high.id, self.usd.id, Decimal('5.00')),
+            (low.id, high.id, None, Decimal('10.00')),
+        })
+        self.assertEqual(ledger_drift(), {})
+
+    def test_rebuild_matches_the_incremental_ledger(self):
+        self._expense(self.users[0], '100.00', self.inr)
+        self._expense(self.users[1], '30.00', self.inr)
+        self._expense(self.users[1], '10.00', self.usd)
+        self._expense(self.users[0], '20.00')
+        incremental = self._ledger()
+
+        rebuild_ledger()
+
+        self.assertEqual(self._ledger(), incremental)
+
+
+class ExpenseDeletionTests(LedgerMixin, APITestCase):
+    def test_deleting_a_group_reverses_every_expense(self):
+        self._expense(self.users[0], '100.00', self.inr)
+        self._expense(self.users[1], '30.00', self.usd)
+        self._expense(self.users[1], '10.00')
+
+        self.group.delete()
+
+        self.assertEqual(self._ledger(), set())
+        self.assertEqual(ExpenseEvent.objects.filter(kind=ExpenseEvent.KIND_DELETED).count(), 3)
+        self.assertEqual(ledger_drift(), {})
+
+    def test_single_delete_is_reversed(self):
+        self._expense(self.users[0], '100.00', self.inr)
+        self._expense(self.users[1], '30.00', self.inr)
+
+        Expense.objects.filter(paid_by=self.users[1]).get().delete()
+
+        self.assertEqual(self._ledger(), {(self.users[0].id, self.users[1].id, self.inr.id, Decimal('-50.00'))})
+
+    def test_deletes_invalidate_cached_settlement_plans(self):
+        self._expense(self.users[0], '100.00', self.inr)
+        self._expense(self.users[1], '30.00', self.inr)
+
+        for delete in (Expense.objects.filter(paid_by=self.users[1]).get().delete, self.group.delete):
+            version = group_version(self.group.id)
+
+            with self.captureOnCommitCallbacks(execute=True):
+                delete()
+
+            self.assertNotEqual(group_version(self.group.id), version)
+
+    def test_events_keep_the_actor_of_a_deleted_user(self):
+        self._expense(self.users[1], '30.00', self.inr)
+        actor_id = self.users[1].id
+        self.users[1].delete()
+
+        self.assertEqual(set(ExpenseEvent.objects.values_list('kind', 'actor_id')), {
+            (ExpenseEvent.KIND_CREATED, actor_id),
+            (ExpenseEvent.KIND_DELETED, None),
+        })
+
+
+class BalanceHistoryTests(LedgerMixin, APITestCase):
+    def _balances(self, as_of):
+        self.client.force_authenticate(self.users[0])
+        response = self.client.get(reverse('group-balances', args=[self.group.id]), {'as_of': as_of})
+        self.assertEqual(response.status_code, 200, response.data)
+
+        return response.data['balances']
+
+    def test_balances_as_of_a_past_point(self):
+        self._expense(self.users[0], '100.00', self.inr)
+        before_delete = timezone.now().isoformat()
+        Expense.objects.get().delete()
+
+        with mock.patch.object(events, 'SNAPSHOT_LAG', -60):
+            self.assertIsNotNone(take_snapshot(self.group.id))
+
+        self.assertEqual(self._balances(before_delete), [{
+            'currency': 'INR',
+            'members': [{'user_id': self.users[0].id, 'net': '50.00'}, {'user_id': self.users[1].id, 'net': '-50.00'}],
+            'pairs': [{'from_user_id': self.users[1].id, 'to_user_id': self.users[0].id, 'amount': '50.00'}],
+        }])
+        self.assertEqual(self._balances(timezone.now().isoformat()), [])
+        self.assertEqual(self._balances('2000-01-01'), [])
+
+    def test_invalid_as_of_is_rejected(self):
+        self.client.force_authenticate(self.users[0])
+
+        for as_of in ('yesterday', '2026-13-01'):
+            response = self.client.get(reverse('group-balances', args=[self.group.id]), {'as_of': as_of})
+            self.assertEqual(response.status_code, 400)
+
+
+class SettlementPlanTests(LedgerMixin, APITestCase):
+    def test_currencies_are_planned_apart_without_a_target(self):
+        self._expense(self.users[0], '100.00', self.inr)
+        self._expense(self.users[1], '30.00', self.usd)
+
+        self.client.force_authenticate(self.users[0])
+        response = self.client.get(reverse('group-settlements', args=[self.group.id]))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(response.data['currency'])
+        self.assertEqual(response.data['transfers'], [
+            {'from_user_id': self.users[1].id, 'to_user_id': self.users[0].id, 'amount': '50.00', 'currency': 'INR'},
+            {'from_user_id': self.users[0].id, 'to_user_id': self.users[1].id, 'amount': '15.00', 'currency': 'USD'},
+        ])
+
+
+class AsyncBalanceViewParityTests(AsyncParityMixin, APITestCase):
+    def setUp(self):
+        self.users = [User.objects.create(email=f'user{i}@example.com') for i in range(3)]
+        self.outsider = User.objects.create(email='outsider@example.com')
+        self.group = Group.objects.create(name='Trip', group_type=Group.TYPE_TRIP, created_by=self.users[0])
+        GroupMember.objects.bulk_create([GroupMember(group=self.group, user=user) for user in self.users])
+
+        for payer, amount in ((self.users[0], '90.00'), (self.users[1], '30.00')):
+            self.client.force_authenticate(payer)
+            response = self.client.post(reverse('create-expense'), {
+                'amount': amount,
+                'description': 'Dinner',
+                'group_id': self.group.id,
+                'split_type': Expense.SPLIT_EQUAL,
+                'splits': [{'user_id': user.id} for user in self.users],
+            }, format='json')
+            self.assertEqual(response.status_code, 201, response.data)
+
+        self.client.force_authenticate(None)
+
+    def test_group_settlements(self):
+        path = reverse('group-settlements', args=[self.group.id])
+
+        self.assertSameResponse(self.users[0], 'get', path)
+        self.assertSameResponse(self.users[0], 'get', path, {'currency': 'XXX'})
+        self.assertSameResponse(self.outsider, 'get', path)
+
+    def test_group_balances(self):
+        path = reverse('group-balances', args=[self.group.id])
+
+        response = self.assertSameResponse(self.users[2], 'get', path)
+        self.assertTrue(response.json()['balances'])
+        self.assertSameResponse(self.outsider, 'get', path)
+
+        response = self.assertSameResponse(self.users[2], 'get', path, {'as_of': timezone.now().isoformat()})
+        self.assertTrue(response.json()['balances'])
+        self.assertSameResponse(self.users[2], 'get', path, {'as_of': '2000-01-01'})
+        self.assertSameResponse(self.users[2], 'get', path, {'as_of': 'yesterday'})
@@ -1,3 +1,75 @@
-from django.shortcuts import render
+from rest_framework import permissions, status
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from ..groups.models import Group, GroupMember
+from ..users.currencies import currencies
+from ..users.fx import FxRateMissing
+from .events import balance_totals, group_balances, parse_as_of
+from .settlements import build_balances, group_pair_totals, settlement_plan
 
-# Create your views here.
+
+class GroupSettlementView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, group_id):
+        group = Group.objects.filter(id=group_id, members__user=request.user).values('currency_id').first()
+
+        if not group:
+            return Response(
+                {"error": "Group not found"},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        # ?currency=EUR, else the group's currency, else the caller's.
+        currency_id = group['currency_id'] or request.user.default_currency_id
+        code = request.query_params.get('currency')
+
+        if code:
+            currency = currencies.from_code(code)
+
+            if not currency:
+                return Response({"error": "Unknown currency"}, status=status.HTTP_400_BAD_REQUEST)
+
+            currency_id = currency.id
+
+        try:
+            plan = settlement_plan(group_id, currency_id)
+        except FxRateMissing as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(plan, status=status.HTTP_200_OK)
+
+class GroupBalanceView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, group_id):
+        member_ids = list(
+            GroupMember.objects.filter(group_id=group_id).order_by('user_id').values_list('user_id', flat=True)
+        )
+
+        if request.user.id not in member_ids:
+            return Response(
+                {"error": "Group not found"},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        # ?as_of= replays the event log up to that point instead.
+        as_of = request.query_params.get('as_of')
+
+        if not as_of:
+            return Response(
+                {"group_id": group_id, "balances": build_balances(member_ids, group_pair_totals(group_id))},
+                status=status.HTTP_200_OK
+            )
+
+        try:
+            as_of = parse_as_of(as_of)
+        except ValueError:
+            return Response({"error": "as_of must be an ISO 8601 date or datetime"}, status=status.HTTP_400_BAD_REQUEST)
+
+        totals = balance_totals(group_balances(group_id, as_of))
+
+        return Response(
+            {"group_id": group_id, "as_of": as_of, "balances": build_balances(member_ids, totals)},
+            status=status.HTTP_200_OK
+        )
@@ -0,0 +1,82 @@
+import threading
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.core.signals import request_finished, request_started
+from django.db import connections
+from ....users.models import User
+from .run_benchmarks import percentile
+
+
+class Command(BaseCommand):
+    help = (
+        'Replay the request lifecycle (request_started, one primary-key query, request_finished) '
+        'from concurrent worker threads, so the cost of opening a database connection per request '
+        'can be compared with persistent connections (DB_CONN_MAX_AGE) and the pool (DB_POOL).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--requests', type=int, default=500, help='Requests per thread.')
+        parser.add_argument('--database', default='default')
+        parser.add_argument(
+            '--conn-max-age', type=int,
+            help='Override CONN_MAX_AGE for this run, e.g. 0 to reconnect on every request.'
+        )
+
+    def handle(self, *args, **options):
+        alias = options['database']
+        settings_dict = connections.settings[alias]
+
+        if options['conn_max_age'] is not None:
+            if settings_dict.get('OPTIONS', {}).get('pool'):
+                raise CommandError('--conn-max-age cannot be combined with DB_POOL.')
+            # Worker threads build their connections from this dict.
+            settings_dict['CONN_MAX_AGE'] = options['conn_max_age']
+
+        user_id = User.objects.using(alias).values_list('id', flat=True).first()
+        if user_id is None:
+            raise CommandError('No users found, run seed_data first.')
+
+        latencies = []
+        errors = []
+        lock = threading.Lock()
+
+        def worker():
+            local = []
+            try:
+                for _ in range(options['requests']):
+                    started = time.perf_counter()
+                    request_started.send(sender=self.__class__)
+                    try:
+                        User.objects.using(alias).only('id').get(id=user_id)
+                    finally:
+                        request_finished.send(sender=self.__class__)
+                    local.append((time.perf_counter() - started) * 1000)
+            except Exception as exc:
+                errors.append(exc)
+            finally:
+                connections.close_all()
+                with lock:
+                    latencies.extend(local)
+
+        threads = [threading.Thread(target=worker) for _ in range(options['threads'])]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        if errors:
+            raise CommandError(f'{len(errors)} worker(s) failed: {errors[0]}')
+
+        pool = settings_dict.get('OPTIONS', {}).get('pool')
+        mode = f'pool {pool}' if pool else f'CONN_MAX_AGE={settings_dict.get("CONN_MAX_AGE", 0)}'
+
+        self.stdout.write(f'{connections[alias].vendor} {mode}, {options["threads"]} threads')
+        self.stdout.write(f'{"requests":>10}{"req/s":>10}{"p50 ms":>10}{"p95 ms":>10}{"p99 ms":>10}{"max ms":>10}')
+        self.stdout.write(
+            f'{len(latencies):>10}{len(latencies) / elapsed:>10.1f}'
+            f'{percentile(latencies, 50):>10.3f}{percentile(latencies, 95):>10.3f}'
+            f'{percentile(latencies, 99):>10.3f}{max(latencies):>10.3f}'
+        )
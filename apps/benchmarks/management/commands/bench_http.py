@@ -0,0 +1,166 @@
+import asyncio
+import time
+from urllib.parse import urlsplit
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework_simplejwt.tokens import RefreshToken
+from ....users.models import User
+from .run_benchmarks import percentile
+
+
+class HTTPConnection:
+    """Minimal keep-alive HTTP/1.1 client, so the load generator itself stays cheap."""
+
+    def __init__(self, host, port, headers):
+        self.host = host
+        self.port = port
+        self.headers = headers
+        self.reader = None
+        self.writer = None
+
+    async def request(self, method, target):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+
+        lines = [f'{method} {target} HTTP/1.1', f'Host: {self.host}:{self.port}']
+        lines.extend(f'{name}: {value}' for name, value in self.headers.items())
+        self.writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1'))
+        await self.writer.drain()
+
+        status_line = await self.reader.readline()
+        if not status_line:
+            await self.close()
+            raise ConnectionError('Server closed the connection.')
+        status = int(status_line.split()[1])
+
+        length = None
+        chunked = False
+        keep_alive = True
+        while True:
+            line = await self.reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            name, value = name.strip().lower(), value.strip().lower()
+            if name == 'content-length':
+                length = int(value)
+            elif name == 'transfer-encoding' and 'chunked' in value:
+                chunked = True
+            elif name == 'connection' and value == 'close':
+                keep_alive = False
+
+        if chunked:
+            while True:
+                size = int((await self.reader.readline()).split(b';')[0], 16)
+                await self.reader.readexactly(size + 2)
+                if size == 0:
+                    break
+        elif length is not None:
+            await self.reader.readexactly(length)
+        else:
+            await self.reader.read()
+            keep_alive = False
+
+        if not keep_alive:
+            await self.close()
+
+        return status
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except ConnectionError:
+                pass
+        self.reader = self.writer = None
+
+
+class Command(BaseCommand):
+    help = (
+        'Load-test running servers over HTTP with concurrent keep-alive connections and '
+        'report throughput and latency percentiles, e.g. to compare a gunicorn (WSGI) and '
+        'a uvicorn (ASGI) deployment of the same endpoint.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--target', action='append', required=True, metavar='NAME=URL',
+            help='Endpoint to load, may be repeated: wsgi=http://127.0.0.1:8000/users/friend-requests/'
+        )
+        parser.add_argument('--concurrency', type=int, default=64)
+        parser.add_argument('--duration', type=float, default=10.0, help='Seconds to drive each target.')
+        parser.add_argument('--warmup', type=float, default=1.0)
+        parser.add_argument('--user-id', type=int, help='Send a bearer token minted for this user.')
+
+    def handle(self, *args, **options):
+        targets = []
+        for target in options['target']:
+            name, sep, url = target.partition('=')
+            parts = urlsplit(url)
+            if not sep or parts.scheme != 'http' or not parts.hostname:
+                raise CommandError(f'Invalid target "{target}", expected NAME=http://host:port/path.')
+            path = parts.path or '/'
+            if parts.query:
+                path = f'{path}?{parts.query}'
+            targets.append((name, parts.hostname, parts.port or 80, path))
+
+        headers = {'Accept': 'application/json'}
+        if options['user_id']:
+            user = User.objects.filter(id=options['user_id']).first()
+            if not user:
+                raise CommandError(f'User {options["user_id"]} does not exist.')
+            headers['Authorization'] = f'Bearer {RefreshToken.for_user(user).access_token}'
+
+        self.stdout.write(
+            f'{"target":<16}{"requests":>10}{"errors":>8}{"req/s":>10}'
+            f'{"p50 ms":>10}{"p95 ms":>10}{"p99 ms":>10}{"max ms":>10}'
+        )
+
+        for name, host, port, path in targets:
+            result = asyncio.run(self._load(host, port, path, headers, options))
+            latencies = result['latencies']
+            if not latencies:
+                raise CommandError(f'{name}: no successful requests ({result["errors"]} errors).')
+
+            self.stdout.write(
+                f'{name:<16}{len(latencies):>10}{result["errors"]:>8}'
+                f'{len(latencies) / result["elapsed"]:>10.1f}'
+                f'{percentile(latencies, 50):>10.2f}{percentile(latencies, 95):>10.2f}'
+                f'{percentile(latencies, 99):>10.2f}{max(latencies):>10.2f}'
+            )
+
+    async def _load(self, host, port, path, headers, options):
+        latencies = []
+        errors = 0
+        recording = False
+
+        async def worker(deadline):
+            nonlocal errors
+            connection = HTTPConnection(host, port, headers)
+            try:
+                while time.perf_counter() < deadline:
+                    start = time.perf_counter()
+                    try:
+                        status = await connection.request('GET', path)
+                    except (OSError, asyncio.IncompleteReadError, ValueError):
+                        await connection.close()
+                        status = None
+                    elapsed = (time.perf_counter() - start) * 1000
+
+                    if recording:
+                        if status is not None and status < 400:
+                            latencies.append(elapsed)
+                        else:
+                            errors += 1
+            finally:
+                await connection.close()
+
+        warmup_end = time.perf_counter() + options['warmup']
+        await asyncio.gather(*(worker(warmup_end) for _ in range(options['concurrency'])))
+
+        recording = True
+        start = time.perf_counter()
+        deadline = start + options['duration']
+        await asyncio.gather(*(worker(deadline) for _ in range(options['concurrency'])))
+
+        return {'latencies': latencies, 'errors': errors, 'elapsed': time.perf_counter() - start}
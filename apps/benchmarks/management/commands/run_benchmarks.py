@@ -0,0 +1,244 @@
+import json
+import math
+import random
+import subprocess
+import time
+from datetime import datetime, timezone
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext, setup_test_environment
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+from ....users.models import User, Friendship
+from ....users.cache import FRIENDS_KEY, get_friend_ids
+from ....users.friendships import between
+from ....groups.models import Group, GroupMember
+from ....expenses.models import Expense
+from ...seeding import SEED_EMAIL_DOMAIN, SEED_PASSWORD
+
+
+# Random pairs tried per friend_accept iteration before giving up on a dense seed.
+MAX_PAIR_ATTEMPTS = 100
+
+
+class Rollback(Exception):
+    pass
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = max(0, math.ceil(pct / 100 * len(ordered)) - 1)
+    return ordered[index]
+
+
+class Command(BaseCommand):
+    help = (
+        'Drive the hot API endpoints through the Django test client against seeded data, '
+        'recording latency percentiles and SQL query counts, on_commit callbacks included. '
+        'All writes are rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=200)
+        parser.add_argument('--login-iterations', type=int, default=20, help='Login hashes a password, so it gets fewer runs.')
+        parser.add_argument('--warmup', type=int, default=5)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--only', nargs='+', help='Run only these scenarios.')
+        parser.add_argument('--output', help='Write machine-readable results to this JSON file.')
+        parser.add_argument('--compare', help='Print the change against a previous --output file.')
+
+    def handle(self, *args, **options):
+        # Lets the test client's "testserver" host through ALLOWED_HOSTS.
+        setup_test_environment()
+
+        self.rng = random.Random(options['seed'])
+        self.touched_user_ids = set()
+        self.user_ids = list(
+            User.objects.filter(email__endswith=f'@{SEED_EMAIL_DOMAIN}').values_list('id', flat=True)
+        )
+
+        if len(self.user_ids) < 10:
+            raise CommandError('Not enough seeded users, run seed_data first.')
+
+        scenarios = {
+            'login': (self.login, options['login_iterations']),
+            'user_lookup': (self.user_lookup, options['iterations']),
+            'friend_request': (self.friend_request, options['iterations']),
+            'friend_accept': (self.friend_accept, options['iterations']),
+            'expense_create': (self.expense_create, options['iterations']),
+            'add_members': (self.add_members, options['iterations']),
+        }
+
+        if options['only']:
+            unknown = set(options['only']) - scenarios.keys()
+            if unknown:
+                raise CommandError(f'Unknown scenario(s): {", ".join(sorted(unknown))}')
+            scenarios = {name: scenarios[name] for name in options['only']}
+
+        results = {}
+
+        for name, (scenario, iterations) in scenarios.items():
+            try:
+                with transaction.atomic():
+                    results[name] = self._measure(scenario, iterations, options['warmup'])
+                    raise Rollback
+            except Rollback:
+                pass
+
+        # Friend sets cached while the rolled-back friendships existed.
+        cache.delete_many([FRIENDS_KEY.format(user_id=user_id) for user_id in self.touched_user_ids])
+
+        self._report(results)
+
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                json.dump(self._document(results), output, indent=2)
+
+        if options['compare']:
+            with open(options['compare']) as previous:
+                self._compare(json.load(previous)['results'], results)
+
+    def _measure(self, scenario, iterations, warmup):
+        latencies = []
+        queries = []
+        errors = 0
+
+        for iteration in range(warmup + iterations):
+            client, method, url, data = scenario()
+
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                # Scenarios run in a transaction that is rolled back, so nothing
+                # would ever commit: run the on_commit work (version bumps,
+                # task enqueues) as part of the request, as a real commit does.
+                with TestCase.captureOnCommitCallbacks(execute=True):
+                    response = getattr(client, method)(url, data, format='json')
+                elapsed = time.perf_counter() - started
+
+            if iteration < warmup:
+                continue
+
+            latencies.append(elapsed * 1000)
+            queries.append(len(captured.captured_queries))
+            errors += response.status_code >= 400
+
+        return {
+            'iterations': iterations,
+            'errors': errors,
+            'p50_ms': round(percentile(latencies, 50), 3),
+            'p95_ms': round(percentile(latencies, 95), 3),
+            'p99_ms': round(percentile(latencies, 99), 3),
+            'max_ms': round(max(latencies), 3),
+            'mean_ms': round(sum(latencies) / len(latencies), 3),
+            'queries_mean': round(sum(queries) / len(queries), 2),
+            'queries_max': max(queries),
+        }
+
+    def _document(self, results):
+        try:
+            commit = subprocess.run(
+                ['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            commit = None
+
+        return {
+            'commit': commit,
+            'created_at': datetime.now(timezone.utc).isoformat(),
+            'database': connection.vendor,
+            'seeded_users': len(self.user_ids),
+            'results': results,
+        }
+
+    def _report(self, results):
+        self.stdout.write(f'{"scenario":<16} {"p50":>9} {"p95":>9} {"p99":>9} {"queries":>8} {"errors":>7}')
+
+        for name, result in results.items():
+            self.stdout.write(
+                f'{name:<16} {result["p50_ms"]:>9.2f} {result["p95_ms"]:>9.2f} {result["p99_ms"]:>9.2f} '
+                f'{result["queries_mean"]:>8.1f} {result["errors"]:>7}'
+            )
+
+    def _compare(self, previous, results):
+        self.stdout.write(f'{"scenario":<16} {"p50 delta":>10} {"p99 delta":>10} {"queries delta":>14}')
+
+        for name, result in results.items():
+            if name not in previous:
+                continue
+
+            before = previous[name]
+            self.stdout.write(
+                f'{name:<16} {self._delta(before["p50_ms"], result["p50_ms"]):>10} '
+                f'{self._delta(before["p99_ms"], result["p99_ms"]):>10} '
+                f'{result["queries_mean"] - before["queries_mean"]:>+14.1f}'
+            )
+
+    def _delta(self, before, after):
+        if not before:
+            return 'n/a'
+        return f'{(after - before) / before * 100:+.1f}%'
+
+    def _client(self, user_id):
+        client = APIClient()
+        token = RefreshToken.for_user(User.objects.get(id=user_id))
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {token.access_token}')
+        return client
+
+    def _pick_users(self, count):
+        return self.rng.sample(self.user_ids, count)
+
+    def login(self):
+        user_id, = self._pick_users(1)
+        email = User.objects.values_list('email', flat=True).get(id=user_id)
+        return APIClient(), 'post', '/users/login/', {'email': email, 'password': SEED_PASSWORD}
+
+    def user_lookup(self):
+        user_id, other_id = self._pick_users(2)
+        email = User.objects.values_list('email', flat=True).get(id=other_id)
+        return self._client(user_id), 'post', '/users/lookup/', {'email': email}
+
+    def friend_request(self):
+        user_id, other_id = self._pick_users(2)
+        return self._client(user_id), 'post', f'/users/friend-request/{other_id}/', {}
+
+    def friend_accept(self):
+        # A pair holds one friendship at most, so look for one without any.
+        for _ in range(MAX_PAIR_ATTEMPTS):
+            user_id, other_id = self._pick_users(2)
+            if not between(user_id, other_id).exists():
+                break
+        else:
+            raise CommandError(
+                f'No pair of users without a friendship found in {MAX_PAIR_ATTEMPTS} tries; '
+                'seed more users or fewer friendships.'
+            )
+
+        friendship = Friendship.objects.create(from_user_id=other_id, to_user_id=user_id)
+        return self._client(user_id), 'post', f'/users/friend-request/accept/{friendship.id}/', {}
+
+    def expense_create(self):
+        payer_id, *others = self._pick_users(4)
+        payload = {
+            'amount': f'{self.rng.randint(100, 50000) / 100:.2f}',
+            'description': 'Benchmark expense',
+            'split_type': Expense.SPLIT_EQUAL,
+            'splits': [{'user_id': user_id} for user_id in [payer_id, *others]],
+        }
+        return self._client(payer_id), 'post', '/expenses/create/', payload
+
+    def add_members(self):
+        admin_id, *member_ids = self._pick_users(21)
+        group = Group.objects.create(name='Benchmark', group_type=Group.TYPE_OTHER, created_by_id=admin_id)
+        GroupMember.objects.create(group=group, user_id=admin_id, role=GroupMember.ROLE_ADMIN)
+        friend_ids = get_friend_ids(admin_id)
+        # Pairs with a pending request keep it and come back as not_friends.
+        Friendship.objects.bulk_create([
+            Friendship(from_user_id=admin_id, to_user_id=member_id, status=Friendship.STATUS_ACCEPTED)
+            for member_id in member_ids
+            if member_id not in friend_ids
+        ], ignore_conflicts=True)
+        cache.delete(FRIENDS_KEY.format(user_id=admin_id))
+        self.touched_user_ids.add(admin_id)
+        return self._client(admin_id), 'post', f'/groups/add-members/{group.id}/', {'member_ids': member_ids}
@@ -0,0 +1,204 @@
+import random
+from itertools import accumulate
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from ....users.models import User, Currency, Friendship
+from ....groups.models import Group, GroupMember
+from ....expenses.models import Expense, ExpenseSplit
+from ....expenses.splits import allocate_equal, from_cents
+from ....balances.events import backfill_events
+from ....balances.ledger import rebuild_ledger
+from ....activity.feed import expense_activity, trim
+from ....activity.models import Activity
+from ....analytics import rollups
+from ...seeding import SEED_PASSWORD, seed_email
+
+CURRENCIES = [('USD', 'US Dollar', '$'), ('EUR', 'Euro', '€'), ('INR', 'Indian Rupee', '₹')]
+
+
+class Command(BaseCommand):
+    help = 'Seed synthetic users, friendships, groups and expenses with power-law distributions.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100000)
+        parser.add_argument('--groups', type=int, default=10000)
+        parser.add_argument('--splits', type=int, default=5000000)
+        parser.add_argument('--avg-friends', type=int, default=10)
+        parser.add_argument('--max-group-size', type=int, default=500)
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument(
+            '--skip-ledger',
+            action='store_true',
+            help='Do not rebuild the Balance ledger, expense events and spend rollups afterwards.'
+        )
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+
+        currencies = self._seed_currencies()
+        user_ids = self._seed_users(options['users'], currencies)
+        # Popularity follows a Zipf-like curve: low ranks are picked far more
+        # often as friends and group members than high ranks.
+        self.cum_weights = list(accumulate(1 / (rank + 1) ** 0.8 for rank in range(len(user_ids))))
+        self.user_ids = user_ids
+
+        self._seed_friendships(options['avg_friends'])
+        groups = self._seed_groups(options['groups'], options['max_group_size'])
+        self._seed_expenses(groups, options['splits'])
+
+        # What expense creation keeps up to date as it goes is rebuilt in
+        # bulk, so reads of the events, rollups and feeds are benchmarked
+        # against filled tables.
+        if not options['skip_ledger']:
+            self.stdout.write(f'Rebuilt {rebuild_ledger()} balance(s).')
+            self.stdout.write(f'Backfilled {backfill_events()} expense event(s).')
+            self.stdout.write(f'Rebuilt rollups from {rollups.rebuild()} expense(s).')
+
+        self.stdout.write(f'Trimmed {trim()} activity row(s).')
+
+        self.stdout.write(self.style.SUCCESS('Seeding complete.'))
+
+    def _popular_users(self, count):
+        return self.rng.choices(self.user_ids, cum_weights=self.cum_weights, k=count)
+
+    def _seed_currencies(self):
+        for code, name, symbol in CURRENCIES:
+            Currency.objects.get_or_create(code=code, defaults={'name': name, 'symbol': symbol})
+
+        return list(Currency.objects.filter(code__in=[code for code, _, _ in CURRENCIES]))
+
+    def _seed_users(self, count, currencies):
+        password = make_password(SEED_PASSWORD)
+        start = User.objects.count()
+        user_ids = []
+
+        for offset in range(0, count, self.batch_size):
+            users = User.objects.bulk_create([
+                User(
+                    email=seed_email(start + index),
+                    first_name=f'First{start + index}',
+                    last_name=f'Last{start + index}',
+                    mobile_no=f'9{start + index:09d}',
+                    default_currency=self.rng.choice(currencies),
+                    password=password
+                )
+                for index in range(offset, min(offset + self.batch_size, count))
+            ])
+            user_ids.extend(user.id for user in users)
+            self.stdout.write(f'users: {min(offset + self.batch_size, count)}/{count}')
+
+        # Only the users created here: friendships, groups and expenses must
+        # never be attached to real accounts.
+        return user_ids
+
+    def _seed_friendships(self, avg_friends):
+        pairs = set()
+        target = len(self.user_ids) * avg_friends // 2
+
+        for user_id in self.user_ids:
+            degree = min(int(self.rng.paretovariate(1.5) * avg_friends / 3), len(self.user_ids) - 1)
+
+            for friend_id in self._popular_users(degree):
+                if friend_id != user_id:
+                    pairs.add((min(user_id, friend_id), max(user_id, friend_id)))
+
+            if len(pairs) >= target:
+                break
+
+        pairs = list(pairs)
+
+        for offset in range(0, len(pairs), self.batch_size):
+            Friendship.objects.bulk_create([
+                Friendship(
+                    from_user_id=from_user_id,
+                    to_user_id=to_user_id,
+                    status=Friendship.STATUS_ACCEPTED if self.rng.random() < 0.9 else Friendship.STATUS_PENDING
+                )
+                for from_user_id, to_user_id in pairs[offset:offset + self.batch_size]
+            ])
+
+        self.stdout.write(f'friendships: {len(pairs)}')
+
+    def _seed_groups(self, count, max_size):
+        group_types = [group_type for group_type, _ in Group.TYPE_CHOICES]
+        groups = []
+
+        for offset in range(0, count, self.batch_size):
+            batch = []
+            members = []
+
+            for _ in range(min(self.batch_size, count - offset)):
+                size = max(2, min(max_size, int(self.rng.paretovariate(1.2) * 2)))
+                member_ids = list(dict.fromkeys(self._popular_users(size)))
+                batch.append(Group(
+                    name=f'Group {offset + len(batch)}',
+                    group_type=self.rng.choice(group_types),
+                    created_by_id=member_ids[0]
+                ))
+                members.append(member_ids)
+
+            Group.objects.bulk_create(batch)
+
+            GroupMember.objects.bulk_create([
+                GroupMember(
+                    group=group,
+                    user_id=user_id,
+                    role=GroupMember.ROLE_ADMIN if position == 0 else GroupMember.ROLE_MEMBER
+                )
+                for group, member_ids in zip(batch, members)
+                for position, user_id in enumerate(member_ids)
+            ], batch_size=self.batch_size)
+
+            groups.extend((group.id, member_ids) for group, member_ids in zip(batch, members))
+            self.stdout.write(f'groups: {len(groups)}/{count}')
+
+        return groups
+
+    def _seed_expenses(self, groups, target_splits):
+        weights = list(accumulate(len(member_ids) for _, member_ids in groups))
+        created = 0
+
+        while created < target_splits:
+            expenses = []
+            participants = []
+
+            for group_id, member_ids in self.rng.choices(groups, cum_weights=weights, k=self.batch_size):
+                people = member_ids if len(member_ids) <= 8 else self.rng.sample(member_ids, 8)
+                cents = self.rng.randint(100, 50000)
+                expenses.append(Expense(
+                    amount=from_cents(cents),
+                    description='Seeded expense',
+                    paid_by_id=people[0],
+                    group_id=group_id
+                ))
+                participants.append((people, allocate_equal(cents, len(people))))
+
+            Expense.objects.bulk_create(expenses)
+
+            splits = [
+                ExpenseSplit(expense=expense, user_id=user_id, amount=from_cents(part))
+                for expense, (people, parts) in zip(expenses, participants)
+                for user_id, part in zip(people, parts)
+            ]
+            ExpenseSplit.objects.bulk_create(splits, batch_size=self.batch_size)
+
+            # The group's feed plus each participant's, as fan-out writes
+            # them; in groups of more than 8 only the sampled members get one.
+            Activity.objects.bulk_create([
+                Activity(
+                    user_id=user_id,
+                    group_id=expense.group_id,
+                    verb=Activity.VERB_EXPENSE_ADDED,
+                    actor_id=expense.paid_by_id,
+                    target_id=expense.id,
+                    data=expense_activity(expense, people)['data'],
+                    created_at=expense.created_at
+                )
+                for expense, (people, _) in zip(expenses, participants)
+                for user_id in [None] + people
+            ], batch_size=self.batch_size)
+
+            created += len(splits)
+            self.stdout.write(f'splits: {created}/{target_splits}')
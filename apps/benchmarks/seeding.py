@@ -0,0 +1,6 @@
+SEED_EMAIL_DOMAIN = 'seed.fittus.test'
+SEED_PASSWORD = 'seed-password-123'
+
+
+def seed_email(index):
+    return f'user{index}@{SEED_EMAIL_DOMAIN}'
@@ -0,0 +1,45 @@
+from django.views.decorators.http import require_GET
+from rest_framework import status
+from rest_framework.exceptions import NotFound
+from fittus.async_support import async_authenticated, json_response
+from fittus.conditional import aconditional
+from ..groups.models import GroupMember
+from ..users.currencies import currencies
+from .models import Expense
+from .pagination import KeysetPagination
+from .serializers import ExpenseReadSerializer
+from .versions import aexpense_list_version
+
+
+async def _expense_page(request, queryset):
+    paginator = KeysetPagination()
+
+    try:
+        page = await paginator.apaginate_queryset(queryset.prefetch_related('splits'), request)
+    except NotFound as exc:
+        return json_response({'detail': exc.detail}, status=exc.status_code)
+
+    await currencies.asnapshot()
+
+    return json_response(paginator.get_paginated_data(ExpenseReadSerializer(page, many=True).data))
+
+
+@require_GET
+@async_authenticated
+@aconditional(lambda request, group_id: aexpense_list_version(
+    Expense.objects.filter(group_id=group_id, group__members__user_id=request.user.id)
+))
+async def group_expense_list(request, group_id):
+    is_member = await GroupMember.objects.filter(group_id=group_id, user_id=request.user.id).aexists()
+
+    if not is_member:
+        return json_response({'detail': 'Group not found.'}, status=status.HTTP_404_NOT_FOUND)
+
+    return await _expense_page(request, Expense.objects.filter(group_id=group_id))
+
+
+@require_GET
+@async_authenticated
+@aconditional(lambda request: aexpense_list_version(Expense.objects.filter(splits__user_id=request.user.id)))
+async def my_expense_list(request):
+    return await _expense_page(request, Expense.objects.filter(splits__user_id=request.user.id))
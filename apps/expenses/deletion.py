@@ -0,0 +1,58 @@
+from weakref import WeakKeyDictionary
+from django.db.models import QuerySet
+from ..groups.models import Group
+from ..users.models import User
+from .models import Expense
+
+# Expense pre_delete receivers undo an expense's effects while its splits
+# still exist. Deleting a group or a user cascades to every one of its
+# expenses, each with its own signal, so receivers call cascade_batch() and
+# handle the whole cascade in bulk on its first expense.
+
+# Expenses a delete() of each origin cascades to, by origin model.
+CASCADES = {
+    Expense: 'pk__in',
+    Group: 'group__in',
+    User: 'paid_by__in',
+}
+
+
+def _cascaded(origin):
+    model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    lookup = CASCADES.get(model)
+
+    if lookup is None:
+        return []
+
+    values = origin.values('pk') if isinstance(origin, QuerySet) else [origin.pk]
+    return list(Expense.objects.filter(**{lookup: values}).select_related('group'))
+
+
+class CascadeBatches:
+    """One receiver's record of the expenses it already handled, per delete() origin."""
+
+    def __init__(self):
+        self._handled = WeakKeyDictionary()
+
+    def pending(self, instance, origin):
+        """
+        The expenses to handle for this pre_delete: every expense the delete
+        of `origin` cascades to on its first signal, then only those it could
+        not foresee (deeper cascades), one by one.
+        """
+        if origin is None or origin is instance:
+            return [instance]
+
+        batch = []
+
+        if origin not in self._handled:
+            batch = _cascaded(origin)
+            self._handled[origin] = {expense.pk for expense in batch}
+
+        handled = self._handled[origin]
+
+        if instance.pk not in handled:
+            handled.add(instance.pk)
+            batch.append(instance)
+
+        return batch
@@ -0,0 +1,116 @@
+import csv
+import json
+from itertools import groupby
+from operator import itemgetter
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from ..users.currencies import currencies
+from .pagination import decode_cursor, encode_cursor
+
+# Full expense history exports. Expenses are read oldest first in one query
+# joined to their splits, through a server-side cursor, and encoded record by
+# record, so memory stays flat however long the group's history is, under
+# ASGI too (see fittus.async_support.streaming_response). Every record
+# carries the cursor to resume right after it.
+
+EXPORT_CHUNK_SIZE = 2000
+WRITE_BATCH_SIZE = 100
+
+FIELDS = ['id', 'amount', 'currency', 'description', 'paid_by', 'group', 'split_type', 'created_at', 'splits', 'cursor']
+
+COLUMNS = [
+    'id', 'amount', 'currency_id', 'description', 'paid_by_id', 'group_id', 'split_type', 'created_at',
+    'splits__user_id', 'splits__amount'
+]
+
+
+def after(queryset, cursor):
+    # The oldest-first counterpart of pagination.after_cursor.
+    created_at, pk = decode_cursor(cursor)
+    return queryset.filter(Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=pk))
+
+
+def export_records(queryset, cursor=None, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    One dict per expense in queryset, oldest first, starting after cursor.
+    The cursor is checked here, before anything is streamed; rows are only
+    fetched as the returned iterator is consumed.
+    """
+    if cursor:
+        queryset = after(queryset, cursor)
+
+    rows = (
+        queryset
+        .order_by('created_at', 'id', 'splits__id')
+        .values_list(*COLUMNS)
+        .iterator(chunk_size=chunk_size)
+    )
+
+    return _records(rows)
+
+
+def _records(rows):
+    # Split rows arrive next to their expense, so each record is built from
+    # consecutive rows and nothing else is kept.
+    for _, expense_rows in groupby(rows, key=itemgetter(0)):
+        first, *rest = expense_rows
+        pk, amount, currency_id, description, paid_by_id, group_id, split_type, created_at = first[:8]
+        currency = currencies.get(currency_id) if currency_id else None
+
+        yield {
+            'id': pk,
+            'amount': amount,
+            'currency': currency.code if currency else None,
+            'description': description,
+            'paid_by': paid_by_id,
+            'group': group_id,
+            'split_type': split_type,
+            'created_at': created_at.isoformat(),
+            'splits': [
+                {'user_id': user_id, 'amount': split_amount}
+                for *_, user_id, split_amount in (first, *rest) if user_id is not None
+            ],
+            'cursor': encode_cursor(created_at, pk),
+        }
+
+
+class _Echo:
+    # csv.writer target that hands each encoded line straight back.
+    def write(self, value):
+        return value
+
+
+def _batched(lines):
+    batch = []
+
+    for line in lines:
+        batch.append(line)
+
+        if len(batch) >= WRITE_BATCH_SIZE:
+            yield ''.join(batch).encode()
+            batch = []
+
+    if batch:
+        yield ''.join(batch).encode()
+
+
+def _json(value):
+    return json.dumps(value, cls=DjangoJSONEncoder)
+
+
+def jsonl_lines(records):
+    return _batched(_json(record) + '\n' for record in records)
+
+
+def csv_lines(records):
+    """One row per expense with splits as a JSON column, as CSVParser reads them."""
+    writer = csv.writer(_Echo())
+
+    def lines():
+        yield writer.writerow(FIELDS)
+
+        for record in records:
+            record['splits'] = _json(record['splits'])
+            yield writer.writerow(['' if record[field] is None else record[field] for field in FIELDS])
+
+    return _batched(lines())
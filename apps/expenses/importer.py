@@ -0,0 +1,200 @@
+from django.db import transaction
+from rest_framework import serializers
+from rest_framework.exceptions import ParseError
+from ..users.models import User
+from ..groups.models import Group, GroupMember
+from ..groups.cache import bump_group_version
+from ..balances.events import expense_debts, record_expense_events
+from ..balances.models import ExpenseEvent
+from ..activity.feed import expense_activity, publish
+from ..analytics.rollups import record_expenses
+from ..tasks.queue import enqueue_many
+from .models import Expense, ExpenseSplit
+from .serializers import ExpenseImportRowSerializer
+
+CHUNK_SIZE = 500
+SPLIT_BATCH_SIZE = 2000
+
+
+class ExpenseImporter:
+    """
+    Imports expense rows paid by `user` in chunks. Each chunk resolves its
+    groups, memberships and users with a fixed number of queries, then writes
+    all valid rows with bulk_create inside one transaction. Invalid rows are
+    skipped and reported by their 1-based row number.
+    """
+
+    def __init__(self, user, chunk_size=CHUNK_SIZE):
+        self.user = user
+        self.chunk_size = chunk_size
+        # One serializer instance validates every row; building its fields per
+        # row would dominate the import time.
+        self.row_serializer = ExpenseImportRowSerializer()
+        self.created = 0
+        self.errors = []
+        self.touched_group_ids = set()
+
+    def run(self, rows):
+        chunk = []
+
+        for number, row in enumerate(rows, start=1):
+            chunk.append((number, row))
+
+            if len(chunk) >= self.chunk_size:
+                self._import_chunk(chunk)
+                chunk = []
+
+        if chunk:
+            self._import_chunk(chunk)
+
+        # One refresh per group for the whole import, once every chunk committed.
+        enqueue_many(
+            'balances.refresh_settlement_plan',
+            [{'group_id': group_id} for group_id in sorted(self.touched_group_ids)]
+        )
+
+        return {
+            'created': self.created,
+            'failed': len(self.errors),
+            'errors': sorted(self.errors, key=lambda error: error['row'])
+        }
+
+    def _error(self, number, detail):
+        self.errors.append({'row': number, 'errors': detail})
+
+    def _validate_rows(self, chunk):
+        valid = []
+
+        for number, row in chunk:
+            if isinstance(row, ParseError):
+                self._error(number, [str(row.detail)])
+                continue
+
+            if not isinstance(row, dict):
+                self._error(number, ['Row must be an object.'])
+                continue
+
+            try:
+                attrs = self.row_serializer.run_validation(row)
+            except serializers.ValidationError as exc:
+                self._error(number, exc.detail)
+                continue
+
+            valid.append((number, attrs))
+
+        return valid
+
+    def _import_chunk(self, chunk):
+        rows = self._validate_rows(chunk)
+
+        if not rows:
+            return
+
+        group_ids = {attrs['group_id'] for _, attrs in rows if attrs.get('group_id')}
+        user_ids = {self.user.id}
+
+        for _, attrs in rows:
+            for split in attrs['splits']:
+                user_id = split.get('user_id')
+                if isinstance(user_id, int):
+                    user_ids.add(user_id)
+
+        groups = list(Group.objects.filter(id__in=group_ids).values_list('id', 'currency_id', 'group_type'))
+        group_currency_ids = {group_id: currency_id for group_id, currency_id, _ in groups}
+        group_types = {group_id: group_type for group_id, _, group_type in groups}
+        existing_group_ids = group_currency_ids.keys()
+        memberships = set(
+            GroupMember.objects.filter(group_id__in=existing_group_ids, user_id__in=user_ids)
+            .values_list('group_id', 'user_id')
+        )
+        existing_user_ids = set(User.objects.filter(id__in=user_ids).values_list('id', flat=True))
+
+        expenses = []
+        split_maps = []
+
+        for number, attrs in rows:
+            try:
+                split_map = self._calculate(attrs, existing_group_ids, memberships, existing_user_ids)
+            except serializers.ValidationError as exc:
+                self._error(number, exc.detail)
+                continue
+            except (KeyError, TypeError, ValueError, ArithmeticError):
+                self._error(number, ['Invalid splits.'])
+                continue
+
+            currency = attrs.get('currency')
+            currency_id = (
+                currency.id if currency
+                else group_currency_ids.get(attrs.get('group_id')) or self.user.default_currency_id
+            )
+
+            expenses.append(Expense(
+                amount=attrs['amount'],
+                currency_id=currency_id,
+                description=attrs.get('description', ''),
+                split_type=attrs['split_type'],
+                paid_by=self.user,
+                group_id=attrs.get('group_id')
+            ))
+            split_maps.append(split_map)
+
+        if not expenses:
+            return
+
+        with transaction.atomic():
+            Expense.objects.bulk_create(expenses)
+
+            ExpenseSplit.objects.bulk_create(
+                [
+                    ExpenseSplit(expense=expense, user_id=user_id, amount=amount)
+                    for expense, split_map in zip(expenses, split_maps)
+                    for user_id, amount in split_map.items()
+                ],
+                batch_size=SPLIT_BATCH_SIZE
+            )
+
+            record_expense_events(
+                (expense, ExpenseEvent.KIND_CREATED, expense_debts(self.user.id, split_map), self.user.id)
+                for expense, split_map in zip(expenses, split_maps)
+            )
+
+            record_expenses(
+                (expense, group_types.get(expense.group_id), split_map)
+                for expense, split_map in zip(expenses, split_maps)
+            )
+
+            touched_group_ids = {expense.group_id for expense in expenses if expense.group_id}
+            transaction.on_commit(lambda: [bump_group_version(group_id) for group_id in touched_group_ids])
+            publish(
+                expense_activity(expense, split_map.keys())
+                for expense, split_map in zip(expenses, split_maps)
+            )
+
+        self.created += len(expenses)
+        self.touched_group_ids |= touched_group_ids
+
+    def _calculate(self, attrs, existing_group_ids, memberships, existing_user_ids):
+        splits = attrs['splits']
+        group_id = attrs.get('group_id')
+        participant_ids = [split['user_id'] for split in splits]
+
+        if len(set(participant_ids)) != len(participant_ids):
+            raise serializers.ValidationError('Split users must be unique.')
+
+        if group_id:
+            if group_id not in existing_group_ids:
+                raise serializers.ValidationError('Group not found.')
+
+            if (group_id, self.user.id) not in memberships:
+                raise serializers.ValidationError('You are not member of this group.')
+
+        if self.user.id not in participant_ids:
+            raise serializers.ValidationError('Payer must be included in splits.')
+
+        if group_id:
+            if any((group_id, user_id) not in memberships for user_id in participant_ids):
+                raise serializers.ValidationError('All split users must be members of the group.')
+        elif any(user_id not in existing_user_ids for user_id in participant_ids):
+            raise serializers.ValidationError('Invalid User(s).')
+
+        return self.row_serializer.calculate_splits(attrs['amount'], attrs['split_type'], participant_ids, splits)
@@ -0,0 +1,74 @@
+import random
+import timeit
+from decimal import Decimal
+from django.core.management.base import BaseCommand
+from ...models import Expense
+from ...splits import compute_splits_batch
+
+
+def legacy_split(amount, split_type, participant_ids, splits):
+    # Per-user Decimal division and quantize, as ExpenseCreateSerializer did
+    # before the integer split engine.
+    cent = Decimal('0.01')
+
+    if split_type == Expense.SPLIT_EQUAL:
+        per_head = (amount / Decimal(len(participant_ids))).quantize(cent)
+        return {user_id: per_head for user_id in participant_ids}
+
+    if split_type == Expense.SPLIT_PERCENT:
+        return {
+            split['user_id']: (amount * Decimal(str(split['percent'])) / 100).quantize(cent)
+            for split in splits
+        }
+
+    per_share = amount / Decimal(sum(split['shares'] for split in splits))
+    return {split['user_id']: (per_share * split['shares']).quantize(cent) for split in splits}
+
+
+class Command(BaseCommand):
+    help = 'Micro-benchmark the integer split engine against the previous Decimal implementation.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10000)
+        parser.add_argument('--participants', type=int, default=6)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def _rows(self, split_type, count, participants):
+        rng = random.Random(42)
+        rows = []
+
+        for _ in range(count):
+            amount = Decimal(rng.randint(100, 1000000)).scaleb(-2)
+            user_ids = list(range(1, participants + 1))
+
+            if split_type == Expense.SPLIT_PERCENT:
+                percents = [100 // participants] * participants
+                percents[0] += 100 - sum(percents)
+                splits = [{'user_id': user_id, 'percent': percent} for user_id, percent in zip(user_ids, percents)]
+            elif split_type == Expense.SPLIT_SHARE:
+                splits = [{'user_id': user_id, 'shares': rng.randint(1, 4)} for user_id in user_ids]
+            else:
+                splits = [{'user_id': user_id} for user_id in user_ids]
+
+            rows.append((amount, split_type, user_ids, splits))
+
+        return rows
+
+    def handle(self, *args, **options):
+        count = options['rows']
+        repeat = options['repeat']
+
+        self.stdout.write(f'{"split":>8} {"legacy ms":>10} {"engine ms":>10} {"legacy lost cents":>18}')
+
+        for split_type in (Expense.SPLIT_EQUAL, Expense.SPLIT_PERCENT, Expense.SPLIT_SHARE):
+            rows = self._rows(split_type, count, options['participants'])
+
+            legacy = min(timeit.repeat(lambda: [legacy_split(*row) for row in rows], number=1, repeat=repeat))
+            engine = min(timeit.repeat(lambda: compute_splits_batch(rows), number=1, repeat=repeat))
+
+            lost = sum(
+                abs(row[0] - sum(legacy_split(*row).values()))
+                for row in rows
+            ).scaleb(2)
+
+            self.stdout.write(f'{split_type:>8} {legacy * 1000:>10.1f} {engine * 1000:>10.1f} {lost:>18}')
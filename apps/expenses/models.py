@@ -1,5 +1,5 @@
 from django.db import models
-from ..users.models import User
+from ..users.models import Currency, User
 from ..groups.models import Group 
 
 
@@ -17,6 +17,7 @@ class Expense(models.Model):
     ]
 
     amount = models.DecimalField(max_digits=10, decimal_places=2)
+    currency = models.ForeignKey(Currency, related_name='+', on_delete=models.PROTECT, null=True, blank=True)
     description = models.TextField()
     split_type = models.CharField(max_length=10, choices=SPLIT_CHOICES, default=SPLIT_EQUAL)
     paid_by = models.ForeignKey(User, related_name='expenses_paid', on_delete=models.CASCADE)
@@ -24,7 +25,17 @@ class Expense(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['group', 'created_at', 'id'], name='expense_group_feed_idx'),
+        ]
+
 class ExpenseSplit(models.Model):
     expense = models.ForeignKey(Expense, related_name='splits', on_delete=models.CASCADE)
     user = models.ForeignKey(User, on_delete=models.CASCADE)
-    amount = models.DecimalField(max_digits=10, decimal_places=2)
\ No newline at end of file
+    amount = models.DecimalField(max_digits=10, decimal_places=2)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'expense'], name='expensesplit_user_idx'),
+        ]
@@ -0,0 +1,87 @@
+import base64
+from datetime import datetime
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+def encode_cursor(created_at, pk):
+    raw = f'{created_at.isoformat()}|{pk}'.encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        created_at, pk = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+        return datetime.fromisoformat(created_at), int(pk)
+    except (TypeError, ValueError):
+        raise NotFound('Invalid cursor.')
+
+
+def after_cursor(queryset, created_at, pk):
+    return queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk))
+
+
+class KeysetPagination(BasePagination):
+    """
+    Newest-first pagination on (created_at, id). The cursor carries the last
+    row's key, so every page is an index range scan no matter how deep the
+    client has scrolled.
+    """
+    page_size = 50
+    max_page_size = 200
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.GET.get(self.page_size_query_param, self.page_size))
+        except ValueError:
+            return self.page_size
+
+        return max(1, min(page_size, self.max_page_size))
+
+    def _page_query(self, queryset, request):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        queryset = queryset.order_by('-created_at', '-id')
+
+        cursor = request.GET.get(self.cursor_query_param)
+        if cursor:
+            queryset = after_cursor(queryset, *decode_cursor(cursor))
+
+        return queryset[:self.page_size + 1]
+
+    def _page(self, rows):
+        page = rows[:self.page_size]
+
+        self.next_cursor = None
+        if len(rows) > self.page_size:
+            self.next_cursor = encode_cursor(page[-1].created_at, page[-1].pk)
+
+        return page
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self._page(list(self._page_query(queryset, request)))
+
+    async def apaginate_queryset(self, queryset, request):
+        return self._page([row async for row in self._page_query(queryset, request)])
+
+    def get_next_link(self):
+        if not self.next_cursor:
+            return None
+
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+    def get_paginated_data(self, data):
+        return {
+            'next': self.get_next_link(),
+            'cursor': self.next_cursor,
+            'results': data
+        }
+
+    def get_paginated_response(self, data):
+        return Response(self.get_paginated_data(data))
@@ -0,0 +1,53 @@
+import codecs
+import csv
+import json
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+# Both parsers return lazy iterators over the request stream so a bulk import
+# never holds the whole body in memory. A row that cannot be decoded is
+# yielded as a ParseError and reported against its row number.
+
+
+class JSONLinesParser(BaseParser):
+    media_type = 'application/x-ndjson'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        return self._rows(stream)
+
+    def _rows(self, stream):
+        if stream is None:
+            return
+
+        for line in stream:
+            if not line.strip():
+                continue
+
+            try:
+                yield json.loads(line)
+            except ValueError as exc:
+                yield ParseError(f'Invalid JSON: {exc}')
+
+
+class CSVParser(BaseParser):
+    media_type = 'text/csv'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', 'utf-8')
+        return self._rows(stream, encoding)
+
+    def _rows(self, stream, encoding):
+        if stream is None:
+            return
+
+        for row in csv.DictReader(codecs.iterdecode(stream, encoding)):
+            row = {key: value for key, value in row.items() if value not in (None, '')}
+
+            try:
+                row['splits'] = json.loads(row.get('splits', '[]'))
+            except ValueError as exc:
+                yield ParseError(f'Invalid splits JSON: {exc}')
+                continue
+
+            yield row
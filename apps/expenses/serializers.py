@@ -1,14 +1,22 @@
 from rest_framework import serializers
-from decimal import Decimal
 from django.db import transaction
 from ..users.models import User
+from ..users.currencies import currencies
+from ..users.serializers import CurrencyCodeField
 from .models import Expense, ExpenseSplit
+from .splits import SplitError, compute_splits
 from ..groups.models import Group, GroupMember
+from ..groups.cache import bump_group_version
+from ..balances.events import expense_created
+from ..activity.feed import expense_activity, publish
+from ..analytics.rollups import record_expenses
+from ..tasks.queue import enqueue
 
 class ExpenseCreateSerializer(serializers.Serializer):
     amount = serializers.DecimalField(max_digits=10, decimal_places=2)
+    currency = CurrencyCodeField(required=False)
     description = serializers.CharField(required=False, allow_blank=True)
-    group_id = serializers.UUIDField(required=False)
+    group_id = serializers.IntegerField(required=False, min_value=1)
     split_type = serializers.ChoiceField(choices=Expense.SPLIT_CHOICES)
     splits = serializers.ListField(
         child=serializers.DictField(),
@@ -24,8 +32,8 @@ class ExpenseCreateSerializer(serializers.Serializer):
         
         group_id = attrs.get('group_id')
         
-        if group_id:
-            group = Group.objects.filter(id=attrs['group_id']).first()
+        if group_id is not None:
+            group = Group.objects.filter(id=group_id).first()
 
             if not group:
                 raise serializers.ValidationError('Group not found.')
@@ -37,6 +45,12 @@ class ExpenseCreateSerializer(serializers.Serializer):
             
             attrs['group'] = group
 
+        if not attrs.get('currency'):
+            # Default to the group's currency, else the payer's.
+            currency_id = attrs['group'].currency_id if attrs.get('group') else None
+            currency_id = currency_id or user.default_currency_id
+            attrs['currency'] = currencies.get(currency_id) if currency_id else None
+
         attrs['paid_by'] = user
 
         return attrs 
@@ -48,88 +62,32 @@ class ExpenseCreateSerializer(serializers.Serializer):
             raise serializers.ValidationError('Payer must be included in splits.')
         
         if expense.group:
-            group_members = GroupMember.objects.filter(
-                group=expense.group,
-                user_id__in=user_ids
-            ).select_related('user')
+            member_ids = list(
+                GroupMember.objects.filter(
+                    group=expense.group,
+                    user_id__in=user_ids
+                ).values_list('user_id', flat=True)
+            )
 
-            if group_members.count() != len(user_ids):
+            if len(member_ids) != len(user_ids):
                 raise serializers.ValidationError('All split users must be members of the group.')
                 
-            return [group_member.user for group_member in group_members]
+            # The request's split order, not the database's: leftover cents
+            # go to the first participants, so the order must be stable.
+            return user_ids
         
-        users = list(User.objects.filter(id__in=user_ids))
+        found_ids = list(User.objects.filter(id__in=user_ids).values_list('id', flat=True))
 
-        if len(users) != len(user_ids):
+        if len(found_ids) != len(user_ids):
             raise serializers.ValidationError('Invalid User(s).')
         
-        return users
-    
-    def _map_users(self, split_map):
-        users = User.objects.filter(id__in=split_map.keys())
-        return {
-            user: split_map[user.id].quantize(Decimal('0.01'))
-            for user in users
-        }
-    
-    def _calculate_splits(self, expense, participants, splits):
-        if expense.split_type == Expense.SPLIT_EQUAL:
-            return self._equal_split(expense.amount, participants)
-
-        if expense.split_type == Expense.SPLIT_EXACT:
-            return self._exact_split(expense.amount, splits)
-
-        if expense.split_type == Expense.SPLIT_PERCENT:
-            return self._percent_split(expense.amount, splits)
-
-        if expense.split_type == Expense.SPLIT_SHARE:
-            return self._share_split(expense.amount, splits)
-
-        raise serializers.ValidationError('Invalid split type.')
-    
-    def _equal_split(self, amount, participants):
-        count = len(participants)
-        per_head = (amount / Decimal(count)).quantize(Decimal('0.01'))
-
-        return {user: per_head for user in participants}
-    
-    def _exact_split(self, amount, splits):
-        split_map = {}
-        total = Decimal('0.00')
-
-        for split in splits:
-            val = Decimal(str(split['amount']))
-            split_map[split['user_id']] = val
-            total += val
-
-        if total != amount:
-            raise serializers.ValidationError(
-                'Exact split total must equal expense amount.'
-            )
-        
-        return self._map_users(split_map)
-
-    def _percent_split(self, amount, splits):
-        split_map = {}
-        percent_sum = Decimal('0')
-
-        for split in splits:
-            percent = Decimal(str(split['percent']))
-            percent_sum += percent
-            split_map[split['user_id']] = (amount * percent / 100)
-
-        if percent_sum != 100:
-            raise serializers.ValidationError('Percent split must total 100.')
-        
-        return self._map_users(split_map)
+        return user_ids
     
-    def _share_split(self, amount, splits):
-        total_shares = sum(split['shares'] for split in splits)
-        per_share = amount / Decimal(total_shares)
-
-        split_map = {split['user_id']: per_share * split['shares'] for split in splits}
-
-        return self._map_users(split_map)
+    def calculate_splits(self, amount, split_type, participant_ids, splits):
+        try:
+            return compute_splits(amount, split_type, participant_ids, splits)
+        except SplitError as exc:
+            raise serializers.ValidationError(str(exc))
     
     def create(self, validated_data):
         splits = validated_data.pop('splits')
@@ -137,33 +95,56 @@ class ExpenseCreateSerializer(serializers.Serializer):
         with transaction.atomic():
             expense = Expense.objects.create(**validated_data)
 
-            participants = self._get_participants(expense, splits)
+            participant_ids = self._get_participants(expense, splits)
 
-            split_map = self._calculate_splits(expense, participants, splits)
+            split_map = self.calculate_splits(expense.amount, expense.split_type, participant_ids, splits)
 
-            ExpenseSplit.objects.bulk_create([
+            self.created_splits = ExpenseSplit.objects.bulk_create([
                 ExpenseSplit(
                     expense=expense,
-                    user=user,
+                    user_id=user_id,
                     amount=amount
                 )
-                for user, amount in split_map.items()
+                for user_id, amount in split_map.items()
             ])
 
+            expense_created(expense, split_map, actor_id=expense.paid_by_id)
+            record_expenses([(expense, expense.group.group_type if expense.group_id else None, split_map)])
+            publish([expense_activity(expense, split_map.keys())])
+
+            if expense.group_id:
+                transaction.on_commit(lambda: bump_group_version(expense.group_id))
+                enqueue('balances.refresh_settlement_plan', {'group_id': expense.group_id})
+
         return expense
 
 class ExpenseReadSerializer(serializers.ModelSerializer):
+    currency = CurrencyCodeField(read_only=True)
     splits = serializers.SerializerMethodField()
 
     class Meta:
         model = Expense
-        fields = ['id', 'amount', 'description', 'paid_by', 'group', 'split_type', 'created_at', 'splits']
+        fields = ['id', 'amount', 'currency', 'description', 'paid_by', 'group', 'split_type', 'created_at', 'splits']
 
     def get_splits(self, obj):
+        # The create view passes the rows it just wrote, keyed by expense id,
+        # instead of having them queried back.
+        splits = self.context.get('splits', {}).get(obj.id)
+
         return [
             {
-                'user_id': split.user.id,
+                'user_id': split.user_id,
                 'amount': split.amount
             }
-            for split in obj.splits.all()
-        ]
\ No newline at end of file
+            for split in (obj.splits.all() if splits is None else splits)
+        ]
+
+class ExpenseImportRowSerializer(ExpenseCreateSerializer):
+    group_id = serializers.IntegerField(required=False, allow_null=True, min_value=1)
+
+    def validate(self, attrs):
+        # Group and membership checks are resolved per chunk by ExpenseImporter.
+        if attrs['amount'] <= 0:
+            raise serializers.ValidationError('Amount must be greater than zero.')
+
+        return attrs
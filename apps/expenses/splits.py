@@ -0,0 +1,158 @@
+from decimal import Decimal, InvalidOperation
+from functools import lru_cache
+from .models import Expense
+
+# Split engine working in integer minor units (cents). Every split type is
+# reduced to integer weights and allocated with the largest-remainder method,
+# so the parts always add up to the expense amount and leftover cents go to
+# the largest fractional remainders, ties broken by split order.
+
+CENT = Decimal('0.01')
+
+# Whole digits an amount may have (ExpenseSplit.amount is max_digits=10,
+# decimal_places=2), checked before scaling: "1e999999" would overflow.
+MAX_AMOUNT_DIGITS = 8
+
+# Bounds on percent/share values, checked before they are scaled to
+# integers: "1e-999999999" would otherwise ask for a billion-digit factor.
+MAX_WEIGHT_DIGITS = 9
+MAX_WEIGHT_PLACES = 4
+WEIGHT_STEP = Decimal(1).scaleb(-MAX_WEIGHT_PLACES)
+
+
+class SplitError(ValueError):
+    pass
+
+
+def to_cents(amount):
+    if not isinstance(amount, Decimal):
+        amount = Decimal(str(amount))
+
+    if not amount.is_finite() or amount.adjusted() >= MAX_AMOUNT_DIGITS:
+        raise SplitError(f'Amounts must have at most {MAX_AMOUNT_DIGITS} digits before the decimal point.')
+
+    cents = amount * 100
+
+    if cents % 1:
+        raise SplitError('Amounts must have at most two decimal places.')
+
+    return int(cents)
+
+
+# Decimals are immutable and split amounts repeat a lot, so converting back
+# from cents is memoised instead of building a new Decimal for every part.
+@lru_cache(maxsize=65536)
+def from_cents(cents):
+    return Decimal(cents).scaleb(-2)
+
+
+def allocate(total, weights):
+    weight_sum = sum(weights)
+
+    if weight_sum <= 0 or min(weights) < 0:
+        raise SplitError('Split weights must be positive.')
+
+    scaled = [total * weight for weight in weights]
+    parts = [value // weight_sum for value in scaled]
+    leftover = total - sum(parts)
+
+    if leftover:
+        remainders = [value % weight_sum for value in scaled]
+        # sorted() is stable, so equal remainders keep their split order.
+        for index in sorted(range(len(parts)), key=lambda i: -remainders[i])[:leftover]:
+            parts[index] += 1
+
+    return parts
+
+
+def allocate_equal(total, count):
+    if count <= 0:
+        raise SplitError('Split weights must be positive.')
+
+    part, leftover = divmod(total, count)
+    return [part + 1] * leftover + [part] * (count - leftover)
+
+
+def _integer_weights(values):
+    values = list(values)
+
+    if all(type(value) is int for value in values):
+        if any(abs(value) >= 10 ** MAX_WEIGHT_DIGITS for value in values):
+            raise SplitError(f'Split values must have at most {MAX_WEIGHT_DIGITS} digits.')
+
+        return values, 1
+
+    decimals = [Decimal(str(value)) for value in values]
+
+    if not all(value.is_finite() for value in decimals):
+        raise SplitError('Split values must be numbers.')
+
+    # adjusted() and an exact comparison never round or overflow, however
+    # large the client's exponent is.
+    if any(value.adjusted() >= MAX_WEIGHT_DIGITS for value in decimals):
+        raise SplitError(f'Split values must have at most {MAX_WEIGHT_DIGITS} digits.')
+
+    quantized = [value.quantize(WEIGHT_STEP) for value in decimals]
+
+    if quantized != decimals:
+        raise SplitError(f'Split values can have at most {MAX_WEIGHT_PLACES} decimal places.')
+
+    factor = 10 ** MAX_WEIGHT_PLACES
+
+    return [int(value * factor) for value in quantized], factor
+
+
+def split_cents(total, split_type, participant_ids, splits):
+    """Split `total` cents, returning {user_id: cents}."""
+    try:
+        if split_type == Expense.SPLIT_EQUAL:
+            return dict(zip(participant_ids, allocate_equal(total, len(participant_ids))))
+
+        user_ids = [split['user_id'] for split in splits]
+
+        if split_type == Expense.SPLIT_EXACT:
+            parts = [to_cents(split['amount']) for split in splits]
+
+            if sum(parts) != total:
+                raise SplitError('Exact split total must equal expense amount.')
+
+            return dict(zip(user_ids, parts))
+
+        if split_type == Expense.SPLIT_PERCENT:
+            weights, factor = _integer_weights(split['percent'] for split in splits)
+
+            if sum(weights) != 100 * factor:
+                raise SplitError('Percent split must total 100.')
+
+            return dict(zip(user_ids, allocate(total, weights)))
+
+        if split_type == Expense.SPLIT_SHARE:
+            weights, _ = _integer_weights(split['shares'] for split in splits)
+            return dict(zip(user_ids, allocate(total, weights)))
+    except (KeyError, TypeError, InvalidOperation):
+        raise SplitError('Invalid splits.')
+
+    raise SplitError('Invalid split type.')
+
+
+def compute_splits(amount, split_type, participant_ids, splits):
+    """Split a Decimal `amount`, returning {user_id: Decimal}."""
+    cents = split_cents(to_cents(amount), split_type, participant_ids, splits)
+    return {user_id: from_cents(part) for user_id, part in cents.items()}
+
+
+def compute_splits_batch(rows):
+    """
+    Split many (amount, split_type, participant_ids, splits) rows in one call.
+    Each result is either a {user_id: Decimal} map or the SplitError raised
+    for that row, so one bad row does not abort the batch.
+    """
+    results = []
+
+    for amount, split_type, participant_ids, splits in rows:
+        try:
+            results.append(compute_splits(amount, split_type, participant_ids, splits))
+        except SplitError as exc:
+            results.append(exc)
+
+    return results
@@ -1,3 +1,207 @@
-from django.test import TestCase
+import csv
+import json
+from decimal import Decimal
+from asgiref.sync import async_to_sync
+from django.test import AsyncClient, SimpleTestCase
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+from fittus.testing import AsyncParityMixin
+from ..users.models import User
+from ..groups.models import Group, GroupMember
+from .models import Expense, ExpenseSplit
+from .serializers import ExpenseReadSerializer
+from .splits import SplitError, split_cents
 
-# Create your tests here.
+
+class SplitEngineTests(SimpleTestCase):
+    def test_leftover_cents_follow_split_order(self):
+        self.assertEqual(split_cents(100, Expense.SPLIT_EQUAL, [3, 1, 2], []), {3: 34, 1: 33, 2: 33})
+        self.assertEqual(split_cents(100, Expense.SPLIT_EQUAL, [2, 3, 1], []), {2: 34, 3: 33, 1: 33})
+
+    def test_weights_are_bounded_before_scaling(self):
+        for shares in ('1e-999999999', '1e999999999', '0.00001', 10 ** 12):
+            with self.assertRaises(SplitError):
+                split_cents(1000, Expense.SPLIT_SHARE, None, [{'user_id': 1, 'shares': shares}, {'user_id': 2, 'shares': 1}])
+
+        splits = [{'user_id': user_id, 'percent': percent} for user_id, percent in ((1, '33.3333'), (2, '33.3333'), (3, '33.3334'))]
+        self.assertEqual(split_cents(1000, Expense.SPLIT_PERCENT, None, splits), {1: 333, 2: 333, 3: 334})
+
+    def test_exact_amounts_are_bounded_before_scaling(self):
+        for amount in ('1e999999', '-1e999999', 'Infinity', 'NaN', '100000000'):
+            with self.assertRaises(SplitError):
+                split_cents(1000, Expense.SPLIT_EXACT, None, [{'user_id': 1, 'amount': amount}, {'user_id': 2, 'amount': '0'}])
+
+        splits = [{'user_id': 1, 'amount': '99999999.99'}, {'user_id': 2, 'amount': '0.01'}]
+        self.assertEqual(split_cents(10 ** 10, Expense.SPLIT_EXACT, None, splits), {1: 9999999999, 2: 1})
+
+
+class GroupExpensesMixin:
+    def setUp(self):
+        self.users = [User.objects.create(email=f'user{i}@example.com') for i in range(4)]
+        self.payer = self.users[0]
+        self.group = Group.objects.create(name='Trip', group_type=Group.TYPE_TRIP, created_by=self.payer)
+        GroupMember.objects.bulk_create([
+            GroupMember(group=self.group, user=user) for user in self.users
+        ])
+
+    def _create_expenses(self, count):
+        for _ in range(count):
+            expense = Expense.objects.create(amount=Decimal('40.00'), description='Dinner', paid_by=self.payer, group=self.group)
+            ExpenseSplit.objects.bulk_create([
+                ExpenseSplit(expense=expense, user=user, amount=Decimal('10.00')) for user in self.users
+            ])
+
+
+class ExpenseReadQueryBudgetTests(GroupExpensesMixin, APITestCase):
+    def test_create_response_reuses_created_splits(self):
+        self.client.force_authenticate(self.payer)
+        payload = {
+            'amount': '40.00',
+            'description': 'Dinner',
+            'split_type': Expense.SPLIT_EQUAL,
+            'splits': [{'user_id': user.id} for user in self.users],
+        }
+
+        # expense insert, participants, split insert, ledger upsert/lock/update,
+        # expense event insert, spend rollup upsert/lock/update and the
+        # surrounding savepoint.
+        with self.assertNumQueries(12):
+            response = self.client.post(reverse('create-expense'), payload, format='json')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(
+            sorted(split['user_id'] for split in response.data['splits']),
+            sorted(user.id for user in self.users)
+        )
+
+    def test_falsy_group_ids_are_rejected(self):
+        self.client.force_authenticate(self.payer)
+
+        for group_id in (0, -1):
+            response = self.client.post(reverse('create-expense'), {
+                'amount': '40.00',
+                'group_id': group_id,
+                'split_type': Expense.SPLIT_EQUAL,
+                'splits': [{'user_id': self.payer.id}],
+            }, format='json')
+
+            self.assertEqual(response.status_code, 400)
+            self.assertIn('group_id', response.data)
+
+        self.assertFalse(Expense.objects.exists())
+
+    def test_prefetched_list_serialization_is_constant(self):
+        for count in (1, 10):
+            Expense.objects.all().delete()
+            self._create_expenses(count)
+
+            with self.assertNumQueries(2):
+                data = ExpenseReadSerializer(Expense.objects.prefetch_related('splits'), many=True).data
+
+            self.assertEqual(len(data), count)
+            self.assertEqual(len(data[0]['splits']), len(self.users))
+
+    def test_group_feed_page_is_constant(self):
+        self.client.force_authenticate(self.payer)
+        url = reverse('group-expenses', args=[self.group.id])
+
+        for count in (1, 10):
+            Expense.objects.all().delete()
+            self._create_expenses(count)
+
+            # ETag version, membership check, expense page, prefetched splits
+            with self.assertNumQueries(4):
+                response = self.client.get(url)
+
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.data['results']), count)
+
+    def test_unchanged_group_feed_is_not_modified(self):
+        self.client.force_authenticate(self.payer)
+        url = reverse('group-expenses', args=[self.group.id])
+        self._create_expenses(10)
+
+        etag = self.client.get(url)['ETag']
+
+        # Only the ETag version; nothing is paged or serialized.
+        with self.assertNumQueries(1):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 304)
+
+
+class GroupExportTests(GroupExpensesMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.payer)
+        self.url = reverse('group-expenses-export', args=[self.group.id])
+        self._create_expenses(10)
+
+    def _records(self, response):
+        return [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+
+    def test_export_is_one_query_and_resumable(self):
+        # Membership check, then a single expense/split join however long the
+        # history is.
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url)
+            records = self._records(response)
+
+        self.assertEqual(len(records), 10)
+        self.assertEqual(len(records[0]['splits']), len(self.users))
+
+        resumed = self._records(self.client.get(self.url, {'cursor': records[3]['cursor']}))
+
+        self.assertEqual([record['id'] for record in resumed], [record['id'] for record in records[4:]])
+
+    def test_csv_export(self):
+        response = self.client.get(self.url, {'type': 'csv'})
+        rows = list(csv.DictReader(b''.join(response.streaming_content).decode().splitlines()))
+
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertEqual(len(rows), 10)
+        self.assertEqual(len(json.loads(rows[0]['splits'])), len(self.users))
+
+    def test_export_is_for_members_only(self):
+        self.client.force_authenticate(User.objects.create(email='outsider@example.com'))
+
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+    def test_export_streams_asynchronously_under_asgi(self):
+        token = RefreshToken.for_user(self.payer).access_token
+
+        async def export():
+            response = await AsyncClient().get(self.url, headers={'Authorization': f'Bearer {token}'})
+            return response, [chunk async for chunk in response.streaming_content]
+
+        response, chunks = async_to_sync(export)()
+
+        self.assertTrue(response.is_async)
+        self.assertEqual(len(b''.join(chunks).splitlines()), 10)
+
+
+class AsyncExpenseListParityTests(AsyncParityMixin, APITestCase):
+    def setUp(self):
+        self.users = [User.objects.create(email=f'user{i}@example.com') for i in range(3)]
+        self.outsider = User.objects.create(email='outsider@example.com')
+        self.group = Group.objects.create(name='Trip', group_type=Group.TYPE_TRIP, created_by=self.users[0])
+        GroupMember.objects.bulk_create([GroupMember(group=self.group, user=user) for user in self.users])
+
+        for index in range(5):
+            expense = Expense.objects.create(amount=Decimal('30.00'), description=f'Dinner {index}', paid_by=self.users[0], group=self.group)
+            ExpenseSplit.objects.bulk_create([
+                ExpenseSplit(expense=expense, user=user, amount=Decimal('10.00')) for user in self.users
+            ])
+
+    def test_group_expense_list(self):
+        path = reverse('group-expenses', args=[self.group.id])
+
+        first = self.assertSameResponse(self.users[1], 'get', path, {'page_size': 2})
+        self.assertSameResponse(self.users[1], 'get', path, {'page_size': 2, 'cursor': first.json()['cursor']})
+        self.assertSameResponse(self.users[1], 'get', path, {'cursor': 'not-a-cursor'})
+        self.assertSameResponse(self.outsider, 'get', path)
+
+    def test_my_expense_list(self):
+        self.assertSameResponse(self.users[2], 'get', reverse('my-expenses'), {'page_size': 3})
+        self.assertSameResponse(self.outsider, 'get', reverse('my-expenses'))
@@ -1,7 +1,9 @@
 from django.urls import path
-from .views import ExpenseCreateView
+from .views import ExpenseCreateView, ExpenseBulkImportView, MyExpenseListView
 
 
 urlpatterns = [
     path('create/', ExpenseCreateView.as_view(), name='create-expense'),
-]
\ No newline at end of file
+    path('mine/', MyExpenseListView.as_view(), name='my-expenses'),
+    path('bulk/', ExpenseBulkImportView.as_view(), name='bulk-import-expenses'),
+]
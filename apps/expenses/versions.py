@@ -0,0 +1,20 @@
+from django.db.models import Count, Max
+
+# Validators for conditional GET on expense lists (see fittus/conditional.py).
+# The count catches deletes, which leave no newer updated_at behind, and the
+# max catches creates and edits; both come from one aggregate query. There is
+# no Last-Modified since a delete could not move it forward.
+
+
+def _version(aggregate):
+    if not aggregate['count']:
+        return None
+    return f'{aggregate["count"]}:{aggregate["last_updated"].isoformat()}', None
+
+
+def expense_list_version(queryset):
+    return _version(queryset.aggregate(count=Count('id'), last_updated=Max('updated_at')))
+
+
+async def aexpense_list_version(queryset):
+    return _version(await queryset.aaggregate(count=Count('id'), last_updated=Max('updated_at')))
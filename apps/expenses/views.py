@@ -1,13 +1,25 @@
 from rest_framework.views import APIView
 from rest_framework import generics, permissions, status
 from rest_framework.response import Response
+from rest_framework.exceptions import NotFound
+from fittus.async_support import streaming_response
+from fittus.conditional import conditional
+from fittus.idempotency import idempotent
+from ..groups.models import GroupMember
+from .models import Expense
+from .export import csv_lines, export_records, jsonl_lines
+from .importer import ExpenseImporter
+from .pagination import KeysetPagination
+from .parsers import CSVParser, JSONLinesParser
 from .serializers import ExpenseCreateSerializer, ExpenseReadSerializer
+from .versions import expense_list_version
 
 
 class ExpenseCreateView(generics.CreateAPIView):
     permission_classes = [permissions.IsAuthenticated]
     serializer_class = ExpenseCreateSerializer
 
+    @idempotent
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(
             data=request.data,
@@ -16,6 +28,77 @@ class ExpenseCreateView(generics.CreateAPIView):
         serializer.is_valid(raise_exception=True)
         expense = serializer.save()
 
-        read_serializer = ExpenseReadSerializer(expense)
+        read_serializer = ExpenseReadSerializer(expense, context={'splits': {expense.id: serializer.created_splits}})
 
-        return Response(read_serializer.data, status=status.HTTP_201_CREATED)
\ No newline at end of file
+        return Response(read_serializer.data, status=status.HTTP_201_CREATED)
+
+class ExpenseBulkImportView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+    parser_classes = [JSONLinesParser, CSVParser]
+
+    def post(self, request):
+        report = ExpenseImporter(request.user).run(request.data)
+
+        return Response(report, status=status.HTTP_200_OK)
+
+class GroupExpenseListView(generics.ListAPIView):
+    permission_classes = [permissions.IsAuthenticated]
+    serializer_class = ExpenseReadSerializer
+    pagination_class = KeysetPagination
+
+    def get_queryset(self):
+        group_id = self.kwargs['group_id']
+
+        if not GroupMember.objects.filter(group_id=group_id, user=self.request.user).exists():
+            raise NotFound('Group not found.')
+
+        return Expense.objects.filter(group_id=group_id).prefetch_related('splits')
+
+    # Joined through the caller's membership, so a non-member gets no version
+    # and falls through to the 404 above.
+    @conditional(lambda view, request, group_id: expense_list_version(
+        Expense.objects.filter(group_id=group_id, group__members__user=request.user)
+    ))
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
+class MyExpenseListView(generics.ListAPIView):
+    permission_classes = [permissions.IsAuthenticated]
+    serializer_class = ExpenseReadSerializer
+    pagination_class = KeysetPagination
+
+    def get_queryset(self):
+        # Payers are always part of the splits, so this covers paid expenses too.
+        return Expense.objects.filter(splits__user=self.request.user).prefetch_related('splits')
+
+    @conditional(lambda view, request: expense_list_version(Expense.objects.filter(splits__user=request.user)))
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
+class GroupExpenseExportView(APIView):
+    """
+    Stream a group's whole expense history as JSON lines (default) or CSV
+    (?type=csv). Each record carries a cursor; pass the last one received
+    as ?cursor= to resume an interrupted download.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    formats = {
+        'jsonl': (jsonl_lines, 'application/x-ndjson'),
+        'csv': (csv_lines, 'text/csv'),
+    }
+
+    def get(self, request, group_id):
+        export_type = request.query_params.get('type', 'jsonl')
+
+        if export_type not in self.formats:
+            return Response({'error': 'type must be jsonl or csv.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        if not GroupMember.objects.filter(group_id=group_id, user=request.user).exists():
+            raise NotFound('Group not found.')
+
+        encode, content_type = self.formats[export_type]
+        records = export_records(Expense.objects.filter(group_id=group_id), request.query_params.get('cursor'))
+
+        response = streaming_response(request._request, encode(records), content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="group-{group_id}-expenses.{export_type}"'
+        return response
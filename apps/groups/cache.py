@@ -0,0 +1,15 @@
+from fittus.versions import acache_version, bump_cache_version, cache_version
+
+VERSION_KEY = 'groups:{group_id}:version'
+
+
+def group_version(group_id):
+    return cache_version(VERSION_KEY.format(group_id=group_id))
+
+
+def bump_group_version(group_id):
+    return bump_cache_version(VERSION_KEY.format(group_id=group_id))
+
+
+async def agroup_version(group_id):
+    return await acache_version(VERSION_KEY.format(group_id=group_id))
@@ -0,0 +1,74 @@
+import time
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory, force_authenticate
+from ...models import Group, GroupMember
+from ...views import AddMembersView
+from ....users.models import User, Friendship
+from ....users.cache import FRIENDS_KEY
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark AddMembersView for growing member_ids lists, on_commit callbacks included. '
+        'All data is rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[10, 100, 1000, 10000])
+        parser.add_argument('--repeat', type=int, default=3)
+
+    def handle(self, *args, **options):
+        self.stdout.write(f'{"members":>8} {"best ms":>10} {"queries":>8} {"added":>8}')
+
+        for size in options['sizes']:
+            try:
+                with transaction.atomic():
+                    best, queries, added = self._run(size, options['repeat'])
+                    raise Rollback
+            except Rollback:
+                pass
+
+            self.stdout.write(f'{size:>8} {best * 1000:>10.1f} {queries:>8} {added:>8}')
+
+    def _run(self, size, repeat):
+        admin = User.objects.create(email=f'bench-admin-{size}@example.com')
+        friends = User.objects.bulk_create([
+            User(email=f'bench-{size}-{i}@example.com') for i in range(size)
+        ])
+        Friendship.objects.bulk_create([
+            Friendship(from_user=admin, to_user=friend, status=Friendship.STATUS_ACCEPTED)
+            for friend in friends
+        ])
+        member_ids = [friend.id for friend in friends]
+        # Friendships were inserted directly, so make sure no stale set is cached.
+        cache.delete(FRIENDS_KEY.format(user_id=admin.id))
+
+        factory = APIRequestFactory()
+        view = AddMembersView.as_view()
+        best = None
+
+        for _ in range(repeat):
+            group = Group.objects.create(name='bench', group_type=Group.TYPE_TRIP, created_by=admin)
+            GroupMember.objects.create(group=group, user=admin, role=GroupMember.ROLE_ADMIN)
+
+            request = factory.post(f'/groups/add-members/{group.id}/', {'member_ids': member_ids}, format='json')
+            force_authenticate(request, user=admin)
+
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                # Everything is rolled back, so run the on_commit work here.
+                with TestCase.captureOnCommitCallbacks(execute=True):
+                    response = view(request, group_id=group.id)
+                elapsed = time.perf_counter() - started
+
+            best = elapsed if best is None else min(best, elapsed)
+
+        return best, len(captured.captured_queries), len(response.data['added'])
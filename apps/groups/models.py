@@ -1,5 +1,5 @@
 from django.db import models
-from ..users.models import User
+from ..users.models import Currency, User
 
 
 class Group(models.Model):
@@ -18,6 +18,7 @@ class Group(models.Model):
     name = models.CharField(max_length=100)
     group_type = models.CharField(max_length=10, choices=TYPE_CHOICES)
     created_by = models.ForeignKey(User, related_name='groups_created', on_delete=models.CASCADE)
+    currency = models.ForeignKey(Currency, related_name='+', on_delete=models.SET_NULL, null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -1,16 +1,21 @@
 from rest_framework import serializers
 from .models import Group, GroupMember
-from ..users.serializers import UserRegistrationSerializer
+from ..users.serializers import CurrencyCodeField, UserRegistrationSerializer
 
 class GroupSerializer(serializers.ModelSerializer):
     created_by = UserRegistrationSerializer(read_only=True)
+    currency = CurrencyCodeField(required=False, allow_null=True)
 
     class Meta:
         model = Group
-        fields = ['id', 'name', 'group_type', 'created_by', 'created_at', 'updated_at']
+        fields = ['id', 'name', 'group_type', 'currency', 'created_by', 'created_at', 'updated_at']
 
     def create(self, validated_data):
         user = self.context['request'].user
         group = Group.objects.create(created_by=user, **validated_data)
         GroupMember.objects.create(group=group, user=user, role=GroupMember.ROLE_ADMIN)
-        return group
\ No newline at end of file
+        return group
+
+
+class AddMembersSerializer(serializers.Serializer):
+    member_ids = serializers.ListField(child=serializers.IntegerField(), allow_empty=False)
@@ -1,3 +1,99 @@
-from django.test import TestCase
+from datetime import timedelta
+from django.core.cache import cache
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from ..users.models import Friendship, IdempotencyKey, User
+from .models import Group, GroupMember
 
-# Create your tests here.
+
+class AddMembersViewTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create(email='admin@example.com')
+        self.friend = User.objects.create(email='friend@example.com')
+        self.stranger = User.objects.create(email='stranger@example.com')
+        Friendship.objects.create(from_user=self.admin, to_user=self.friend, status=Friendship.STATUS_ACCEPTED)
+
+        self.group = Group.objects.create(name='Flat', group_type=Group.TYPE_HOME, created_by=self.admin)
+        GroupMember.objects.create(group=self.group, user=self.admin, role=GroupMember.ROLE_ADMIN)
+
+        self.client.force_authenticate(self.admin)
+        self.url = reverse('add-members', args=[self.group.id])
+
+    def test_rejects_ids_that_are_not_integers(self):
+        for member_ids in ([[self.friend.id]], [{'id': self.friend.id}], [], 'x'):
+            response = self.client.post(self.url, {'member_ids': member_ids}, format='json')
+
+            self.assertEqual(response.status_code, 400)
+
+    def test_reports_what_was_inserted(self):
+        missing_id = self.stranger.id + 100
+        member_ids = [self.friend.id, self.stranger.id, missing_id, self.friend.id]
+
+        response = self.client.post(self.url, {'member_ids': member_ids}, format='json')
+
+        self.assertEqual(response.data['added'], [self.friend.id])
+        self.assertEqual(response.data['not_friends'], [self.stranger.id])
+        self.assertEqual(response.data['not_found'], [missing_id])
+        self.assertTrue(GroupMember.objects.filter(group=self.group, user=self.friend).exists())
+
+        response = self.client.post(self.url, {'member_ids': [self.friend.id]}, format='json')
+
+        self.assertEqual(response.data['added'], [])
+        self.assertEqual(response.data['already_members'], [self.friend.id])
+
+
+class IdempotentCreateTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create(email='admin@example.com')
+        self.client.force_authenticate(self.user)
+        self.url = reverse('group-create')
+        self.data = {'name': 'Flat', 'group_type': Group.TYPE_HOME}
+
+    def _post(self, data, key='key-1'):
+        return self.client.post(self.url, data, format='json', HTTP_IDEMPOTENCY_KEY=key)
+
+    def test_retry_replays_the_first_response(self):
+        first = self._post(self.data)
+        retry = self._post(self.data)
+
+        self.assertEqual(first.status_code, 201, first.data)
+        self.assertEqual(retry.status_code, 201)
+        self.assertEqual(retry.data, first.data)
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(Group.objects.count(), 1)
+
+    def test_key_reused_for_another_request_is_rejected(self):
+        self._post(self.data)
+
+        response = self._post({**self.data, 'name': 'Trip'})
+
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(Group.objects.count(), 1)
+
+    def test_failed_request_leaves_the_key_free(self):
+        response = self._post({'name': 'Flat'})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(IdempotencyKey.objects.exists())
+        self.assertEqual(self._post(self.data).status_code, 201)
+
+    def test_keys_are_scoped_per_user(self):
+        self._post(self.data)
+        self.client.force_authenticate(User.objects.create(email='other@example.com'))
+
+        response = self._post(self.data)
+
+        self.assertNotIn('Idempotent-Replayed', response)
+        self.assertEqual(Group.objects.count(), 2)
+
+    def test_expired_key_runs_again(self):
+        self._post(self.data)
+        IdempotencyKey.objects.update(created_at=timezone.now() - timedelta(days=2))
+
+        response = self._post(self.data)
+
+        self.assertNotIn('Idempotent-Replayed', response)
+        self.assertEqual(Group.objects.count(), 2)
+        self.assertEqual(IdempotencyKey.objects.count(), 1)
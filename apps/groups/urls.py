@@ -1,7 +1,15 @@
 from django.urls import path
 from .views import GroupCreateView, AddMembersView
+from ..balances.views import GroupBalanceView, GroupSettlementView
+from ..expenses.views import GroupExpenseExportView, GroupExpenseListView
+from ..activity.views import GroupActivityView
 
 urlpatterns = [
     path('create/', GroupCreateView.as_view(), name='group-create'),
     path('add-members/<int:group_id>/', AddMembersView.as_view(), name='add-members'),
-]
\ No newline at end of file
+    path('<int:group_id>/expenses/', GroupExpenseListView.as_view(), name='group-expenses'),
+    path('<int:group_id>/expenses/export/', GroupExpenseExportView.as_view(), name='group-expenses-export'),
+    path('<int:group_id>/settlements/', GroupSettlementView.as_view(), name='group-settlements'),
+    path('<int:group_id>/balances/', GroupBalanceView.as_view(), name='group-balances'),
+    path('<int:group_id>/activity/', GroupActivityView.as_view(), name='group-activity'),
+]
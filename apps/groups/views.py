@@ -3,103 +3,99 @@ from django.db import transaction
 from rest_framework import status, permissions, generics
 from rest_framework.views import APIView
 from rest_framework.response import Response
+from fittus.idempotency import idempotent
 from .models import Group, GroupMember
-from ..users.models import User, Friendship
-from .serializers import GroupSerializer
+from ..users.models import User
+from ..users.cache import get_friend_ids
+from ..activity.feed import members_activity, publish
+from .serializers import AddMembersSerializer, GroupSerializer
+
+MEMBER_BATCH_SIZE = 1000
 
 
 class GroupCreateView(generics.CreateAPIView):
     permission_classes = [permissions.IsAuthenticated]
     serializer_class = GroupSerializer
 
+    @idempotent
+    def create(self, request, *args, **kwargs):
+        return super().create(request, *args, **kwargs)
+
 class AddMembersView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def post(self, request, group_id):
         user = request.user
-        member_ids = request.data.get("member_ids")
+        serializer = AddMembersSerializer(data=request.data)
 
-        if not isinstance(member_ids, list) or not member_ids:
+        if not serializer.is_valid():
             return Response(
-                {"error": "member_ids must be a non-empty list"},
+                {"error": "member_ids must be a non-empty list of user ids"},
                 status=status.HTTP_400_BAD_REQUEST
             )
-        
-        group = Group.objects.filter(id=group_id).first()
-        if not group:
-            return Response(
-                {"error": "Group not found"},
-                status=status.HTTP_404_NOT_FOUND
-            )
-        
-        is_admin = GroupMember.objects.filter(
-            group=group,
-            user=user,
-            role=GroupMember.ROLE_ADMIN
-        ).exists()
-
-        if not is_admin:
-            return Response(
-                {"error": "Only group admins can add members"},
-                status=status.HTTP_403_FORBIDDEN
-            )
-        
-        existing_member_ids = set(
-            GroupMember.objects.filter(group=group)
-            .values_list("user_id", flat=True)
-        )
 
-        friend_ids = set(
-            Friendship.objects.filter(
-                status=Friendship.STATUS_ACCEPTED
-            ).filter(
-                from_user=user
-            ).values_list("to_user__id", flat=True)
-        ) | set(
-            Friendship.objects.filter(
-                status=Friendship.STATUS_ACCEPTED
-            ).filter(
-                to_user=user
-            ).values_list("from_user__id", flat=True)
-        )
+        member_ids = serializer.validated_data["member_ids"]
+
+        with transaction.atomic():
+            # Locking the group serializes concurrent adds to it, so the
+            # memberships read below are still current when the new ones are
+            # inserted and "added" is exactly what this request inserted.
+            group = Group.objects.select_for_update().filter(id=group_id).first()
+            if not group:
+                return Response(
+                    {"error": "Group not found"},
+                    status=status.HTTP_404_NOT_FOUND
+                )
 
-        added = []
-        already_members = []
-        not_friends = []
-        not_found = []
+            is_admin = GroupMember.objects.filter(
+                group=group,
+                user=user,
+                role=GroupMember.ROLE_ADMIN
+            ).exists()
 
-        users_map = {
-            u.id: u for u in User.objects.filter(id__in=member_ids)
-        }
+            if not is_admin:
+                return Response(
+                    {"error": "Only group admins can add members"},
+                    status=status.HTTP_403_FORBIDDEN
+                )
 
-        with transaction.atomic():
-            for member_id in member_ids:
+            requested_ids = [
+                member_id for member_id in dict.fromkeys(member_ids)
+                if member_id != user.id
+            ]
 
-                if member_id == user.id:
-                    continue
+            found_ids = set(
+                User.objects.filter(id__in=requested_ids)
+                .values_list("id", flat=True)
+            )
 
-                member = users_map.get(member_id)
+            existing_member_ids = set(
+                GroupMember.objects.filter(group=group, user_id__in=found_ids)
+                .values_list("user_id", flat=True)
+            )
 
-                if not member:
-                    not_found.append(member_id)
-                    continue
+            friend_ids = get_friend_ids(user.id)
 
-                if member_id in existing_member_ids:
-                    already_members.append(member_id)
-                    continue
+            candidate_ids = found_ids - existing_member_ids
+            addable_ids = candidate_ids & friend_ids
+            not_friend_ids = candidate_ids - addable_ids
 
-                if member_id not in friend_ids:
-                    not_friends.append(member_id)
-                    continue
+            not_found = [member_id for member_id in requested_ids if member_id not in found_ids]
+            already_members = [member_id for member_id in requested_ids if member_id in existing_member_ids]
+            not_friends = [member_id for member_id in requested_ids if member_id in not_friend_ids]
+            added = [member_id for member_id in requested_ids if member_id in addable_ids]
 
-                GroupMember.objects.create(
-                    group=group,
-                    user=member,
-                    role=GroupMember.ROLE_MEMBER
-                )
-                added.append(member_id)
+            GroupMember.objects.bulk_create(
+                [
+                    GroupMember(group=group, user_id=member_id, role=GroupMember.ROLE_MEMBER)
+                    for member_id in added
+                ],
+                batch_size=MEMBER_BATCH_SIZE
+            )
+
+            if added:
+                publish([members_activity(group.id, user.id, added)])
 
-        
         return Response(
             {
                 "added": added,
@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+from django.utils.module_loading import autodiscover_modules
+
+
+class TasksConfig(AppConfig):
+    name = 'apps.tasks'
+
+    def ready(self):
+        # Registers the handlers declared in each app's tasks.py.
+        autodiscover_modules('tasks')
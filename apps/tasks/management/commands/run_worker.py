@@ -0,0 +1,108 @@
+import multiprocessing
+import signal
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+from fittus.checks import cache_is_shared
+from ...queue import claim, execute, prune
+
+PRUNE_INTERVAL = 60 * 10
+
+
+class Command(BaseCommand):
+    help = (
+        'Run queued tasks on a thread or process pool. Tasks are claimed in batches with '
+        'SELECT ... FOR UPDATE SKIP LOCKED, so several workers can share the queue. A task '
+        'still running after --lease seconds is assumed lost and claimed again, so handlers '
+        'must be idempotent.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pool', choices=['thread', 'process'], default='thread')
+        parser.add_argument('--concurrency', type=int, default=4)
+        parser.add_argument('--batch-size', type=int, default=20, help='Most tasks claimed per query.')
+        parser.add_argument('--poll-interval', type=float, default=1.0, help='Seconds to sleep when the queue is empty.')
+        parser.add_argument('--lease', type=int, default=300)
+        parser.add_argument('--keep-done', type=int, default=60 * 60 * 24, help='Seconds to keep finished tasks for metrics.')
+        parser.add_argument('--once', action='store_true', help='Exit once the queue is drained.')
+
+    def handle(self, *args, **options):
+        # Some handlers warm the cache for web processes; into a cache local
+        # to this process that work is lost, but the rest still has to run.
+        if not cache_is_shared():
+            self.stderr.write(self.style.WARNING(
+                f"The default cache ({settings.CACHES['default']['BACKEND']}) is local to each process, "
+                'so cache warming done by tasks will not reach the web processes. Set CACHE_BACKEND '
+                'and CACHE_LOCATION to a cache shared with them.'
+            ))
+
+        self.stopping = False
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+
+        concurrency = options['concurrency']
+
+        if options['pool'] == 'process':
+            # Spawned children set Django up themselves and open their own
+            # connections instead of inheriting this process's sockets.
+            connections.close_all()
+            executor = ProcessPoolExecutor(
+                concurrency,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=django.setup
+            )
+        else:
+            executor = ThreadPoolExecutor(concurrency, thread_name_prefix='task')
+
+        self.stdout.write(f'Worker started: {concurrency} {options["pool"]}(s).')
+
+        in_flight = set()
+        succeeded = failed = 0
+        pruned_at = 0
+
+        with executor:
+            while not self.stopping:
+                # Claim only what the pool can start soon, leaving the rest to other workers.
+                capacity = concurrency * 2 - len(in_flight)
+                claimed = claim(min(options['batch_size'], capacity), options['lease']) if capacity > 0 else []
+
+                for task in claimed:
+                    in_flight.add(executor.submit(
+                        execute, task.id, task.name, task.payload, task.attempts, task.max_attempts
+                    ))
+
+                if in_flight and (not claimed or len(in_flight) >= concurrency * 2):
+                    done, in_flight = wait(in_flight, timeout=options['poll_interval'], return_when=FIRST_COMPLETED)
+                else:
+                    done = {future for future in in_flight if future.done()}
+                    in_flight -= done
+
+                for future in done:
+                    if future.result():
+                        succeeded += 1
+                    else:
+                        failed += 1
+
+                if time.monotonic() - pruned_at > PRUNE_INTERVAL:
+                    prune(options['keep_done'])
+                    pruned_at = time.monotonic()
+
+                if not claimed and not in_flight:
+                    if options['once']:
+                        break
+                    time.sleep(options['poll_interval'])
+
+            for future in in_flight:
+                if future.result():
+                    succeeded += 1
+                else:
+                    failed += 1
+
+        self.stdout.write(f'Worker stopped: {succeeded} succeeded, {failed} failed.')
+
+    def _stop(self, signum, frame):
+        # Finish the tasks already running, then exit.
+        self.stopping = True
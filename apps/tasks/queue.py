@@ -0,0 +1,177 @@
+import logging
+import math
+import random
+import traceback
+from datetime import timedelta
+from django.db import close_old_connections, transaction
+from django.db.models import Count, F, Min, Q
+from django.utils import timezone
+from .models import Task
+
+logger = logging.getLogger(__name__)
+
+handlers = {}
+
+# Retry delays double per attempt up to the cap, with jitter so a batch that
+# failed together does not retry in lockstep.
+BACKOFF_BASE = 2
+BACKOFF_MAX = 60 * 60
+
+METRICS_WINDOW = 15 * 60
+METRICS_SAMPLES = 10000
+
+
+def task(name):
+    """Register a handler, called as handler(**payload) by the worker."""
+
+    def register(handler):
+        handlers[name] = handler
+        return handler
+
+    return register
+
+
+def enqueue(name, payload=None, delay=0, max_attempts=5):
+    enqueue_many(name, [payload or {}], delay, max_attempts)
+
+
+def enqueue_many(name, payloads, delay=0, max_attempts=5):
+    """
+    Queue one task per payload once the current transaction commits, so a
+    worker never picks up work for rows that were rolled back. All payloads
+    are inserted with a single bulk_create.
+    """
+    if name not in handlers:
+        raise ValueError(f'Unknown task "{name}".')
+
+    run_at = timezone.now() + timedelta(seconds=delay)
+    tasks = [Task(name=name, payload=payload, run_at=run_at, max_attempts=max_attempts) for payload in payloads]
+
+    if tasks:
+        transaction.on_commit(lambda: Task.objects.bulk_create(tasks))
+
+
+def claim(batch_size, lease):
+    """
+    Mark up to batch_size due tasks as running and return them. SKIP LOCKED
+    lets any number of workers claim concurrently without blocking on, or
+    double-claiming, each other's rows. Running tasks whose lease expired
+    (their worker died) are claimed again while they have attempts left, and
+    failed once they have none, so a task that keeps killing its worker stops.
+    """
+    now = timezone.now()
+    expired = Q(status=Task.STATUS_RUNNING, started_at__lt=now - timedelta(seconds=lease))
+
+    with transaction.atomic():
+        Task.objects.filter(expired, attempts__gte=F('max_attempts')).update(
+            status=Task.STATUS_FAILED,
+            finished_at=now,
+            last_error='Lease expired on the last attempt; the worker running it was lost.'
+        )
+
+        tasks = list(
+            Task.objects
+            .select_for_update(skip_locked=True)
+            .filter(
+                Q(status=Task.STATUS_PENDING, run_at__lte=now) |
+                (expired & Q(attempts__lt=F('max_attempts')))
+            )
+            .order_by('run_at')
+            .only('id', 'name', 'payload', 'attempts', 'max_attempts')[:batch_size]
+        )
+
+        if tasks:
+            Task.objects.filter(id__in=[claimed.id for claimed in tasks]).update(
+                status=Task.STATUS_RUNNING,
+                started_at=now,
+                attempts=F('attempts') + 1
+            )
+
+    for claimed in tasks:
+        claimed.attempts += 1
+
+    return tasks
+
+
+def backoff(attempts):
+    delay = min(BACKOFF_BASE ** attempts, BACKOFF_MAX)
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+def execute(task_id, name, payload, attempts, max_attempts):
+    """Run one claimed task and record its outcome. Safe to call from pool threads or processes."""
+    close_old_connections()
+
+    try:
+        handler = handlers.get(name)
+
+        if handler is None:
+            raise LookupError(f'No handler registered for task "{name}".')
+
+        handler(**payload)
+    except Exception:
+        error = traceback.format_exc()
+        retry = attempts < max_attempts
+
+        logger.warning('Task %s (%s) failed on attempt %s/%s.', task_id, name, attempts, max_attempts, exc_info=True)
+
+        Task.objects.filter(id=task_id).update(
+            status=Task.STATUS_PENDING if retry else Task.STATUS_FAILED,
+            run_at=timezone.now() + timedelta(seconds=backoff(attempts)) if retry else F('run_at'),
+            finished_at=None if retry else timezone.now(),
+            last_error=error
+        )
+        return False
+    else:
+        Task.objects.filter(id=task_id).update(status=Task.STATUS_DONE, finished_at=timezone.now())
+        return True
+    finally:
+        close_old_connections()
+
+
+def prune(older_than):
+    """Delete finished tasks older than `older_than` seconds; failed ones are kept for inspection."""
+    cutoff = timezone.now() - timedelta(seconds=older_than)
+    deleted, _ = Task.objects.filter(status=Task.STATUS_DONE, finished_at__lt=cutoff).delete()
+    return deleted
+
+
+def _percentile(ordered, pct):
+    if not ordered:
+        return None
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+def metrics(window=METRICS_WINDOW):
+    """Queue depth per status and latency percentiles of tasks finished within `window` seconds."""
+    now = timezone.now()
+
+    depth = {status: 0 for status in (Task.STATUS_PENDING, Task.STATUS_RUNNING, Task.STATUS_FAILED)}
+    depth.update(
+        Task.objects.filter(status__in=depth.keys())
+        .values_list('status')
+        .annotate(count=Count('id'))
+        .order_by()
+    )
+
+    oldest_due = Task.objects.filter(status=Task.STATUS_PENDING, run_at__lte=now).aggregate(oldest=Min('run_at'))['oldest']
+
+    finished = list(
+        Task.objects
+        .filter(status=Task.STATUS_DONE, finished_at__gte=now - timedelta(seconds=window))
+        .order_by('-finished_at')
+        .values_list('created_at', 'started_at', 'finished_at')[:METRICS_SAMPLES]
+    )
+
+    # Total latency runs from enqueue to completion; run time is the last attempt only.
+    latencies = sorted((finished_at - created_at).total_seconds() * 1000 for created_at, _, finished_at in finished)
+    run_times = sorted((finished_at - started_at).total_seconds() * 1000 for _, started_at, finished_at in finished)
+
+    return {
+        'depth': depth,
+        'oldest_due_seconds': (now - oldest_due).total_seconds() if oldest_due else 0,
+        'window_seconds': window,
+        'finished': len(latencies),
+        'latency_ms': {f'p{pct}': _percentile(latencies, pct) for pct in (50, 95, 99)},
+        'run_time_ms': {f'p{pct}': _percentile(run_times, pct) for pct in (50, 95, 99)},
+    }
@@ -0,0 +1,140 @@
+import threading
+from datetime import timedelta
+from io import StringIO
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase, override_settings, skipUnlessDBFeature
+from django.utils import timezone
+from .models import Task
+from .queue import claim, enqueue, execute, task
+
+calls = []
+
+
+@task('tasks.test_record')
+def record(value):
+    calls.append(value)
+
+
+@task('tasks.test_fail')
+def fail():
+    raise RuntimeError('boom')
+
+
+class ClaimTests(TestCase):
+    def _task(self, **kwargs):
+        return Task.objects.create(name='tasks.test_record', payload={'value': 1}, **kwargs)
+
+    def test_claims_due_tasks_once(self):
+        due = self._task()
+        self._task(run_at=timezone.now() + timedelta(hours=1))
+
+        claimed = claim(10, lease=300)
+
+        self.assertEqual([claimed_task.id for claimed_task in claimed], [due.id])
+        self.assertEqual(claimed[0].attempts, 1)
+        due.refresh_from_db()
+        self.assertEqual(due.status, Task.STATUS_RUNNING)
+        self.assertEqual(claim(10, lease=300), [])
+
+    def test_batch_size_limits_the_claim(self):
+        for _ in range(3):
+            self._task()
+
+        self.assertEqual(len(claim(2, lease=300)), 2)
+        self.assertEqual(len(claim(2, lease=300)), 1)
+
+    def test_expired_lease_is_claimed_again(self):
+        lost = self._task()
+        claim(10, lease=300)
+        Task.objects.filter(id=lost.id).update(started_at=timezone.now() - timedelta(seconds=301))
+
+        claimed = claim(10, lease=300)
+
+        self.assertEqual([claimed_task.id for claimed_task in claimed], [lost.id])
+        self.assertEqual(claimed[0].attempts, 2)
+
+    def test_expired_lease_on_the_last_attempt_fails_the_task(self):
+        lost = self._task(max_attempts=1)
+        claim(10, lease=300)
+        Task.objects.filter(id=lost.id).update(started_at=timezone.now() - timedelta(seconds=301))
+
+        self.assertEqual(claim(10, lease=300), [])
+
+        lost.refresh_from_db()
+        self.assertEqual(lost.status, Task.STATUS_FAILED)
+        self.assertEqual(lost.attempts, 1)
+        self.assertIsNotNone(lost.finished_at)
+
+    def test_enqueue_waits_for_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            enqueue('tasks.test_record', {'value': 2})
+            self.assertFalse(Task.objects.exists())
+
+        self.assertEqual(Task.objects.get().payload, {'value': 2})
+
+
+class ExecuteTests(TestCase):
+    def _run(self, name, payload=None, max_attempts=3):
+        Task.objects.create(name=name, payload=payload or {}, max_attempts=max_attempts)
+        claimed, = claim(1, lease=300)
+        execute(claimed.id, claimed.name, claimed.payload, claimed.attempts, claimed.max_attempts)
+        return Task.objects.get(id=claimed.id)
+
+    def test_success_marks_the_task_done(self):
+        calls.clear()
+
+        finished = self._run('tasks.test_record', {'value': 3})
+
+        self.assertEqual(calls, [3])
+        self.assertEqual(finished.status, Task.STATUS_DONE)
+        self.assertIsNotNone(finished.finished_at)
+
+    def test_failure_is_retried_later(self):
+        with self.assertLogs('apps.tasks.queue', 'WARNING'):
+            finished = self._run('tasks.test_fail')
+
+        self.assertEqual(finished.status, Task.STATUS_PENDING)
+        self.assertGreater(finished.run_at, timezone.now())
+        self.assertIn('boom', finished.last_error)
+        self.assertEqual(claim(1, lease=300), [])
+
+    def test_last_attempt_fails_the_task(self):
+        with self.assertLogs('apps.tasks.queue', 'WARNING'):
+            finished = self._run('tasks.test_fail', max_attempts=1)
+
+        self.assertEqual(finished.status, Task.STATUS_FAILED)
+        self.assertIsNotNone(finished.finished_at)
+
+
+@skipUnlessDBFeature('has_select_for_update_skip_locked')
+class SkipLockedClaimTests(TransactionTestCase):
+    def test_rows_locked_by_another_worker_are_skipped(self):
+        locked, free = [Task.objects.create(name='tasks.test_record', payload={'value': 1}) for _ in range(2)]
+        claimed = []
+
+        def other_worker():
+            try:
+                claimed.extend(claim(10, lease=300))
+            finally:
+                connection.close()
+
+        with transaction.atomic():
+            Task.objects.select_for_update().get(id=locked.id)
+
+            worker = threading.Thread(target=other_worker)
+            worker.start()
+            worker.join(timeout=10)
+
+        self.assertEqual([claimed_task.id for claimed_task in claimed], [free.id])
+
+
+class RunWorkerTests(TestCase):
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_runs_with_a_process_local_cache(self):
+        stdout, stderr = StringIO(), StringIO()
+
+        call_command('run_worker', '--once', stdout=stdout, stderr=stderr)
+
+        self.assertIn('local to each process', stderr.getvalue())
+        self.assertIn('Worker stopped', stdout.getvalue())
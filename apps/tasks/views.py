@@ -0,0 +1,16 @@
+from rest_framework import permissions, status
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from .queue import METRICS_WINDOW, metrics
+
+
+class TaskMetricsView(APIView):
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        try:
+            window = int(request.query_params.get('window', METRICS_WINDOW))
+        except ValueError:
+            return Response({"error": "window must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(metrics(max(window, 1)), status=status.HTTP_200_OK)
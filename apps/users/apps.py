@@ -3,3 +3,7 @@ from django.apps import AppConfig
 
 class UserConfig(AppConfig):
     name = 'apps.users'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from fittus import checks  # noqa: F401
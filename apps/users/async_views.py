@@ -0,0 +1,48 @@
+import json
+from django.views.decorators.http import require_GET, require_POST
+from rest_framework import status
+from fittus.async_support import async_authenticated, json_response
+from .currencies import currencies
+from .models import User, Friendship
+from .serializers import FriendshipSerializer, UserLookupSerializer
+
+
+@require_GET
+@async_authenticated
+async def friend_request_list(request):
+    friendships = [
+        friendship async for friendship in Friendship.objects.filter(
+            to_user_id=request.user.id,
+            status=Friendship.STATUS_PENDING
+        ).select_related('from_user', 'to_user')
+    ]
+
+    # Currency codes are serialized from the registry, which must not query
+    # synchronously from here.
+    await currencies.asnapshot()
+
+    return json_response(FriendshipSerializer(friendships, many=True).data)
+
+
+@require_POST
+@async_authenticated
+async def user_lookup(request):
+    try:
+        data = json.loads(request.body or b'{}')
+    except ValueError:
+        return json_response({'detail': 'JSON parse error.'}, status=status.HTTP_400_BAD_REQUEST)
+
+    email = data.get('email') if isinstance(data, dict) else None
+
+    if not email:
+        return json_response({'error': 'Email is required.'}, status=status.HTTP_400_BAD_REQUEST)
+
+    user = await User.objects.only("id", "first_name", "last_name").filter(email=email).afirst()
+
+    if not user or user.id == request.user.id:
+        return json_response({"exists": False})
+
+    return json_response({
+        "exists": True,
+        "user": UserLookupSerializer(user).data
+    })
@@ -0,0 +1,118 @@
+import time
+from collections import OrderedDict
+from threading import Lock
+from django.conf import settings
+from django.db import router
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from .models import User
+
+# Loaded together with is_active and cached with it, so most authenticated
+# requests need no User query. Tokens carry only the user id: profile data
+# in a JWT is readable by anyone holding it and stale until it expires.
+CACHED_FIELDS = ('is_active', 'email', 'first_name', 'last_name', 'mobile_no', 'default_currency_id')
+
+
+class ActiveUserCache:
+    """Short-lived, bounded, per-process cache of CACHED_FIELDS by user id."""
+
+    def __init__(self, ttl, max_size=10000):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    def _cached(self, user_id):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry and entry[1] > time.monotonic():
+                self._entries.move_to_end(user_id)
+                return entry
+        return None
+
+    def _store(self, user_id, values):
+        with self._lock:
+            self._entries[user_id] = (values, time.monotonic() + self.ttl)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+        return values
+
+    def _query(self, user_id):
+        return User.objects.filter(pk=user_id).values_list(*CACHED_FIELDS)
+
+    def get(self, user_id):
+        """CACHED_FIELDS values for user_id, or None if there is no such user."""
+        entry = self._cached(user_id)
+        if entry:
+            return entry[0]
+
+        return self._store(user_id, self._query(user_id).first())
+
+    async def aget(self, user_id):
+        entry = self._cached(user_id)
+        if entry:
+            return entry[0]
+
+        return self._store(user_id, await self._query(user_id).afirst())
+
+    def evict(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+
+active_users = ActiveUserCache(settings.AUTH_USER_CACHE_TTL)
+
+
+def cached_user(user_id, values):
+    """
+    A User built from ActiveUserCache values without a query. Other fields
+    are deferred, so Django loads them only if a view reads them.
+    """
+    fields = {'id': user_id, **dict(zip(CACHED_FIELDS, values))}
+
+    # from_db() matches values to fields positionally, in model field order.
+    field_names = [field.attname for field in User._meta.concrete_fields if field.attname in fields]
+
+    return User.from_db(router.db_for_read(User), field_names, [fields[name] for name in field_names])
+
+
+class CachedUserJWTAuthentication(JWTAuthentication):
+    def _user_id(self, validated_token):
+        try:
+            return int(validated_token[api_settings.USER_ID_CLAIM])
+        except (KeyError, TypeError, ValueError) as e:
+            raise InvalidToken('Token contained no recognizable user identification') from e
+
+    def _user(self, user_id, values):
+        if values is None:
+            raise AuthenticationFailed('User not found', code='user_not_found')
+
+        user = cached_user(user_id, values)
+
+        if not user.is_active:
+            raise AuthenticationFailed('User is inactive', code='user_inactive')
+
+        return user
+
+    def get_user(self, validated_token):
+        user_id = self._user_id(validated_token)
+        return self._user(user_id, active_users.get(user_id))
+
+    async def aget_user(self, validated_token):
+        user_id = self._user_id(validated_token)
+        return self._user(user_id, await active_users.aget(user_id))
+
+    async def aauthenticate(self, request):
+        """Async counterpart of authenticate() for plain Django async views."""
+        header = self.get_header(request)
+        if header is None:
+            return None
+
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        return await self.aget_user(self.get_validated_token(raw_token))
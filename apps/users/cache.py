@@ -0,0 +1,64 @@
+from django.core.cache import cache
+from django.db import transaction
+from ..tasks.queue import enqueue
+from .friendships import friends_of
+from .models import Friendship
+
+FRIENDS_KEY = 'users:{user_id}:friends'
+FRIENDS_TIMEOUT = 60 * 60
+
+
+def _load_friend_ids(user_ids):
+    friend_ids = {user_id: set() for user_id in user_ids}
+
+    edges = friends_of(user_ids).values_list('from_user_id', 'to_user_id')
+
+    for from_user_id, to_user_id in edges:
+        if from_user_id in friend_ids:
+            friend_ids[from_user_id].add(to_user_id)
+        if to_user_id in friend_ids:
+            friend_ids[to_user_id].add(from_user_id)
+
+    return friend_ids
+
+
+def get_friend_ids_many(user_ids):
+    """Accepted friend ids for each user, loading all cache misses in one query."""
+    keys = {FRIENDS_KEY.format(user_id=user_id): user_id for user_id in set(user_ids)}
+    friend_ids = {keys[key]: value for key, value in cache.get_many(keys).items()}
+
+    missing = [user_id for user_id in keys.values() if user_id not in friend_ids]
+
+    if missing:
+        loaded = _load_friend_ids(missing)
+        cache.set_many(
+            {FRIENDS_KEY.format(user_id=user_id): ids for user_id, ids in loaded.items()},
+            FRIENDS_TIMEOUT
+        )
+        friend_ids.update(loaded)
+
+    return friend_ids
+
+
+def get_friend_ids(user_id):
+    return get_friend_ids_many([user_id])[user_id]
+
+
+def friendship_status_changed(friendship, previous_status):
+    """
+    Drop the cached friend sets of both users when a friendship enters or
+    leaves the accepted state. Other transitions (e.g. pending -> rejected)
+    leave every accepted set unchanged, so the cache is kept.
+    """
+    was_accepted = previous_status == Friendship.STATUS_ACCEPTED
+    is_accepted = friendship.status == Friendship.STATUS_ACCEPTED
+
+    if was_accepted == is_accepted:
+        return
+
+    keys = [
+        FRIENDS_KEY.format(user_id=friendship.from_user_id),
+        FRIENDS_KEY.format(user_id=friendship.to_user_id),
+    ]
+    transaction.on_commit(lambda: cache.delete_many(keys))
+    enqueue('users.refresh_friend_ids', {'user_ids': [friendship.from_user_id, friendship.to_user_id]})
@@ -0,0 +1,106 @@
+import re
+from django.db import transaction
+from django.db.models.functions import Lower
+from .models import User
+
+# Batch contact sync. Address-book entries are normalized the way they are
+# indexed (lower-cased email, digits-only phone) and resolved with a few
+# chunked IN queries instead of one request per contact.
+
+LOOKUP_CHUNK_SIZE = 1000
+MAX_CONTACTS = 10000
+BACKFILL_BATCH_SIZE = 1000
+
+NON_DIGITS = re.compile(r'\D')
+MIN_PHONE_DIGITS = 7
+
+
+def normalize_email(value):
+    value = value.strip().lower() if isinstance(value, str) else ''
+    return value if '@' in value else None
+
+
+def normalize_phone(value):
+    """Digits only, so '+91 98765-43210' and '919876543210' match the same user."""
+    digits = NON_DIGITS.sub('', value) if isinstance(value, str) else ''
+    return digits if len(digits) >= MIN_PHONE_DIGITS else None
+
+
+def normalized(values, normalize):
+    # Deduplicated in input order; unusable entries are dropped.
+    return list(dict.fromkeys(value for value in map(normalize, values) if value))
+
+
+def _chunks(values, size):
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def lookup_contacts(emails, phones, exclude_user_id, chunk_size=LOOKUP_CHUNK_SIZE):
+    """
+    Yield (field, value, user) for every normalized email or phone that
+    belongs to a user other than exclude_user_id, one query per chunk.
+    """
+    users = User.objects.exclude(id=exclude_user_id).only('id', 'first_name', 'last_name', 'email', 'mobile_no')
+
+    # Filtering on Lower('email') lets Postgres use user_email_lower_idx.
+    for chunk in _chunks(emails, chunk_size):
+        for user in users.annotate(email_lower=Lower('email')).filter(email_lower__in=chunk):
+            yield 'email', user.email_lower, user
+
+    for chunk in _chunks(phones, chunk_size):
+        for user in users.filter(mobile_no__in=chunk):
+            yield 'mobile_no', user.mobile_no, user
+
+
+def backfill_phones(batch_size=BACKFILL_BATCH_SIZE):
+    """
+    Rewrite mobile numbers stored before registration normalized them, so
+    lookups match those users too. A number that normalizes to nothing or
+    to another user's number is left alone and its user id reported.
+    Returns (updated, skipped_user_ids).
+    """
+    users = (
+        User.objects.filter(mobile_no__isnull=False)
+        .exclude(mobile_no__regex=r'^[0-9]+$')
+        .only('id', 'mobile_no')
+        .order_by('id')
+    )
+    updated = 0
+    skipped = []
+    last_id = 0
+
+    while True:
+        batch = list(users.filter(id__gt=last_id)[:batch_size])
+
+        if not batch:
+            return updated, skipped
+
+        last_id = batch[-1].id
+        phones = {user.id: normalize_phone(user.mobile_no) for user in batch}
+        taken = set(
+            User.objects.filter(mobile_no__in=set(filter(None, phones.values()))).values_list('mobile_no', flat=True)
+        )
+        changed = []
+
+        for user in batch:
+            phone = phones[user.id]
+
+            if phone is None and user.mobile_no.strip():
+                skipped.append(user.id)
+                continue
+
+            if phone in taken:
+                skipped.append(user.id)
+                continue
+
+            # Blank numbers become NULL, as registration stores them.
+            if phone:
+                taken.add(phone)
+            user.mobile_no = phone
+            changed.append(user)
+
+        with transaction.atomic():
+            User.objects.bulk_update(changed, ['mobile_no'])
+
+        updated += len(changed)
@@ -0,0 +1,111 @@
+import asyncio
+import time
+from threading import Lock
+from types import MappingProxyType
+from fittus.versions import acache_version, bump_cache_version, cache_version
+from .models import Currency
+
+VERSION_KEY = 'users:currencies:version'
+
+# Seconds a process trusts its snapshot before comparing it with the shared
+# version, which is how it notices currencies changed by other processes.
+CHECK_INTERVAL = 60
+
+
+def _in_event_loop():
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+class CurrencySnapshot:
+    def __init__(self, version, currencies):
+        self.version = version
+        self.by_id = MappingProxyType({currency.pk: currency for currency in currencies})
+        self.by_code = MappingProxyType({currency.code: currency for currency in currencies})
+        self.checked_at = time.monotonic()
+
+
+class CurrencyRegistry:
+    """
+    Per-process, read-only copy of the Currency table. Lookups never query
+    once a snapshot is loaded; a changed version replaces it wholesale.
+    """
+
+    def __init__(self, check_interval=CHECK_INTERVAL):
+        self.check_interval = check_interval
+        self._snapshot = None
+        self._lock = Lock()
+
+    def _current(self):
+        snapshot = self._snapshot
+        if snapshot and time.monotonic() - snapshot.checked_at < self.check_interval:
+            return snapshot
+        return None
+
+    def _revalidate(self, version):
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot and snapshot.version == version:
+                snapshot.checked_at = time.monotonic()
+                return snapshot
+        return None
+
+    def _store(self, version, currencies):
+        snapshot = CurrencySnapshot(version, currencies)
+        with self._lock:
+            self._snapshot = snapshot
+        return snapshot
+
+    def snapshot(self):
+        snapshot = self._current()
+        if snapshot:
+            return snapshot
+
+        # Async views load the snapshot up front with asnapshot(); one that
+        # expires mid-request is served as is rather than queried synchronously.
+        if self._snapshot and _in_event_loop():
+            return self._snapshot
+
+        version = cache_version(VERSION_KEY)
+        return self._revalidate(version) or self._store(version, list(Currency.objects.all()))
+
+    async def asnapshot(self):
+        snapshot = self._current()
+        if snapshot:
+            return snapshot
+
+        version = await acache_version(VERSION_KEY)
+        return self._revalidate(version) or self._store(
+            version, [currency async for currency in Currency.objects.all()]
+        )
+
+    def _lookup(self, index, key):
+        currency = getattr(self.snapshot(), index).get(key)
+
+        # A miss may be a currency added since the snapshot was loaded whose
+        # version bump hasn't been checked yet; reload once before giving up.
+        if currency is None and not _in_event_loop():
+            snapshot = self._store(cache_version(VERSION_KEY), list(Currency.objects.all()))
+            currency = getattr(snapshot, index).get(key)
+
+        return currency
+
+    def get(self, pk):
+        return self._lookup('by_id', pk)
+
+    def from_code(self, code):
+        return self._lookup('by_code', code)
+
+    def all(self):
+        return sorted(self.snapshot().by_id.values(), key=lambda currency: currency.code)
+
+    def invalidate(self):
+        bump_cache_version(VERSION_KEY)
+        with self._lock:
+            self._snapshot = None
+
+
+currencies = CurrencyRegistry()
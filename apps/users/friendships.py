@@ -0,0 +1,58 @@
+from django.db.models import Case, F, Q, Value, When, Window
+from django.db.models.functions import Greatest, Least, RowNumber
+from .models import Friendship
+
+DEDUPE_BATCH_SIZE = 5000
+
+
+def between(user_id, other_id):
+    """The pair's friendship, whichever way it was requested; matches friendship_pair_unique."""
+    return Friendship.objects.annotate(
+        low=Least('from_user', 'to_user'),
+        high=Greatest('from_user', 'to_user')
+    ).filter(low=min(user_id, other_id), high=max(user_id, other_id))
+
+
+def friends_of(user_ids):
+    """Accepted friendships of any of user_ids, from either side."""
+    return Friendship.objects.filter(
+        Q(from_user_id__in=user_ids) | Q(to_user_id__in=user_ids),
+        status=Friendship.STATUS_ACCEPTED
+    )
+
+
+def duplicate_ids():
+    """
+    Rows that would break friendship_pair_unique. Each pair keeps its accepted
+    row if it has one, else its pending one, the oldest first; self requests
+    are dropped as well.
+    """
+    precedence = Case(
+        When(status=Friendship.STATUS_ACCEPTED, then=Value(0)),
+        When(status=Friendship.STATUS_PENDING, then=Value(1)),
+        default=Value(2)
+    )
+
+    duplicates = (
+        Friendship.objects
+        .annotate(position=Window(
+            RowNumber(),
+            partition_by=[Least('from_user', 'to_user'), Greatest('from_user', 'to_user')],
+            order_by=[precedence.asc(), F('created_at').asc(), F('id').asc()]
+        ))
+        .filter(position__gt=1)
+        .values_list('id', flat=True)
+    )
+    self_requests = Friendship.objects.filter(from_user=F('to_user')).values_list('id', flat=True)
+
+    return sorted(set(duplicates) | set(self_requests))
+
+
+def dedupe(batch_size=DEDUPE_BATCH_SIZE):
+    """Delete duplicate_ids() in batches and return how many rows went."""
+    ids = duplicate_ids()
+
+    for start in range(0, len(ids), batch_size):
+        Friendship.objects.filter(id__in=ids[start:start + batch_size]).delete()
+
+    return len(ids)
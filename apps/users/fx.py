@@ -0,0 +1,149 @@
+from bisect import bisect_right
+from collections import OrderedDict
+from decimal import Decimal, ROUND_HALF_EVEN
+from threading import Lock
+from django.db.models import Q
+from fittus.versions import acache_version, bump_cache_version, cache_version
+from .currencies import currencies
+from .models import FxRate
+
+FX_VERSION_KEY = 'users:fx:version'
+
+# Currency pairs kept per process. A pair is its whole date-sorted history,
+# so this bounds memory by pairs in use rather than by rows in the table.
+MAX_PAIRS = 1024
+
+CENT = Decimal('0.01')
+
+
+class FxRateMissing(ValueError):
+    pass
+
+
+def fx_version():
+    return cache_version(FX_VERSION_KEY)
+
+
+async def afx_version():
+    return await acache_version(FX_VERSION_KEY)
+
+
+def bump_fx_version():
+    return bump_cache_version(FX_VERSION_KEY)
+
+
+def _code(currency_id):
+    currency = currencies.get(currency_id)
+    return currency.code if currency else f'#{currency_id}'
+
+
+def _pair(from_id, to_id):
+    return (from_id, to_id) if from_id < to_id else (to_id, from_id)
+
+
+class FxIndex:
+    """
+    Per-process LRU of FX histories. Each pair is stored once, as sorted
+    dates and the matching low-id -> high-id rates, so a lookup is a bisect
+    for the latest rate on or before a date. Rates quoted in the other
+    direction are inverted on load.
+    """
+
+    def __init__(self, max_pairs=MAX_PAIRS):
+        self.max_pairs = max_pairs
+        self.version = None
+        self._series = OrderedDict()
+        self._lock = Lock()
+
+    def _query(self, pairs):
+        condition = Q()
+        for low_id, high_id in pairs:
+            condition |= Q(base_id=low_id, quote_id=high_id) | Q(base_id=high_id, quote_id=low_id)
+
+        return FxRate.objects.filter(condition).order_by('date').values_list('base_id', 'quote_id', 'date', 'rate')
+
+    def _missing(self, version, pairs):
+        with self._lock:
+            if version != self.version:
+                self._series.clear()
+                self.version = version
+
+            return {_pair(*pair) for pair in pairs if pair[0] != pair[1]} - self._series.keys()
+
+    def _store(self, pairs, rows):
+        loaded = {pair: {} for pair in pairs}
+
+        for base_id, quote_id, date, rate in rows:
+            if base_id < quote_id:
+                loaded[(base_id, quote_id)][date] = rate
+            else:
+                # A directly quoted rate wins over an inverted one for the same day.
+                loaded[(quote_id, base_id)].setdefault(date, 1 / rate)
+
+        series = {}
+        for pair, rates in loaded.items():
+            dates = sorted(rates)
+            series[pair] = (dates, [rates[date] for date in dates])
+
+        with self._lock:
+            for pair in series:
+                self._series[pair] = series[pair]
+                self._series.move_to_end(pair)
+
+            while len(self._series) > self.max_pairs:
+                self._series.popitem(last=False)
+
+        return series
+
+    def preload(self, pairs):
+        """Load every (from_id, to_id) pair not held yet with a single query."""
+        missing = self._missing(fx_version(), pairs)
+
+        if missing:
+            self._store(missing, self._query(missing))
+
+    async def apreload(self, pairs):
+        missing = self._missing(await afx_version(), pairs)
+
+        if missing:
+            self._store(missing, [row async for row in self._query(missing)])
+
+    def rate(self, from_id, to_id, on):
+        if from_id == to_id:
+            return Decimal(1)
+
+        pair = _pair(from_id, to_id)
+
+        with self._lock:
+            series = self._series.get(pair)
+            if series is not None:
+                self._series.move_to_end(pair)
+
+        if series is None:
+            # Use what was loaded rather than reading it back, since another
+            # thread may evict it in between.
+            self._missing(fx_version(), [pair])
+            series = self._store([pair], self._query([pair]))[pair]
+
+        dates, rates = series
+        index = bisect_right(dates, on) - 1
+
+        if index < 0:
+            raise FxRateMissing(
+                f'No {_code(from_id)}/{_code(to_id)} FX rate on or before {on}.'
+            )
+
+        return rates[index] if from_id < to_id else 1 / rates[index]
+
+    def convert(self, amount, from_id, to_id, on):
+        if from_id == to_id:
+            return amount
+
+        return (amount * self.rate(from_id, to_id, on)).quantize(CENT, rounding=ROUND_HALF_EVEN)
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+
+
+fx_rates = FxIndex()
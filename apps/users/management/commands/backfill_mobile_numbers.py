@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from ...contacts import BACKFILL_BATCH_SIZE, backfill_phones
+
+
+class Command(BaseCommand):
+    help = (
+        'Store every mobile number digits-only, the way registration now does, so contact '
+        'lookups match users who registered before that change.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=BACKFILL_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        updated, skipped = backfill_phones(options['batch_size'])
+
+        if skipped:
+            self.stdout.write(self.style.WARNING(
+                f'Left {len(skipped)} number(s) unchanged, unusable or already taken once normalized. '
+                f'User ids: {", ".join(map(str, skipped))}'
+            ))
+
+        self.stdout.write(self.style.SUCCESS(f'Normalized {updated} mobile number(s).'))
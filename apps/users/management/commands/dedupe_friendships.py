@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from ...friendships import DEDUPE_BATCH_SIZE, dedupe, duplicate_ids
+
+
+class Command(BaseCommand):
+    help = (
+        'Delete friendships that duplicate a pair in the other direction, and self requests. '
+        'Run it before adding the friendship_pair_unique constraint to an existing database.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=DEDUPE_BATCH_SIZE)
+        parser.add_argument('--dry-run', action='store_true', help='Only count the rows that would be deleted.')
+
+    def handle(self, *args, **options):
+        if options['dry_run']:
+            self.stdout.write(f'{len(duplicate_ids())} duplicate friendship(s) found.')
+            return
+
+        deleted = dedupe(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} duplicate friendship(s).'))
@@ -0,0 +1,80 @@
+import csv
+from datetime import date
+from decimal import Decimal, InvalidOperation
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from ...currencies import currencies
+from ...fx import bump_fx_version
+from ...models import FxRate
+
+BATCH_SIZE = 5000
+COLUMNS = {'date', 'base', 'quote', 'rate'}
+
+
+class Command(BaseCommand):
+    help = (
+        'Bulk-load FX rates from a CSV file with date,base,quote,rate columns '
+        '(ISO dates, currency codes). Existing rates for the same pair and day are replaced.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        loaded = 0
+
+        with open(options['path'], newline='') as source, transaction.atomic():
+            reader = csv.DictReader(source)
+            missing = COLUMNS - set(reader.fieldnames or [])
+
+            if missing:
+                raise CommandError(f'Missing column(s): {", ".join(sorted(missing))}')
+
+            batch = {}
+
+            for line, row in enumerate(reader, start=2):
+                rate = self._rate(line, row)
+                # Postgres rejects an upsert that touches the same row twice, so
+                # a pair and day repeated within a batch keeps its last rate.
+                batch[(rate.base_id, rate.quote_id, rate.date)] = rate
+
+                if len(batch) >= options['batch_size']:
+                    loaded += self._write(batch)
+                    batch = {}
+
+            loaded += self._write(batch)
+
+            transaction.on_commit(bump_fx_version)
+
+        self.stdout.write(self.style.SUCCESS(f'Loaded {loaded} FX rate(s).'))
+
+    def _rate(self, line, row):
+        base = currencies.from_code(row['base'].strip().upper())
+        quote = currencies.from_code(row['quote'].strip().upper())
+
+        if not base or not quote:
+            raise CommandError(f'Line {line}: unknown currency {row["base"]}/{row["quote"]}.')
+
+        if base.id == quote.id:
+            raise CommandError(f'Line {line}: base and quote must differ.')
+
+        try:
+            on = date.fromisoformat(row['date'].strip())
+            rate = Decimal(row['rate'].strip())
+        except (ValueError, InvalidOperation):
+            raise CommandError(f'Line {line}: invalid date or rate.')
+
+        if not rate.is_finite() or rate <= 0:
+            raise CommandError(f'Line {line}: rate must be positive.')
+
+        return FxRate(base_id=base.id, quote_id=quote.id, date=on, rate=rate)
+
+    def _write(self, batch):
+        FxRate.objects.bulk_create(
+            batch.values(),
+            update_conflicts=True,
+            unique_fields=['base', 'quote', 'date'],
+            update_fields=['rate']
+        )
+        return len(batch)
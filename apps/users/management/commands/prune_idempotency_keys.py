@@ -0,0 +1,14 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from fittus.idempotency import prune_keys
+
+
+class Command(BaseCommand):
+    help = 'Delete Idempotency-Key records older than IDEMPOTENCY_TTL; run it periodically.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than', type=int, default=settings.IDEMPOTENCY_TTL, help='Age in seconds.')
+
+    def handle(self, *args, **options):
+        deleted = prune_keys(options['older_than'])
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} idempotency key(s).'))
@@ -1,5 +1,8 @@
 from django.db import models
 from django.contrib.auth.models import AbstractUser
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F, Q
+from django.db.models.functions import Greatest, Least, Lower
 
 
 class Currency(models.Model):
@@ -10,6 +13,16 @@ class Currency(models.Model):
     def __str__(self):
         return f"{self.name} ({self.code})"
 
+class FxRate(models.Model):
+    # 1 unit of base is worth `rate` units of quote on `date`.
+    base = models.ForeignKey(Currency, related_name='+', on_delete=models.CASCADE)
+    quote = models.ForeignKey(Currency, related_name='+', on_delete=models.CASCADE)
+    date = models.DateField()
+    rate = models.DecimalField(max_digits=20, decimal_places=10)
+
+    class Meta:
+        unique_together = ('base', 'quote', 'date')
+
 class User(AbstractUser):
     username = None
     email = models.EmailField(unique=True)
@@ -21,6 +34,12 @@ class User(AbstractUser):
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = []
 
+    class Meta:
+        indexes = [
+            # Case-insensitive contact lookups (apps/users/contacts.py).
+            models.Index(Lower('email'), name='user_email_lower_idx'),
+        ]
+
 class Friendship(models.Model):
     STATUS_PENDING = 'pending'
     STATUS_ACCEPTED = 'accepted'
@@ -35,4 +54,35 @@ class Friendship(models.Model):
     from_user = models.ForeignKey(User, related_name='friendships_initiated', on_delete=models.CASCADE)
     to_user = models.ForeignKey(User, related_name='friendships_received', on_delete=models.CASCADE)
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
-    created_at = models.DateTimeField(auto_now_add=True)
\ No newline at end of file
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            # One row per pair whichever way the request went, so A->B and
+            # B->A cannot both exist and a pair lookup is a single probe of
+            # this expression index (see apps/users/friendships.py).
+            models.UniqueConstraint(Least('from_user', 'to_user'), Greatest('from_user', 'to_user'), name='friendship_pair_unique'),
+            models.CheckConstraint(condition=~Q(from_user=F('to_user')), name='friendship_not_self'),
+        ]
+        indexes = [
+            models.Index(fields=['from_user', 'status'], name='friendship_from_status_idx'),
+            models.Index(fields=['to_user', 'status'], name='friendship_to_status_idx'),
+        ]
+
+class IdempotencyKey(models.Model):
+    # Inserted in the same transaction as the request it guards, see
+    # fittus/idempotency.py. key is the SHA-256 of the client's header.
+    user = models.ForeignKey(User, related_name='+', on_delete=models.CASCADE)
+    key = models.CharField(max_length=64)
+    fingerprint = models.BinaryField(max_length=32)
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    response = models.JSONField(encoder=DjangoJSONEncoder, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'key'], name='idempotency_user_key_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['created_at'], name='idempotency_created_idx'),
+        ]
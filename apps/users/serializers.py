@@ -1,7 +1,36 @@
 from rest_framework import serializers
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from .models import User, Currency, Friendship
-import re
+from .currencies import currencies
+from .contacts import normalize_phone
+
+class CurrencyCodeField(serializers.SlugRelatedField):
+    """Currency by code, resolved from the in-process registry instead of the table."""
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault('slug_field', 'code')
+        if not kwargs.get('read_only'):
+            kwargs.setdefault('queryset', Currency.objects.all())
+        super().__init__(**kwargs)
+
+    def use_pk_only_optimization(self):
+        # Serialize from the default_currency_id column, never the FK.
+        return True
+
+    def to_internal_value(self, data):
+        if not isinstance(data, str):
+            self.fail('invalid')
+
+        currency = currencies.from_code(data)
+
+        if currency is None:
+            self.fail('does_not_exist', slug_name=self.slug_field, value=data)
+
+        return currency
+
+    def to_representation(self, obj):
+        currency = currencies.get(obj.pk)
+        return currency.code if currency else None
 
 class CurrencySerializer(serializers.ModelSerializer):
     class Meta:
@@ -13,7 +42,7 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
     last_name = serializers.CharField(required=True)
     email = serializers.EmailField(required=True)
     mobile_no = serializers.CharField(required=False, allow_blank=True)
-    default_currency = serializers.SlugRelatedField(queryset=Currency.objects.all(), slug_field='code', required=False)
+    default_currency = CurrencyCodeField(required=False)
     password = serializers.CharField(write_only=True)
     password_confirmation = serializers.CharField(write_only=True)
 
@@ -21,6 +50,18 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
         model = User
         fields = ['first_name', 'last_name', 'email', 'mobile_no', 'default_currency', 'password', 'password_confirmation']
 
+    def validate_mobile_no(self, value):
+        if not value:
+            return None
+
+        # Stored digits-only so contact lookups can match it exactly.
+        mobile_no = normalize_phone(value)
+
+        if not mobile_no:
+            raise serializers.ValidationError('Invalid mobile number format.')
+
+        return mobile_no
+
     def validate(self, attrs):
         if attrs['password'] != attrs['password_confirmation']:
             raise serializers.ValidationError({"password": "Password fields didn't match."})
@@ -53,6 +94,18 @@ class UserLookupSerializer(serializers.ModelSerializer):
         model = User
         fields = ['id', 'first_name', 'last_name']
 
+class FriendSerializer(serializers.ModelSerializer):
+    """An accepted friendship, seen from the requesting user's side."""
+    user = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Friendship
+        fields = ['id', 'user', 'created_at']
+
+    def get_user(self, obj):
+        friend = obj.to_user if obj.from_user_id == self.context['request'].user.pk else obj.from_user
+        return UserLookupSerializer(friend).data
+
 class FriendshipSerializer(serializers.ModelSerializer):
     from_user = UserRegistrationSerializer(read_only=True)
     to_user = UserRegistrationSerializer(read_only=True)
@@ -0,0 +1,25 @@
+from django.db.models.signals import post_delete, post_save
+from django.db import transaction
+from django.dispatch import receiver
+from .authentication import active_users
+from .currencies import currencies
+from .fx import bump_fx_version
+from .models import Currency, FxRate, User
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def evict_active_user(sender, instance, **kwargs):
+    active_users.evict(instance.pk)
+
+
+@receiver(post_save, sender=Currency)
+@receiver(post_delete, sender=Currency)
+def refresh_currencies(sender, instance, **kwargs):
+    transaction.on_commit(currencies.invalidate)
+
+
+@receiver(post_save, sender=FxRate)
+@receiver(post_delete, sender=FxRate)
+def refresh_fx_rates(sender, instance, **kwargs):
+    transaction.on_commit(bump_fx_version)
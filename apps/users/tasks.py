@@ -0,0 +1,8 @@
+from ..tasks.queue import task
+from .cache import get_friend_ids_many
+
+
+@task('users.refresh_friend_ids')
+def refresh_friend_ids(user_ids):
+    """Reload friend sets dropped by a friendship change, so the next request hits the cache."""
+    get_friend_ids_many(user_ids)
@@ -1,3 +1,273 @@
-from django.test import TestCase
+import json
+from unittest import mock
+from asgiref.sync import async_to_sync
+from django.test import AsyncClient
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+from fittus.testing import AsyncParityMixin
+from .authentication import CACHED_FIELDS, active_users
+from .contacts import backfill_phones
+from .currencies import currencies
+from .models import Currency, Friendship, User
 
-# Create your tests here.
+
+class CachedUserAuthenticationTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create(email='ana@example.com', first_name='Ana', mobile_no='9876543210')
+        active_users.evict(self.user.pk)
+
+    def _authenticate(self, user):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(user).access_token}')
+
+    def test_token_carries_no_profile_fields(self):
+        token = RefreshToken.for_user(self.user).access_token
+
+        self.assertFalse(set(CACHED_FIELDS) & set(token.payload))
+
+    def test_user_is_loaded_once_then_served_from_cache(self):
+        self._authenticate(self.user)
+        url = reverse('friend-list')
+
+        with self.assertNumQueries(2):
+            self.client.get(url)
+
+        # The friend page query only; the user comes from the cache.
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
+
+        self.assertEqual(response.status_code, 200)
+
+    def test_profile_changes_are_seen_after_eviction(self):
+        self._authenticate(self.user)
+        self.client.get(reverse('friend-list'))
+
+        # post_save evicts the cached entry.
+        self.user.first_name = 'Anna'
+        self.user.save()
+
+        self.assertEqual(active_users.get(self.user.pk)[CACHED_FIELDS.index('first_name')], 'Anna')
+
+    def test_inactive_users_are_rejected(self):
+        self._authenticate(self.user)
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+
+        response = self.client.get(reverse('friend-list'))
+
+        self.assertEqual(response.status_code, 401)
+
+
+class CurrencyRegistryTests(APITestCase):
+    def test_unknown_currency_reloads_the_snapshot(self):
+        currencies.all()
+
+        # bulk_create skips post_save, so the registry isn't told about it.
+        inr, = Currency.objects.bulk_create([Currency(code='INR', name='Indian Rupee', symbol='R')])
+
+        self.assertEqual(currencies.get(inr.pk), inr)
+        self.assertEqual(currencies.from_code('INR'), inr)
+
+    def test_known_currency_is_served_without_queries(self):
+        usd = Currency.objects.create(code='USD', name='US Dollar', symbol='$')
+        currencies.get(usd.pk)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(currencies.get(usd.pk), usd)
+
+
+class ContactLookupTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create(email='me@example.com', mobile_no='9876500000')
+        self.ana = User.objects.create(email='Ana@Example.com', mobile_no='919876543210')
+        self.bo = User.objects.create(email='bo@example.com', mobile_no='9123456789')
+        self.client.force_authenticate(self.user)
+        self.url = reverse('user-lookup-batch')
+
+    def _matches(self, matches):
+        return sorted((match.get('email') or match.get('mobile_no'), match['user']['id']) for match in matches)
+
+    def _lookup(self, emails=(), mobile_nos=()):
+        response = self.client.post(self.url, {'emails': list(emails), 'mobile_nos': list(mobile_nos)}, format='json')
+        self.assertEqual(response.status_code, 200)
+        return self._matches(response.json()['matches'])
+
+    def test_contacts_are_normalized(self):
+        matches = self._lookup(emails=['  ANA@example.COM '], mobile_nos=['+91 98765-43210', '(912) 345-6789'])
+
+        self.assertEqual(matches, [
+            ('9123456789', self.bo.id),
+            ('919876543210', self.ana.id),
+            ('ana@example.com', self.ana.id),
+        ])
+
+    def test_duplicates_match_once(self):
+        matches = self._lookup(emails=['bo@example.com', 'BO@example.com'], mobile_nos=['9123456789', '912-345-6789'])
+
+        self.assertEqual(matches, [('9123456789', self.bo.id), ('bo@example.com', self.bo.id)])
+
+    def test_caller_and_unusable_entries_are_left_out(self):
+        matches = self._lookup(emails=['me@example.com', 'not-an-email', 7], mobile_nos=['9876500000', '12', None])
+
+        self.assertEqual(matches, [])
+
+    def test_large_inputs_are_streamed(self):
+        emails = ['ana@example.com', 'bo@example.com', 'nobody@example.com']
+
+        with mock.patch('apps.users.views.LOOKUP_CHUNK_SIZE', 2):
+            response = self.client.post(self.url, {'emails': emails}, format='json')
+
+        self.assertTrue(response.streaming)
+        body = json.loads(b''.join(response.streaming_content))
+        self.assertEqual(
+            self._matches(body['matches']),
+            [('ana@example.com', self.ana.id), ('bo@example.com', self.bo.id)]
+        )
+
+    def test_large_inputs_are_streamed_asynchronously_under_asgi(self):
+        token = RefreshToken.for_user(self.user).access_token
+
+        async def lookup():
+            response = await AsyncClient().post(
+                self.url,
+                {'emails': ['ana@example.com', 'bo@example.com', 'nobody@example.com']},
+                content_type='application/json',
+                headers={'Authorization': f'Bearer {token}'}
+            )
+            return response, b''.join([chunk async for chunk in response.streaming_content])
+
+        with mock.patch('apps.users.views.LOOKUP_CHUNK_SIZE', 2):
+            response, body = async_to_sync(lookup)()
+
+        self.assertTrue(response.is_async)
+        self.assertEqual(
+            self._matches(json.loads(body)['matches']),
+            [('ana@example.com', self.ana.id), ('bo@example.com', self.bo.id)]
+        )
+
+
+class BackfillPhonesTests(APITestCase):
+    def test_numbers_are_stored_digits_only(self):
+        legacy = User.objects.create(email='legacy@example.com', mobile_no='+91 98765-43210')
+        blank = User.objects.create(email='blank@example.com', mobile_no=' ')
+        User.objects.create(email='taken@example.com', mobile_no='9123456789')
+        clash = User.objects.create(email='clash@example.com', mobile_no='912-345-6789')
+        short = User.objects.create(email='short@example.com', mobile_no='12-3')
+
+        updated, skipped = backfill_phones(batch_size=2)
+
+        self.assertEqual(updated, 2)
+        self.assertEqual(skipped, [clash.id, short.id])
+        self.assertEqual(
+            dict(User.objects.filter(id__in=[legacy.id, blank.id, clash.id]).values_list('id', 'mobile_no')),
+            {legacy.id: '919876543210', blank.id: None, clash.id: '912-345-6789'}
+        )
+
+
+class FriendshipRequestTests(APITestCase):
+    def setUp(self):
+        self.ana = User.objects.create(email='ana@example.com')
+        self.bo = User.objects.create(email='bo@example.com')
+
+    def _request(self, from_user, to_user):
+        self.client.force_authenticate(from_user)
+        return self.client.post(reverse('friend-request', args=[to_user.id]))
+
+    def _respond(self, user, action):
+        self.client.force_authenticate(user)
+        friendship = Friendship.objects.get()
+        return self.client.post(reverse(f'friend-request-{action}', args=[friendship.id]))
+
+    def test_pending_request_blocks_both_directions(self):
+        self.assertEqual(self._request(self.ana, self.bo).status_code, 201)
+
+        again = self._request(self.ana, self.bo)
+        reverse_request = self._request(self.bo, self.ana)
+
+        self.assertEqual(again.data['error'], 'Friend request already sent.')
+        self.assertEqual(reverse_request.data['error'], 'This user has already sent you a friend request.')
+        self.assertEqual(Friendship.objects.count(), 1)
+
+    def test_friends_cannot_request_again(self):
+        self._request(self.ana, self.bo)
+        self._respond(self.bo, 'accept')
+
+        response = self._request(self.bo, self.ana)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['error'], 'You are already friends.')
+
+    def test_rejected_request_can_be_sent_again_either_way(self):
+        self._request(self.ana, self.bo)
+        self._respond(self.bo, 'reject')
+
+        response = self._request(self.bo, self.ana)
+
+        self.assertEqual(response.status_code, 201, response.data)
+        friendship = Friendship.objects.get()
+        self.assertEqual(
+            (friendship.from_user_id, friendship.to_user_id, friendship.status),
+            (self.bo.id, self.ana.id, Friendship.STATUS_PENDING)
+        )
+        self.assertEqual(self._respond(self.ana, 'accept').status_code, 200)
+
+    def test_rejected_request_can_be_repeated_by_its_sender(self):
+        self._request(self.ana, self.bo)
+        self._respond(self.bo, 'reject')
+
+        self.assertEqual(self._request(self.ana, self.bo).status_code, 201)
+        self.assertEqual(Friendship.objects.get().status, Friendship.STATUS_PENDING)
+
+    def test_self_request_is_refused(self):
+        self.assertEqual(self._request(self.ana, self.ana).status_code, 400)
+
+
+class FriendListTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create(email='me@example.com')
+        self.friends = [User.objects.create(email=f'friend{i}@example.com', first_name=f'Friend{i}') for i in range(3)]
+        self.pending = User.objects.create(email='pending@example.com')
+        self.rejected = User.objects.create(email='rejected@example.com')
+        Friendship.objects.bulk_create([
+            Friendship(from_user=self.user, to_user=self.friends[0], status=Friendship.STATUS_ACCEPTED),
+            Friendship(from_user=self.friends[1], to_user=self.user, status=Friendship.STATUS_ACCEPTED),
+            Friendship(from_user=self.friends[2], to_user=self.user, status=Friendship.STATUS_ACCEPTED),
+            Friendship(from_user=self.pending, to_user=self.user),
+            Friendship(from_user=self.user, to_user=self.rejected, status=Friendship.STATUS_REJECTED),
+        ])
+        self.client.force_authenticate(self.user)
+
+    def test_lists_accepted_friends_from_either_side(self):
+        response = self.client.get(reverse('friend-list'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            sorted(entry['user']['id'] for entry in response.data['results']),
+            [friend.id for friend in self.friends]
+        )
+
+    def test_pages_with_a_cursor(self):
+        url = reverse('friend-list')
+
+        first = self.client.get(url, {'page_size': 2}).data
+        second = self.client.get(url, {'page_size': 2, 'cursor': first['cursor']}).data
+
+        ids = [entry['user']['id'] for entry in first['results'] + second['results']]
+        self.assertEqual(sorted(ids), [friend.id for friend in self.friends])
+        self.assertIsNone(second['cursor'])
+
+
+class AsyncUserViewParityTests(AsyncParityMixin, APITestCase):
+    def setUp(self):
+        self.user = User.objects.create(email='ana@example.com', first_name='Ana')
+        self.others = [User.objects.create(email=f'user{i}@example.com', first_name=f'User{i}') for i in range(3)]
+        Friendship.objects.bulk_create([Friendship(from_user=other, to_user=self.user) for other in self.others])
+
+    def test_friend_request_list(self):
+        self.assertSameResponse(self.user, 'get', reverse('friend-request-list'))
+        self.assertSameResponse(self.others[0], 'get', reverse('friend-request-list'))
+
+    def test_user_lookup(self):
+        path = reverse('user-lookup')
+
+        for data in ({'email': 'user1@example.com'}, {'email': 'ana@example.com'}, {'email': 'nobody@example.com'}, {}):
+            self.assertSameResponse(self.user, 'post', path, data)
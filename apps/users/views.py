@@ -1,11 +1,21 @@
 from django.shortcuts import render
+from django.db import IntegrityError, transaction
+from django.utils import timezone
 from rest_framework import status, permissions, generics
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework_simplejwt.views import TokenObtainPairView
+from fittus.async_support import streaming_response
+from fittus.conditional import conditional
 from rest_framework.views import APIView
 from .models import User, Friendship
-from .serializers import UserRegistrationSerializer, CustomTokenObtainPairSerializer, FriendshipSerializer, UserLookupSerializer
+from .serializers import UserRegistrationSerializer, CustomTokenObtainPairSerializer, FriendshipSerializer, FriendSerializer, UserLookupSerializer
+from .cache import friendship_status_changed
+from .friendships import between, friends_of
+from .contacts import LOOKUP_CHUNK_SIZE, MAX_CONTACTS, lookup_contacts, normalize_email, normalize_phone, normalized
+from ..activity.feed import friendship_activity, publish
+from ..expenses.pagination import KeysetPagination
 
 
 class UserRegistrationView(APIView):
@@ -27,12 +37,21 @@ class CustomTokenObtainPairView(TokenObtainPairView):
     permission_classes = [permissions.AllowAny]
     serializer_class = CustomTokenObtainPairSerializer
 
+def profile_version(user_id):
+    updated_at = User.objects.filter(pk=user_id).values_list('updated_at', flat=True).first()
+    return (updated_at.isoformat(), updated_at) if updated_at else None
+
 class UserProfileView(generics.RetrieveUpdateAPIView):
     permission_classes = [permissions.IsAuthenticated]
     serializer_class = UserRegistrationSerializer
     
     def get_object(self):
-        return self.request.user
+        # request.user comes from the short-lived auth cache, which may be stale.
+        return User.objects.get(pk=self.request.user.pk)
+
+    @conditional(lambda view, request: profile_version(request.user.pk))
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
     
 class UserLookupView(APIView):
     permission_classes = [permissions.IsAuthenticated]
@@ -56,6 +75,55 @@ class UserLookupView(APIView):
             status=status.HTTP_200_OK
         )
     
+class ContactLookupView(APIView):
+    """
+    Resolve a whole address book in one request. Inputs larger than one
+    lookup chunk are streamed, so matches go out as each chunk resolves.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    renderer = JSONRenderer()
+    stream_batch_size = 100
+
+    def post(self, request):
+        emails = request.data.get('emails', [])
+        mobile_nos = request.data.get('mobile_nos', [])
+
+        if not isinstance(emails, list) or not isinstance(mobile_nos, list):
+            return Response({'error': 'emails and mobile_nos must be lists.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        if len(emails) + len(mobile_nos) > MAX_CONTACTS:
+            return Response(
+                {'error': f'At most {MAX_CONTACTS} contacts can be looked up at once.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        emails = normalized(emails, normalize_email)
+        phones = normalized(mobile_nos, normalize_phone)
+        matches = (
+            {field: value, 'user': UserLookupSerializer(user).data}
+            for field, value, user in lookup_contacts(emails, phones, request.user.id)
+        )
+
+        if len(emails) + len(phones) > LOOKUP_CHUNK_SIZE:
+            return streaming_response(request._request, self._stream(matches), content_type='application/json')
+
+        return Response({'matches': list(matches)}, status=status.HTTP_200_OK)
+
+    def _stream(self, matches):
+        # Matches go out in batches, each one write (and under ASGI one
+        # thread hop) rather than one per match.
+        batch = [b'{"matches":[']
+
+        for index, match in enumerate(matches):
+            batch.append((b',' if index else b'') + self.renderer.render(match))
+
+            if len(batch) >= self.stream_batch_size:
+                yield b''.join(batch)
+                batch = []
+
+        batch.append(b']}')
+        yield b''.join(batch)
+
 class FriendshipRequestView(APIView):
     permission_classes = [permissions.IsAuthenticated]
     
@@ -68,18 +136,55 @@ class FriendshipRequestView(APIView):
         if to_user == request.user:
             return Response({'error': 'You cannot send a friend request to yourself.'}, status=status.HTTP_400_BAD_REQUEST)
         
-        friendship, created = Friendship.objects.get_or_create(
-            from_user=request.user,
-            to_user=to_user
-        )
-
-        if not created:
-            return Response({'error': 'Friend request already sent.'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            with transaction.atomic():
+                existing = between(request.user.id, to_user.id).select_for_update().first()
+
+                if existing is None:
+                    friendship = Friendship.objects.create(from_user=request.user, to_user=to_user)
+                elif existing.status == Friendship.STATUS_REJECTED:
+                    # A rejection doesn't block the pair for good: either user
+                    # may ask again, reusing the pair's single row.
+                    existing.from_user, existing.to_user = request.user, to_user
+                    existing.status = Friendship.STATUS_PENDING
+                    existing.created_at = timezone.now()
+                    existing.save(update_fields=['from_user', 'to_user', 'status', 'created_at'])
+                    friendship = existing
+                else:
+                    return self._refused(existing, to_user)
+        except IntegrityError:
+            # A concurrent request for the same pair won friendship_pair_unique.
+            return self._refused(between(request.user.id, to_user.id).first(), to_user)
 
         friendship_data = FriendshipSerializer(friendship).data
 
         return Response({'message': 'Friend request sent.', 'friendship': friendship_data}, status=status.HTTP_201_CREATED)
+
+    def _refused(self, existing, to_user):
+        if existing is None:
+            # The row that beat this request is already gone again.
+            error = 'Friend request could not be sent, try again.'
+        elif existing.status == Friendship.STATUS_ACCEPTED:
+            error = 'You are already friends.'
+        elif existing.from_user_id == to_user.id:
+            error = 'This user has already sent you a friend request.'
+        else:
+            error = 'Friend request already sent.'
+
+        return Response({'error': error}, status=status.HTTP_400_BAD_REQUEST)
     
+class FriendListView(generics.ListAPIView):
+    permission_classes = [permissions.IsAuthenticated]
+    serializer_class = FriendSerializer
+    pagination_class = KeysetPagination
+
+    def get_queryset(self):
+        return friends_of([self.request.user.pk]).select_related('from_user', 'to_user').only(
+            'id', 'created_at', 'from_user_id', 'to_user_id',
+            'from_user__first_name', 'from_user__last_name',
+            'to_user__first_name', 'to_user__last_name'
+        )
+
 class FriendshipRequestListView(generics.ListAPIView):
     permission_classes = [permissions.IsAuthenticated]
     serializer_class = FriendshipSerializer
@@ -99,8 +204,11 @@ class FriendshipRequestAcceptView(APIView):
         if friendship.status != Friendship.STATUS_PENDING:
             return Response({'error': 'You have already responded to this friend request.'}, status=status.HTTP_400_BAD_REQUEST)
         
+        previous_status = friendship.status
         friendship.status = Friendship.STATUS_ACCEPTED
         friendship.save(update_fields=['status'])
+        friendship_status_changed(friendship, previous_status)
+        publish([friendship_activity(friendship, request.user.id)])
 
         return Response({'message': 'Friend request accepted.'}, status=status.HTTP_200_OK)
     
@@ -116,8 +224,10 @@ class FriendshipRequestRejectView(APIView):
         if friendship.status != Friendship.STATUS_PENDING:
             return Response({'error': 'You have already responded to this friend request.'}, status=status.HTTP_400_BAD_REQUEST)
         
+        previous_status = friendship.status
         friendship.status = Friendship.STATUS_REJECTED
         friendship.save(update_fields=['status'])
+        friendship_status_changed(friendship, previous_status)
 
         return Response({'message': 'Friend request rejected.'}, status=status.HTTP_200_OK)
     
\ No newline at end of file
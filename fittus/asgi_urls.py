@@ -0,0 +1,21 @@
+"""
+URL configuration used by the ASGI deployment.
+
+Read-heavy endpoints are routed to native async views so they run on the
+event loop instead of a worker thread; everything else falls through to
+fittus.urls unchanged.
+"""
+from django.urls import path
+from apps.users import async_views as user_views
+from apps.expenses import async_views as expense_views
+from apps.balances import async_views as balance_views
+from .urls import urlpatterns as sync_urlpatterns
+
+urlpatterns = [
+    path('users/friend-requests/', user_views.friend_request_list),
+    path('users/lookup/', user_views.user_lookup),
+    path('groups/<int:group_id>/expenses/', expense_views.group_expense_list),
+    path('groups/<int:group_id>/settlements/', balance_views.group_settlements),
+    path('groups/<int:group_id>/balances/', balance_views.group_balances),
+    path('expenses/mine/', expense_views.my_expense_list),
+] + sync_urlpatterns
@@ -0,0 +1,68 @@
+from functools import wraps
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, StreamingHttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.renderers import JSONRenderer
+from apps.users.authentication import CachedUserJWTAuthentication
+
+# Helpers for the async views served under ASGI (see fittus/asgi_urls.py).
+# DRF views are sync-only, so these keep the async endpoints' auth and JSON
+# output identical to their DRF counterparts, and let their streaming
+# responses stream under either server.
+
+renderer = JSONRenderer()
+authenticator = CachedUserJWTAuthentication()
+
+
+def json_response(data, status=status.HTTP_200_OK):
+    return HttpResponse(renderer.render(data), status=status, content_type='application/json')
+
+
+def async_authenticated(view):
+    @csrf_exempt
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        try:
+            user = await authenticator.aauthenticate(request)
+        except APIException as exc:
+            return json_response({'detail': exc.detail}, status=exc.status_code)
+
+        if user is None:
+            return json_response(
+                {'detail': 'Authentication credentials were not provided.'},
+                status=status.HTTP_401_UNAUTHORIZED
+            )
+
+        request.user = user
+        return await view(request, *args, **kwargs)
+
+    return wrapper
+
+
+async def _pulled(content):
+    # Each chunk is produced in the request's sync thread, where the view ran
+    # and where any server-side cursor the iterator reads from lives.
+    content = iter(content)
+    pull = sync_to_async(next)
+
+    try:
+        while (chunk := await pull(content, None)) is not None:
+            yield chunk
+    finally:
+        if hasattr(content, 'close'):
+            await sync_to_async(content.close)()
+
+
+def streaming_response(request, content, **kwargs):
+    """
+    StreamingHttpResponse over a sync iterator that streams under both WSGI
+    and ASGI. Django buffers a sync iterator whole under ASGI, so there the
+    chunks are pulled one at a time through an async iterator instead.
+    """
+    if isinstance(request, ASGIRequest):
+        content = _pulled(content)
+
+    return StreamingHttpResponse(content, **kwargs)
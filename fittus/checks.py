@@ -0,0 +1,30 @@
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+# Group versions and settlement plans, friend sets, the currency and FX
+# registries and the worker's cache warming are all shared between
+# processes through the default cache. A process-local backend silently
+# gives every process its own copy.
+
+LOCAL_CACHE_BACKENDS = {
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+}
+
+
+def cache_is_shared():
+    return settings.CACHES['default']['BACKEND'] not in LOCAL_CACHE_BACKENDS
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    if cache_is_shared():
+        return []
+
+    return [
+        Error(
+            f"The default cache ({settings.CACHES['default']['BACKEND']}) is local to each process.",
+            hint='Set CACHE_BACKEND and CACHE_LOCATION to a shared cache such as Redis or Memcached.',
+            id='fittus.E001',
+        )
+    ]
@@ -0,0 +1,89 @@
+import hashlib
+from functools import wraps
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+# Conditional GET for read endpoints. A view supplies a cheap validator,
+# usually a version column or an aggregate of one, which is checked against
+# If-None-Match / If-Modified-Since before the handler runs, so an unchanged
+# resource costs one small query and a 304 with no serialization at all.
+
+
+def make_etag(request, version):
+    # Scoped to the user, path and query string (cursor, page_size...), and
+    # weak because the same data may be rendered with a different Accept.
+    raw = '\n'.join([str(request.user.pk), request.get_full_path(), request.headers.get('Accept', ''), str(version)])
+    return 'W/"%s"' % hashlib.sha256(raw.encode()).hexdigest()[:32]
+
+
+def _not_modified(request, etag, last_modified):
+    return get_conditional_response(
+        request,
+        etag=etag,
+        last_modified=int(last_modified.timestamp()) if last_modified else None
+    )
+
+
+def _set_validators(response, etag, last_modified):
+    if response.status_code in (200, 304):
+        response['ETag'] = etag
+        if last_modified:
+            response['Last-Modified'] = http_date(last_modified.timestamp())
+
+    # Clients may keep the payload but must revalidate before reusing it.
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def conditional(validators):
+    """
+    Wrap a DRF GET handler. validators(view, request, *args, **kwargs) returns
+    (version, last_modified), last_modified may be None, or None to skip the
+    check. Runs after authentication and permission checks.
+    """
+
+    def decorator(handler):
+        @wraps(handler)
+        def wrapper(view, request, *args, **kwargs):
+            state = validators(view, request, *args, **kwargs)
+
+            if state is None:
+                return handler(view, request, *args, **kwargs)
+
+            version, last_modified = state
+            etag = make_etag(request, version)
+            response = _not_modified(request, etag, last_modified)
+
+            if response is None:
+                response = handler(view, request, *args, **kwargs)
+
+            return _set_validators(response, etag, last_modified)
+
+        return wrapper
+
+    return decorator
+
+
+def aconditional(validators):
+    """conditional() for the async function views; validators is a coroutine function of (request, *args, **kwargs)."""
+
+    def decorator(view):
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            state = await validators(request, *args, **kwargs)
+
+            if state is None:
+                return await view(request, *args, **kwargs)
+
+            version, last_modified = state
+            etag = make_etag(request, version)
+            response = _not_modified(request, etag, last_modified)
+
+            if response is None:
+                response = await view(request, *args, **kwargs)
+
+            return _set_validators(response, etag, last_modified)
+
+        return wrapper
+
+    return decorator
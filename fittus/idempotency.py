@@ -0,0 +1,135 @@
+import hashlib
+from contextlib import contextmanager
+from datetime import timedelta
+from functools import wraps
+from django.conf import settings
+from django.db import IntegrityError, OperationalError, connection, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+from apps.users.models import IdempotencyKey
+
+# Idempotency-Key support for create endpoints. The key is inserted into a
+# table unique on (user, key) inside the transaction the view runs in, and its
+# successful response is saved on the same row before commit. Retries with
+# the same key replay it without running the view. A concurrent duplicate
+# blocks on the uncommitted insert until the first request finishes, then
+# replays its response, or runs itself if the first one failed and rolled back.
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 255
+
+
+def fingerprint(request):
+    return hashlib.sha256(
+        b'\n'.join([request.method.encode(), request.path.encode(), request.body])
+    ).digest()
+
+
+@contextmanager
+def lock_timeout(seconds):
+    """
+    Bound how long Postgres waits on row locks inside the block. Use it in a
+    savepoint: an error inside leaves the setting to the savepoint rollback.
+    """
+    if connection.vendor != 'postgresql':
+        yield
+        return
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT current_setting('lock_timeout'), set_config('lock_timeout', %s, true)",
+            [f'{round(seconds * 1000)}ms']
+        )
+        previous, _ = cursor.fetchone()
+
+    yield
+
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT set_config('lock_timeout', %s, true)", [previous])
+
+
+def _claim(user, key, request_fingerprint):
+    """Insert the key and return (row, None), or (None, stored) when a live row already holds it."""
+    cutoff = timezone.now() - timedelta(seconds=settings.IDEMPOTENCY_TTL)
+
+    while True:
+        try:
+            with transaction.atomic(), lock_timeout(settings.IDEMPOTENCY_LOCK_WAIT):
+                return IdempotencyKey.objects.create(user=user, key=key, fingerprint=request_fingerprint), None
+        except IntegrityError:
+            stored = IdempotencyKey.objects.filter(user=user, key=key).first()
+
+            if stored is not None and stored.created_at >= cutoff:
+                return None, stored
+
+            # Expired keys are taken over as if they had never been used.
+            IdempotencyKey.objects.filter(user=user, key=key, created_at__lt=cutoff).delete()
+
+
+def _replay(stored, request_fingerprint):
+    if bytes(stored.fingerprint) != request_fingerprint:
+        return Response(
+            {'error': 'Idempotency-Key was already used for a different request.'},
+            status=status.HTTP_422_UNPROCESSABLE_ENTITY
+        )
+
+    return Response(stored.response, status=stored.status_code, headers={'Idempotent-Replayed': 'true'})
+
+
+def prune_keys(older_than=None):
+    """Delete keys past IDEMPOTENCY_TTL, or `older_than` seconds, and return how many."""
+    older_than = settings.IDEMPOTENCY_TTL if older_than is None else older_than
+    cutoff = timezone.now() - timedelta(seconds=older_than)
+    deleted, _ = IdempotencyKey.objects.filter(created_at__lt=cutoff).delete()
+    return deleted
+
+
+def idempotent(handler):
+    """Wrap a DRF view handler so requests carrying an Idempotency-Key run once."""
+
+    @wraps(handler)
+    def wrapper(view, request, *args, **kwargs):
+        client_key = request.headers.get(IDEMPOTENCY_HEADER)
+
+        if not client_key:
+            return handler(view, request, *args, **kwargs)
+
+        if len(client_key) > MAX_KEY_LENGTH:
+            return Response(
+                {'error': f'Idempotency-Key must be at most {MAX_KEY_LENGTH} characters.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        # Hashed to a fixed width; scoped per user so one user's key can
+        # never replay another user's response.
+        key = hashlib.sha256(client_key.encode()).hexdigest()
+        request_fingerprint = fingerprint(request)
+
+        with transaction.atomic():
+            try:
+                record, stored = _claim(request.user, key, request_fingerprint)
+            except OperationalError:
+                # lock_timeout expired waiting on the first request.
+                return Response(
+                    {'error': 'A request with this Idempotency-Key is still in progress.'},
+                    status=status.HTTP_409_CONFLICT
+                )
+
+            if stored is not None:
+                return _replay(stored, request_fingerprint)
+
+            response = handler(view, request, *args, **kwargs)
+
+            if status.is_success(response.status_code):
+                record.status_code = response.status_code
+                record.response = response.data
+                record.save(update_fields=['status_code', 'response'])
+            else:
+                # The key goes with the rest of a failed request, which may
+                # then be retried as is.
+                transaction.set_rollback(True)
+
+            return response
+
+    return wrapper
@@ -0,0 +1,78 @@
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+IN_LIST = re.compile(r'\((?:\s*%s\s*,)+\s*%s\s*\)')
+WHITESPACE = re.compile(r'\s+')
+
+# The recorder in effect is a context variable rather than a wrapper bound to
+# one thread's connections, so queries made through sync_to_async (which
+# copies the context into its worker thread) and while a streaming response
+# is iterated are counted too.
+current_recorder = ContextVar('current_recorder', default=None)
+
+
+def query_shape(sql):
+    # Params arrive separately, so only IN (...) lists of varying length and
+    # whitespace need collapsing for repeated statements to compare equal.
+    return WHITESPACE.sub(' ', IN_LIST.sub('(...)', sql)).strip()
+
+
+class QueryRecorder:
+    """connection.execute_wrapper callable counting queries, DB time and SQL shapes."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.shapes = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+            self.shapes[query_shape(sql)] += 1
+
+    def duplicates(self, threshold):
+        return {shape: count for shape, count in self.shapes.items() if count >= threshold}
+
+
+def _dispatch(execute, sql, params, many, context):
+    recorder = current_recorder.get()
+
+    if recorder is None:
+        return execute(sql, params, many, context)
+
+    return recorder(execute, sql, params, many, context)
+
+
+def _install(connection, **kwargs):
+    if _dispatch not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_dispatch)
+
+
+# Connections opened from now on, in any thread, report to the recorder.
+connection_created.connect(_install)
+
+
+@contextmanager
+def recording(recorder):
+    """Make recorder current for the queries run inside the block."""
+    for connection in connections.all(initialized_only=True):
+        _install(connection)
+
+    token = current_recorder.set(recorder)
+    try:
+        yield recorder
+    finally:
+        current_recorder.reset(token)
+
+
+def record_queries():
+    return recording(QueryRecorder())
@@ -0,0 +1,145 @@
+import json
+import logging
+import time
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.handlers.asgi import ASGIRequest
+from .instrumentation import QueryRecorder, recording
+
+logger = logging.getLogger('fittus.sql')
+
+
+class ASGIURLConfMiddleware:
+    """
+    Resolve requests served under ASGI against settings.ASGI_URLCONF, so the
+    same settings serve both deployments and only ASGI gets the async views.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if isinstance(request, ASGIRequest):
+            request.urlconf = settings.ASGI_URLCONF
+
+        return self.get_response(request)
+
+
+class QueryInstrumentationMiddleware:
+    """
+    Opt-in (SQL_INSTRUMENTATION=True) per-request SQL accounting. Adds a
+    Server-Timing header splitting DB time from the rest of the request,
+    logs one JSON line per request and warns about repeated SQL shapes,
+    which usually point at an N+1.
+
+    Works natively under both WSGI and ASGI. Streaming responses are logged
+    once their content has been sent, queries made while streaming included;
+    they get no Server-Timing header since theirs are sent before that.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.SQL_INSTRUMENTATION:
+            raise MiddlewareNotUsed
+
+        self.get_response = get_response
+        self.duplicate_threshold = settings.SQL_DUPLICATE_THRESHOLD
+
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        started = time.perf_counter()
+        recorder = QueryRecorder()
+
+        with recording(recorder):
+            response = self.get_response(request)
+
+        return self._finish(request, response, recorder, started)
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        recorder = QueryRecorder()
+
+        with recording(recorder):
+            response = await self.get_response(request)
+
+        return self._finish(request, response, recorder, started)
+
+    def _finish(self, request, response, recorder, started):
+        if not response.streaming:
+            total_ms = (time.perf_counter() - started) * 1000
+            response['Server-Timing'] = (
+                f'db;dur={recorder.duration * 1000:.2f};desc="{recorder.count} queries", '
+                f'app;dur={total_ms - recorder.duration * 1000:.2f}, '
+                f'total;dur={total_ms:.2f}'
+            )
+            self._log(request, response, recorder, started)
+            return response
+
+        record = self._arecorded if response.is_async else self._recorded
+        response.streaming_content = record(response.streaming_content, request, response, recorder, started)
+
+        return response
+
+    def _recorded(self, content, request, response, recorder, started):
+        content = iter(content)
+
+        try:
+            while True:
+                with recording(recorder):
+                    chunk = next(content, None)
+
+                if chunk is None:
+                    break
+
+                yield chunk
+        finally:
+            self._log(request, response, recorder, started)
+
+    async def _arecorded(self, content, request, response, recorder, started):
+        content = aiter(content)
+
+        try:
+            while True:
+                with recording(recorder):
+                    chunk = await anext(content, None)
+
+                if chunk is None:
+                    break
+
+                yield chunk
+        finally:
+            self._log(request, response, recorder, started)
+
+    def _log(self, request, response, recorder, started):
+        total_ms = (time.perf_counter() - started) * 1000
+        duplicates = recorder.duplicates(self.duplicate_threshold)
+
+        logger.info(json.dumps({
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'queries': recorder.count,
+            'db_ms': round(recorder.duration * 1000, 2),
+            'total_ms': round(total_ms, 2),
+            'duplicate_shapes': len(duplicates),
+            'streamed': response.streaming,
+        }))
+
+        for shape, count in duplicates.items():
+            logger.warning(json.dumps({
+                'path': request.path,
+                'repeated': count,
+                'sql': shape,
+            }))
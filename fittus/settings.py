@@ -45,17 +45,33 @@ INSTALLED_APPS = [
     'apps.groups',
     'apps.expenses',
     'apps.balances',
+    'apps.tasks',
+    'apps.activity',
+    'apps.analytics',
+    'apps.benchmarks',
 ]
 
 AUTH_USER_MODEL = 'users.User'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES' : [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'apps.users.authentication.CachedUserJWTAuthentication',
     ]
 }
 
+# Seconds a worker trusts its cached is_active flag and profile fields for a token's user.
+AUTH_USER_CACHE_TTL = config('AUTH_USER_CACHE_TTL', default=30, cast=int)
+
+# Idempotency-Key responses are replayed for this many seconds; a duplicate
+# arriving while the first request runs waits up to IDEMPOTENCY_LOCK_WAIT.
+# Keys live in users.IdempotencyKey; expired ones are removed by
+# manage.py prune_idempotency_keys.
+IDEMPOTENCY_TTL = config('IDEMPOTENCY_TTL', default=60 * 60 * 24, cast=int)
+IDEMPOTENCY_LOCK_WAIT = config('IDEMPOTENCY_LOCK_WAIT', default=5, cast=float)
+
 MIDDLEWARE = [
+    'fittus.middleware.QueryInstrumentationMiddleware',
+    'fittus.middleware.ASGIURLConfMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -65,8 +81,16 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Per-request SQL counts, Server-Timing headers and N+1 warnings (fittus.sql logger).
+SQL_INSTRUMENTATION = config('SQL_INSTRUMENTATION', default=False, cast=bool)
+SQL_DUPLICATE_THRESHOLD = config('SQL_DUPLICATE_THRESHOLD', default=3, cast=int)
+
 ROOT_URLCONF = 'fittus.urls'
 
+# Requests served under ASGI resolve against this instead, which routes the
+# read-heavy endpoints to native async views (see ASGIURLConfMiddleware).
+ASGI_URLCONF = 'fittus.asgi_urls'
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
@@ -108,7 +132,42 @@ DATABASES = {
         'USER': config('DB_USER'),
         'PASSWORD': config('DB_PASSWORD'),
         'HOST': config('DB_HOST'),
-        'PORT': config('DB_PORT')
+        'PORT': config('DB_PORT'),
+        # The ASGI deployment runs each sync call in a fresh thread, and a
+        # persistent connection per thread would leak; connections are reused
+        # through the pool below instead. Only raise this under WSGI.
+        'CONN_MAX_AGE': config('DB_CONN_MAX_AGE', default=0, cast=int),
+        'CONN_HEALTH_CHECKS': config('DB_CONN_HEALTH_CHECKS', default=True, cast=bool),
+        'OPTIONS': {},
+    }
+}
+
+# Connection pool (psycopg 3 with the pool extra, see requirements.txt), on by
+# default: connections go back to it when a request finishes, whichever
+# thread ran it. Pools are per worker process: DB_POOL_MAX_SIZE x worker
+# count must stay below Postgres max_connections.
+if config('DB_POOL', default=True, cast=bool):
+    DATABASES['default']['CONN_MAX_AGE'] = 0
+    DATABASES['default']['OPTIONS']['pool'] = {
+        'min_size': config('DB_POOL_MIN_SIZE', default=2, cast=int),
+        'max_size': config('DB_POOL_MAX_SIZE', default=10, cast=int),
+        'timeout': config('DB_POOL_TIMEOUT', default=10, cast=float),
+        'max_idle': config('DB_POOL_MAX_IDLE', default=300, cast=float),
+    }
+
+# Cache
+# https://docs.djangoproject.com/en/6.0/topics/cache/
+#
+# Production needs a cache shared by every web and worker process, e.g.
+# CACHE_BACKEND=django.core.cache.backends.redis.RedisCache and
+# CACHE_LOCATION=redis://127.0.0.1:6379/0. The in-process default is only
+# for development: manage.py check --deploy fails on it (fittus.E001) and
+# run_worker warns that the cache warming its tasks do is lost.
+
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default='fittus'),
     }
 }
 
@@ -148,3 +207,24 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/6.0/howto/static-files/
 
 STATIC_URL = 'static/'
+
+
+# Logging
+# https://docs.djangoproject.com/en/6.0/topics/logging/
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'fittus.sql': {
+            'handlers': ['console'],
+            'level': config('SQL_LOG_LEVEL', default='INFO'),
+            'propagate': False,
+        },
+    },
+}
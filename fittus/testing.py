@@ -0,0 +1,55 @@
+import json
+from contextlib import contextmanager
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.test import AsyncClient, Client
+from rest_framework_simplejwt.tokens import RefreshToken
+from .instrumentation import record_queries
+
+
+class QueryBudgetMixin:
+    """
+    TestCase mixin asserting a per-view query budget. Unlike assertNumQueries
+    it also fails when one SQL shape repeats, the usual sign of an N+1.
+    """
+
+    @contextmanager
+    def assertQueryBudget(self, max_queries, max_repeats=2):
+        with record_queries() as recorder:
+            yield recorder
+
+        self.assertLessEqual(
+            recorder.count,
+            max_queries,
+            f'{recorder.count} queries executed, budget is {max_queries}.'
+        )
+
+        repeated = recorder.duplicates(max_repeats + 1)
+        self.assertFalse(
+            repeated,
+            'Repeated SQL shapes:\n' + '\n'.join(f'{count}x {shape}' for shape, count in repeated.items())
+        )
+
+
+class AsyncParityMixin:
+    """
+    TestCase mixin running one request through the WSGI stack (the DRF view)
+    and through the ASGI stack (the async view in fittus.asgi_urls), and
+    checking both answer the same.
+    """
+
+    def assertSameResponse(self, user, method, path, data=None):
+        kwargs = {'headers': {'Authorization': f'Bearer {RefreshToken.for_user(user).access_token}'}}
+
+        if method == 'post':
+            data = json.dumps(data or {})
+            kwargs['content_type'] = 'application/json'
+
+        sync_response = getattr(Client(), method)(path, data, **kwargs)
+        async_response = async_to_sync(getattr(AsyncClient(), method))(path, data, **kwargs)
+
+        self.assertFalse(iscoroutinefunction(sync_response.resolver_match.func), f'{path} served by an async view under WSGI.')
+        self.assertTrue(iscoroutinefunction(async_response.resolver_match.func), f'{path} has no async view under ASGI.')
+        self.assertEqual(async_response.status_code, sync_response.status_code)
+        self.assertEqual(async_response.json(), sync_response.json())
+
+        return sync_response
@@ -22,4 +22,7 @@ urlpatterns = [
     path('users/', include('apps.users.urls')),
     path('groups/', include('apps.groups.urls')),
     path('expenses/', include('apps.expenses.urls')),
+    path('tasks/', include('apps.tasks.urls')),
+    path('activity/', include('apps.activity.urls')),
+    path('analytics/', include('apps.analytics.urls')),
 ]
@@ -0,0 +1,36 @@
+import time
+from django.core.cache import cache
+
+# Version counters for cache entries: bumping one orphans every entry keyed on
+# it. They live in the default cache, which deployments must share between
+# processes (fittus.E001) for a bump in one to reach the others.
+
+
+def cache_version(key):
+    version = cache.get(key)
+
+    if version is None:
+        # Seed from the clock rather than 1 so an evicted counter never
+        # comes back at a value that older cache entries were keyed on.
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+
+    return version
+
+
+async def acache_version(key):
+    version = await cache.aget(key)
+
+    if version is None:
+        await cache.aadd(key, time.time_ns(), timeout=None)
+        version = await cache.aget(key)
+
+    return version
+
+
+def bump_cache_version(key):
+    try:
+        return cache.incr(key)
+    except ValueError:
+        cache.add(key, time.time_ns(), timeout=None)
+        return cache.get(key)